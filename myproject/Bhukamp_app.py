@@ -6,6 +6,7 @@ from datetime import timedelta, datetime
 import time
 import base64
 import os
+from earthquake_event_stream import get_event_stream
 
 # ------------------ Page Configuration ------------------
 st.set_page_config(
@@ -85,6 +86,9 @@ if 'alert_threshold' not in st.session_state:
     st.session_state.alert_threshold = 4.0
 if 'last_alert_time' not in st.session_state:
     st.session_state.last_alert_time = None
+if 'event_cursor' not in st.session_state:
+    # Set to the stream's head on the first refresh (see get_new_alert_quakes)
+    st.session_state.event_cursor = None
 
 # ------------------ Theme and Settings Sidebar ------------------
 with st.sidebar:
@@ -543,72 +547,35 @@ def check_for_alerts(latest_quake):
     return False
 
 def get_latest_quake():
-    """Get the latest earthquake from Indian subcontinent"""
-    # Indian subcontinent bounding box coordinates
-    india_bounds = {
-        "minlatitude": 6.0,      # Southern tip (near Kanyakumari)
-        "maxlatitude": 37.0,     # Northern border (Kashmir region)
-        "minlongitude": 68.0,    # Western border (near Pakistan border)
-        "maxlongitude": 97.0     # Eastern border (near Myanmar border)
-    }
+    """Get the latest earthquake from Indian subcontinent (None until the first poll lands)"""
+    # Served from the shared event stream, which polls USGS in the background;
+    # never block here, the fragment refreshes every 15 seconds anyway
+    return get_event_stream().latest()
+
+def get_new_alert_quakes():
+    """Return quakes published since this session last looked that need an alert"""
+    stream = get_event_stream()
+    if st.session_state.event_cursor is None:
+        # A new session starts at the stream's head: the backfill is history,
+        # so only the latest quake is checked, as on a fresh page load
+        if stream.cursor == 0:
+            return []
+        st.session_state.event_cursor = stream.cursor
+        latest = stream.latest()
+        return [latest] if check_for_alerts(latest) else []
     
-    url = (
-        "https://earthquake.usgs.gov/fdsnws/event/1/query"
-        f"?format=geojson&limit=1&orderby=time"
-        f"&minlatitude={india_bounds['minlatitude']}"
-        f"&maxlatitude={india_bounds['maxlatitude']}"
-        f"&minlongitude={india_bounds['minlongitude']}"
-        f"&maxlongitude={india_bounds['maxlongitude']}"
+    events, st.session_state.event_cursor = stream.events_since(
+        st.session_state.event_cursor
     )
-    try:
-        with st.spinner("Fetching latest Indian earthquake data..."):
-            r = requests.get(url)
-            data = r.json()
-            
-            if not data["features"]:
-                # If no recent earthquakes in India, get the most recent one from a longer time period
-                url_extended = (
-                    "https://earthquake.usgs.gov/fdsnws/event/1/query"
-                    f"?format=geojson&limit=1&orderby=time"
-                    f"&minlatitude={india_bounds['minlatitude']}"
-                    f"&maxlatitude={india_bounds['maxlatitude']}"
-                    f"&minlongitude={india_bounds['minlongitude']}"
-                    f"&maxlongitude={india_bounds['maxlongitude']}"
-                    f"&starttime={(pd.Timestamp.now() - pd.Timedelta(days=30)).strftime('%Y-%m-%d')}"
-                )
-                r = requests.get(url_extended)
-                data = r.json()
-                
-                if not data["features"]:
-                    return None
-            
-            feature = data["features"][0]["properties"]
-            geometry = data["features"][0]["geometry"]
-            
-            return {
-                "magnitude": feature["mag"],
-                "place": feature["place"],
-                "time": pd.to_datetime(feature["time"], unit="ms"),
-                "latitude": geometry["coordinates"][1],
-                "longitude": geometry["coordinates"][0],
-                "depth": geometry["coordinates"][2] if len(geometry["coordinates"]) > 2 else "N/A"
-            }
-    except Exception as e:
-        st.error(f"⚠️ Could not fetch latest earthquake data: {e}")
-        return None
+    return [quake for quake in events if check_for_alerts(quake)]
 
-with st.container():
-    st.markdown("<div class='glass-container'>", unsafe_allow_html=True)
-    st.markdown(f"## {t.get('live_snapshot', '🇮🇳 Live Indian Subcontinent Earthquake Snapshot')}")
-
-    # Auto-refresh every 30 seconds
-    if st.button("🔄 Refresh Data", key="refresh_btn"):
-        st.rerun()
-    
+# Auto-refresh every 15 seconds without rerunning the whole page
+@st.fragment(run_every="15s")
+def live_snapshot():
     latest = get_latest_quake()
     
-    # Check for alerts
-    if check_for_alerts(latest):
+    # Check for alerts on quakes that arrived since the last refresh
+    if get_new_alert_quakes():
         st.error("🚨 **EARTHQUAKE ALERT!** 🚨")
         play_alert_sound()
         st.markdown("""
@@ -701,7 +668,11 @@ with st.container():
     else:
         st.warning("⚠️ No recent earthquake data available for the Indian subcontinent from USGS.")
         st.info("💡 This could mean there have been no significant earthquakes in the region recently, or there might be a temporary issue with the data source.")
-    
+
+with st.container():
+    st.markdown("<div class='glass-container'>", unsafe_allow_html=True)
+    st.markdown(f"## {t.get('live_snapshot', '🇮🇳 Live Indian Subcontinent Earthquake Snapshot')}")
+    live_snapshot()
     st.markdown("</div>", unsafe_allow_html=True)
 
 # ------------------ Enhanced Data Analysis Section ------------------
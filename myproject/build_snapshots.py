@@ -0,0 +1,42 @@
+"""
+Data Snapshot Build
+Converts the app's source CSVs into the Parquet snapshots the loaders
+read (see datastore.snapshots) and publishes a new manifest version. Run
+it after changing a dataset and as part of deployment; unchanged sources
+are skipped. The memory-mapped frames (see datastore.shared) are cleared,
+so a deploy that changes a loader never serves frames from the old one.
+
+    python build_snapshots.py
+    python build_snapshots.py catalog pinn_predictions --force
+"""
+
+import argparse
+import logging
+
+from datastore.shared import clear_frames
+from datastore.snapshots import SNAPSHOT_DIR, SNAPSHOT_SPECS, build_snapshots
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build Parquet snapshots of the app's datasets")
+    parser.add_argument("datasets", nargs="*",
+                        help=f"datasets to build: {', '.join(SNAPSHOT_SPECS)} (default: all available)")
+    parser.add_argument("--dir", default=str(SNAPSHOT_DIR), help="snapshot directory")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the source is unchanged")
+    args = parser.parse_args()
+    unknown = [name for name in args.datasets if name not in SNAPSHOT_SPECS]
+    if unknown:
+        parser.error(f"unknown datasets: {', '.join(unknown)}")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    manifest = build_snapshots(args.datasets or None, args.dir, force=args.force)
+    for name, entry in sorted(manifest["datasets"].items()):
+        print(f"{name:18s} {entry['rows']:>7,} rows  {entry['source_bytes'] / 1e6:6.2f} MB csv -> "
+              f"{entry['snapshot_bytes'] / 1e6:6.2f} MB parquet  {entry['snapshot']}")
+    print(f"Manifest version {manifest['version']} in {args.dir}")
+    # Memory-mapped frames are rebuilt from the new snapshots on next load
+    print(f"Cleared {clear_frames()} memory-mapped frame files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Time-Sorted Catalog Index
+Keeps an earthquake catalog sorted by event time under an int64 epoch
+(nanoseconds, UTC) index, so date-range filters become two `searchsorted`
+calls and a positional slice instead of a per-row date comparison.
+Magnitudes are bucketed into 0.1-wide bins with precomputed row positions,
+so narrow magnitude ranges only touch the rows that can match.
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple, Union
+
+DateLike = Union[str, date, pd.Timestamp, np.datetime64]
+
+# Magnitude bins match the 0.1 step of the magnitude sliders
+MAG_BIN_WIDTH = 0.1
+
+# float32 magnitude columns are widened through this many decimals, so a
+# stored 4.6999998 bins and compares as the 4.7 it was parsed from
+MAG_DECIMALS = 4
+
+
+def epoch_ns(times: pd.Series) -> np.ndarray:
+    """int64 nanoseconds since the epoch (UTC for tz-aware columns)"""
+    if getattr(times.dt, "tz", None) is not None:
+        times = times.dt.tz_convert(None)
+    return np.asarray(times, dtype="datetime64[ns]").view(np.int64)
+
+
+def timestamp_ns(value: DateLike) -> int:
+    """Epoch nanoseconds of a date/datetime, treating naive values as UTC"""
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_convert(None)
+    return int(stamp.as_unit("ns").value)
+
+
+def magnitude_values(column: pd.Series) -> np.ndarray:
+    """float64 magnitudes of a column, undoing float32 rounding (NaN for missing)"""
+    values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+    if getattr(column.dtype, "itemsize", 8) < 8:
+        values = np.round(values, MAG_DECIMALS)
+    return values
+
+
+def sort_by_time(df: pd.DataFrame, time_column: str = "time") -> pd.DataFrame:
+    """
+    Sort a catalog by `time_column` (rows without a time are dropped) and
+    index it by int64 epoch nanoseconds, named `epoch_ns`. A column that is
+    not datetimelike (e.g. the loaders' empty fallback frame) is parsed first.
+    """
+    if not pd.api.types.is_datetime64_any_dtype(df[time_column]):
+        df = df.assign(**{time_column: pd.to_datetime(df[time_column], errors="coerce", utc=True)})
+    df = df.dropna(subset=[time_column])
+    df = df.sort_values(time_column, kind="stable")
+    df.index = pd.Index(epoch_ns(df[time_column]), name="epoch_ns")
+    return df
+
+
+class CatalogIndex:
+    """
+    Filter engine over a time-sorted catalog.
+
+    `frame` is sorted by time with an `epoch_ns` index (see `sort_by_time`).
+    Date ranges resolve to a contiguous row slice; magnitude ranges resolve
+    through per-bin row positions or a mask over the time slice, whichever
+    touches fewer rows. `filter` returns the matching rows in time order.
+    """
+
+    def __init__(self, frame: pd.DataFrame, time_column: str = "time",
+                 mag_column: str = "mag"):
+        if frame.index.name != "epoch_ns" or not frame.index.is_monotonic_increasing:
+            frame = sort_by_time(frame, time_column)
+        self.frame = frame
+        self.time_column = time_column
+        self.mag_column = mag_column
+
+        self.epoch = frame.index.to_numpy(dtype=np.int64)
+        self.mags = magnitude_values(frame[mag_column])
+
+        # Rows grouped by magnitude bin; positions stay sorted within a bin
+        # (stable sort) and rows without a magnitude sort last, in no bin
+        valid = ~np.isnan(self.mags)
+        codes = np.full(len(frame), np.iinfo(np.int32).max, dtype=np.int32)
+        if valid.any():
+            codes[valid] = np.floor(self.mags[valid] / MAG_BIN_WIDTH + 1e-9).astype(np.int32)
+            self.min_code = int(codes[valid].min())
+            self.max_code = int(codes[valid].max())
+        else:
+            self.min_code, self.max_code = 0, -1
+        self.bin_positions = np.argsort(codes, kind="stable")
+        sorted_codes = codes[self.bin_positions]
+        # bin_offsets[i]:bin_offsets[i + 1] spans bin min_code + i in bin_positions
+        self.bin_offsets = np.searchsorted(
+            sorted_codes, np.arange(self.min_code, self.max_code + 2), side="left")
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def time_bounds(self) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """First and last event time"""
+        column = self.frame[self.time_column]
+        return column.iloc[0], column.iloc[-1]
+
+    @property
+    def magnitude_bounds(self) -> Tuple[float, float]:
+        return float(np.nanmin(self.mags)), float(np.nanmax(self.mags))
+
+    def time_slice(self, start: Optional[DateLike] = None,
+                   end: Optional[DateLike] = None, end_inclusive_day: bool = True) -> slice:
+        """
+        Row slice for events between `start` and `end`. With
+        `end_inclusive_day` a date `end` covers that whole (UTC) day, matching
+        `time.dt.date <= end`.
+        """
+        lo = 0
+        hi = len(self.epoch)
+        if start is not None:
+            lo = int(np.searchsorted(self.epoch, timestamp_ns(start), side="left"))
+        if end is not None:
+            if end_inclusive_day:
+                next_day = pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+                hi = int(np.searchsorted(self.epoch, timestamp_ns(next_day), side="left"))
+            else:
+                hi = int(np.searchsorted(self.epoch, timestamp_ns(end), side="right"))
+        return slice(lo, max(lo, hi))
+
+    def _bin_range(self, min_mag: Optional[float], max_mag: Optional[float]) -> Tuple[int, int]:
+        """Range of bin slots [first, last) that can hold magnitudes in [min_mag, max_mag]"""
+        first = 0
+        last = self.max_code - self.min_code + 1
+        if min_mag is not None:
+            code = int(np.floor(min_mag / MAG_BIN_WIDTH + 1e-9))
+            first = min(max(code - self.min_code, 0), last)
+        if max_mag is not None:
+            code = int(np.floor(max_mag / MAG_BIN_WIDTH + 1e-9))
+            last = max(min(code - self.min_code + 1, last), first)
+        return first, last
+
+    def positions(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+                  min_mag: Optional[float] = None,
+                  max_mag: Optional[float] = None) -> Union[slice, np.ndarray]:
+        """
+        Row positions matching the filters, ascending. A pure date filter
+        returns a slice; adding a magnitude range returns an int64 array.
+        """
+        rows = self.time_slice(start, end)
+        if min_mag is None and max_mag is None:
+            return rows
+
+        first, last = self._bin_range(min_mag, max_mag)
+        lo_offset, hi_offset = self.bin_offsets[first], self.bin_offsets[last]
+        if hi_offset - lo_offset < rows.stop - rows.start:
+            # Fewer rows in the magnitude bins than in the date range
+            candidates = self.bin_positions[lo_offset:hi_offset]
+            candidates = np.sort(candidates[(candidates >= rows.start) & (candidates < rows.stop)])
+            mags = self.mags[candidates]
+        else:
+            candidates = None
+            mags = self.mags[rows]
+
+        # Exact comparison; only the edge bins can hold out-of-range values
+        keep = ~np.isnan(mags)
+        if min_mag is not None:
+            keep &= mags >= min_mag
+        if max_mag is not None:
+            keep &= mags <= max_mag
+        if candidates is None:
+            return np.flatnonzero(keep) + rows.start
+        return candidates[keep].astype(np.int64, copy=False)
+
+    def filter(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+               min_mag: Optional[float] = None, max_mag: Optional[float] = None) -> pd.DataFrame:
+        """Rows matching a date range (inclusive days) and magnitude range, in time order"""
+        return self.frame.iloc[self.positions(start, end, min_mag, max_mag)]
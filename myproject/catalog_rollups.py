@@ -0,0 +1,146 @@
+"""
+Catalog Rollup Cube
+Pre-aggregates an earthquake catalog at load time into counts and magnitude
+statistics per (day, hour, regional zone, 0.1 magnitude band). Cells are
+sorted by day, so a date range is a `searchsorted` slice of the cube and a
+magnitude range is a mask over that slice; trend, hour-of-day, zone and
+magnitude-distribution charts then aggregate a few thousand cells instead
+of rescanning raw events.
+
+Magnitudes are assumed to be reported to 0.1; a value between steps
+(e.g. 4.35) falls in the band below it.
+"""
+
+from datetime import date
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from catalog_index import epoch_ns, magnitude_values, timestamp_ns
+from geo_filter import REGIONAL_ZONE_BANDS, regional_zone_codes
+
+NS_PER_HOUR = 3_600 * 10**9
+NS_PER_DAY = 24 * NS_PER_HOUR
+BAND_WIDTH = 0.1
+
+ZONES = [name for name, _ in REGIONAL_ZONE_BANDS]
+
+DateLike = Union[str, date, pd.Timestamp, np.datetime64]
+
+
+class RollupCube:
+    """
+    Sparse cube over a catalog: one cell per occupied
+    (day, hour, zone, magnitude band), sorted in that order.
+
+    Each cell holds `count`, `mag_sum`, `mag_sq_sum`, `mag_min` and
+    `mag_max`. `select` turns filters into a cell selection, which the
+    `totals`/`by_*` methods reduce to chart-ready frames.
+    """
+
+    def __init__(self, frame: pd.DataFrame, time_column: str = "time",
+                 mag_column: str = "mag", lat_column: str = "latitude"):
+        mags = magnitude_values(frame[mag_column])
+        valid = ~np.isnan(mags)
+        epoch = epoch_ns(frame[time_column])[valid]
+        mags = mags[valid]
+        lat = frame[lat_column].to_numpy(dtype=np.float64, na_value=np.nan)[valid]
+
+        day = np.floor_divide(epoch, NS_PER_DAY)
+        hour = np.floor_divide(epoch, NS_PER_HOUR) - day * 24
+        zone = regional_zone_codes(lat)
+        band = np.floor(mags / BAND_WIDTH + 1e-9).astype(np.int64)
+        self.min_band = int(band.min()) if len(band) else 0
+        band_count = (int(band.max()) - self.min_band + 1) if len(band) else 1
+
+        # Composite key orders cells by (day, hour, zone, band)
+        key = ((day * 24 + hour) * len(ZONES) + zone) * band_count + (band - self.min_band)
+        # Rows are usually time-sorted already, which the stable sort exploits
+        order = np.argsort(key, kind="stable")
+        key, mags = key[order], mags[order]
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.empty(0, np.int64)
+        key = key[starts]
+
+        self.band = (key % band_count + self.min_band).astype(np.int16)
+        key //= band_count
+        self.zone = (key % len(ZONES)).astype(np.int8)
+        key //= len(ZONES)
+        self.hour = (key % 24).astype(np.int8)
+        self.day = key // 24
+        self.count = np.diff(np.r_[starts, len(mags)]).astype(np.int64)
+        if len(starts):
+            self.mag_sum = np.add.reduceat(mags, starts)
+            self.mag_sq_sum = np.add.reduceat(mags * mags, starts)
+            self.mag_min = np.minimum.reduceat(mags, starts)
+            self.mag_max = np.maximum.reduceat(mags, starts)
+        else:
+            self.mag_sum = self.mag_sq_sum = self.mag_min = self.mag_max = np.empty(0)
+
+    def __len__(self):
+        return len(self.count)
+
+    def select(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+               min_mag: Optional[float] = None, max_mag: Optional[float] = None,
+               zones: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Cube cell positions for an inclusive date range, magnitude range and zones"""
+        lo, hi = 0, len(self.day)
+        if start is not None:
+            lo = int(np.searchsorted(self.day, timestamp_ns(start) // NS_PER_DAY, side="left"))
+        if end is not None:
+            hi = int(np.searchsorted(self.day, timestamp_ns(end) // NS_PER_DAY, side="right"))
+        hi = max(lo, hi)
+
+        keep = np.ones(hi - lo, dtype=bool)
+        band = self.band[lo:hi]
+        if min_mag is not None:
+            keep &= band >= np.floor(min_mag / BAND_WIDTH + 1e-9)
+        if max_mag is not None:
+            keep &= band <= np.floor(max_mag / BAND_WIDTH + 1e-9)
+        if zones is not None:
+            keep &= np.isin(self.zone[lo:hi], [ZONES.index(z) for z in zones])
+        return np.flatnonzero(keep) + lo
+
+    def totals(self, cells: np.ndarray) -> Dict[str, float]:
+        """Event count and magnitude mean/std/min/max over the selected cells"""
+        count = int(self.count[cells].sum())
+        if count == 0:
+            return {"count": 0, "mean": np.nan, "std": np.nan, "min": np.nan, "max": np.nan}
+        mean = self.mag_sum[cells].sum() / count
+        variance = max(self.mag_sq_sum[cells].sum() / count - mean * mean, 0.0)
+        return {"count": count, "mean": float(mean), "std": float(np.sqrt(variance)),
+                "min": float(self.mag_min[cells].min()), "max": float(self.mag_max[cells].max())}
+
+    def _reduce(self, labels: np.ndarray, cells: np.ndarray, name: str) -> pd.DataFrame:
+        grouped = pd.DataFrame({
+            name: labels,
+            "count": self.count[cells],
+            "mag_sum": self.mag_sum[cells],
+            "mag_max": self.mag_max[cells]
+        }).groupby(name, sort=True).agg(count=("count", "sum"), mag_sum=("mag_sum", "sum"),
+                                        mag_max=("mag_max", "max"))
+        grouped["mag_mean"] = grouped["mag_sum"] / grouped["count"]
+        return grouped.drop(columns="mag_sum").reset_index()
+
+    def by_month(self, cells: np.ndarray) -> pd.DataFrame:
+        """year_month ('YYYY-MM'), count, mag_max, mag_mean per month"""
+        months = self.day[cells].astype("datetime64[D]").astype("datetime64[M]")
+        frame = self._reduce(months, cells, "month")
+        frame.insert(0, "year_month", frame.pop("month").dt.strftime("%Y-%m"))
+        return frame
+
+    def by_hour(self, cells: np.ndarray) -> pd.DataFrame:
+        """hour (0-23, UTC), count, mag_max, mag_mean"""
+        return self._reduce(self.hour[cells], cells, "hour")
+
+    def by_zone(self, cells: np.ndarray) -> pd.DataFrame:
+        """zone name, count, mag_max, mag_mean"""
+        frame = self._reduce(self.zone[cells], cells, "zone")
+        frame["zone"] = np.asarray(ZONES)[frame["zone"].to_numpy()]
+        return frame
+
+    def by_band(self, cells: np.ndarray) -> pd.DataFrame:
+        """magnitude (lower edge of each 0.1 band) and count"""
+        frame = self._reduce(self.band[cells], cells, "band")
+        frame.insert(0, "magnitude", (frame.pop("band") * BAND_WIDTH).round(1))
+        return frame[["magnitude", "count"]]
@@ -0,0 +1,217 @@
+"""
+On-Demand Data Export
+Serializes a filtered view to CSV, Parquet or GeoJSON only when a user asks
+for it, writing in row chunks to a file cache keyed by a fingerprint of the
+source data and filters. Reruns that nobody downloads from pay nothing, and
+repeat requests for the same view reuse the cached file.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# format -> (MIME type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "geojson": ("application/geo+json", ".geojson")
+}
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+FrameSource = Union[pd.DataFrame, Callable[[], pd.DataFrame]]
+
+
+def export_fingerprint(*parts) -> str:
+    """Stable short hash of the values that determine an export's contents"""
+    encoded = json.dumps(parts, default=str, sort_keys=True)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()[:20]
+
+
+def file_signature(path: str) -> Tuple[str, int, int]:
+    """(path, mtime, size) of a source file, for fingerprints that follow file edits"""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def _chunks(df: pd.DataFrame, chunk_rows: int):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def source_precision(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    float32 columns widened through their shortest float32 repr, so text
+    formats write the 84.9 a source held rather than 84.9000015258789
+    """
+    narrow = [column for column, dtype in df.dtypes.items() if dtype == np.float32]
+    if not narrow:
+        return df
+    return df.assign(**{column: df[column].to_numpy().astype(str).astype(np.float64)
+                        for column in narrow})
+
+
+def write_csv(df: pd.DataFrame, path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if df.empty:
+            df.to_csv(f, index=False)
+            return
+        for i, chunk in enumerate(_chunks(df, chunk_rows)):
+            source_precision(chunk).to_csv(f, index=False, header=(i == 0))
+
+
+def write_parquet(df: pd.DataFrame, path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in _chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def write_geojson(df: pd.DataFrame, path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                  lat_column: str = "latitude", lon_column: str = "longitude"):
+    """FeatureCollection of Points; every other column becomes a property"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"type": "FeatureCollection", "features": [')
+        first = True
+        for chunk in _chunks(df, chunk_rows):
+            chunk = source_precision(chunk)
+            lons = chunk[lon_column].to_numpy(dtype=np.float64, na_value=np.nan)
+            lats = chunk[lat_column].to_numpy(dtype=np.float64, na_value=np.nan)
+            # to_json handles NaN, timestamps and numpy scalars in one pass
+            properties = json.loads(chunk.drop(columns=[lat_column, lon_column])
+                                    .to_json(orient="records", date_format="iso"))
+            for lon, lat, props in zip(lons, lats, properties):
+                geometry = None
+                if not (np.isnan(lon) or np.isnan(lat)):
+                    geometry = {"type": "Point", "coordinates": [float(lon), float(lat)]}
+                f.write(("" if first else ",\n") + json.dumps(
+                    {"type": "Feature", "geometry": geometry, "properties": props}))
+                first = False
+        f.write("]}\n")
+
+
+class ExportCache:
+    """
+    Directory of prepared exports named `<fingerprint><ext>`.
+
+    Files are written to a temporary name and renamed into place, so a
+    concurrent reader never sees a partial export; the oldest files beyond
+    `max_files` are removed after each write.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_files: int = 32,
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "bhukamp_exports")
+        self.max_files = max_files
+        self.chunk_rows = chunk_rows
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path_for(self, fingerprint: str, fmt: str) -> str:
+        return os.path.join(self.directory, fingerprint + EXPORT_FORMATS[fmt][1])
+
+    def get(self, fingerprint: str, fmt: str) -> Optional[str]:
+        path = self.path_for(fingerprint, fmt)
+        return path if os.path.exists(path) else None
+
+    def export(self, data: FrameSource, fingerprint: str, fmt: str, **options) -> str:
+        """
+        Path of the export for `fingerprint`, writing it first if needed.
+        `data` may be a callable so building the frame is deferred as well.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+
+        path = self.get(fingerprint, fmt)
+        if path:
+            os.utime(path)
+            return path
+
+        df = data() if callable(data) else data
+        path = self.path_for(fingerprint, fmt)
+        partial = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        writer = {"csv": write_csv, "parquet": write_parquet, "geojson": write_geojson}[fmt]
+        try:
+            writer(df, partial, self.chunk_rows, **options)
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+        logger.info(f"Prepared {fmt} export of {len(df)} rows: {path}")
+
+        self.prune()
+        return path
+
+    def prune(self):
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                 if not name.endswith(".tmp")]
+        if len(files) <= self.max_files:
+            return
+        files.sort(key=lambda name: os.path.getmtime(name))
+        for stale in files[:len(files) - self.max_files]:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+_default_cache = None
+
+
+def default_cache() -> ExportCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ExportCache()
+    return _default_cache
+
+
+def export_controls(label: str, data: FrameSource, fingerprint: str, file_stem: str,
+                    formats=("csv",), key: Optional[str] = None, container=None,
+                    geojson_columns: Optional[Dict[str, str]] = None) -> Optional[str]:
+    """
+    Streamlit "prepare, then download" control for a filtered view.
+
+    Nothing is serialized until the prepare button is clicked; the download
+    button then serves the cached file and stays up while the fingerprint
+    (the filters) is unchanged. `geojson_columns` maps `lat_column` /
+    `lon_column` for the GeoJSON format. Returns the prepared path, if any.
+    """
+    import streamlit as st
+
+    container = container or st
+    key = key or f"export_{file_stem}"
+    if len(formats) > 1:
+        fmt = container.selectbox(f"{label} format", formats, key=f"{key}_format",
+                                  format_func=str.upper)
+    else:
+        fmt = formats[0]
+
+    prepared_key = f"{key}_prepared"
+    wanted = (fingerprint, fmt)
+    path = None
+    if st.session_state.get(prepared_key) == wanted:
+        path = default_cache().get(fingerprint, fmt)  # None if pruned since
+    if path is None:
+        if not container.button(f"⚙️ Prepare {label}", key=f"{key}_prepare"):
+            return None
+        options = dict(geojson_columns or {}) if fmt == "geojson" else {}
+        with st.spinner(f"Preparing {fmt.upper()} export..."):
+            path = default_cache().export(data, fingerprint, fmt, **options)
+        st.session_state[prepared_key] = wanted
+
+    mime, extension = EXPORT_FORMATS[fmt]
+    with open(path, "rb") as f:
+        container.download_button(label=f"📥 {label}", data=f.read(), file_name=file_stem + extension,
+                                  mime=mime, key=f"{key}_download")
+    return path
@@ -0,0 +1,39 @@
+"""
+Datastore
+Single data access layer for the Streamlit pages: dataset paths are
+resolved once, and each dataset is loaded once per process into a shared,
+read-only object (see `datastore.datasets`).
+"""
+
+from .datasets import (
+    SusceptibilityModel,
+    earthquake_catalog,
+    earthquake_features,
+    is_available,
+    labeled_earthquakes,
+    load_file,
+    pinn_predictions,
+    processed_catalog,
+    rf_predictions,
+    susceptibility_model
+)
+from .paths import DATASET_FILES, dataset_path, model_directory, searched_locations
+from .schemas import SchemaError
+
+__all__ = [
+    "DATASET_FILES",
+    "SchemaError",
+    "SusceptibilityModel",
+    "dataset_path",
+    "earthquake_catalog",
+    "earthquake_features",
+    "is_available",
+    "labeled_earthquakes",
+    "load_file",
+    "model_directory",
+    "pinn_predictions",
+    "processed_catalog",
+    "rf_predictions",
+    "searched_locations",
+    "susceptibility_model"
+]
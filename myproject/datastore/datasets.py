@@ -0,0 +1,175 @@
+"""
+Shared Datasets
+Process-wide loaders for the app's CSV datasets and model files. Each file
+is read once per process (from its Parquet snapshot when fresh, see
+`datastore.snapshots`) into an object held by `st.cache_resource` and
+handed to every page and session by reference, so a dataset costs one
+parse and one copy in memory however many pages use it. Frames are also
+memory-mapped from Arrow files (see `datastore.shared`), so other server
+and worker processes share the same pages.
+
+The returned frames are shared: treat them as read-only. Derive with
+`assign`, `copy(deep=False)` or filtering (cheap under pandas copy-on-write)
+rather than setting columns in place. A cache entry is keyed by the file's
+mtime and size, so replacing a file on disk loads the new version.
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, List, NamedTuple
+
+import pandas as pd
+import streamlit as st
+
+from catalog_index import sort_by_time
+from data_export import file_signature
+from geo_filter import filter_india
+from stage_timing import timed
+
+from . import schemas, shared, snapshots
+from .paths import DATASET_FILES, dataset_path, searched_locations
+
+logger = logging.getLogger(__name__)
+
+
+class SusceptibilityModel(NamedTuple):
+    model: Any
+    expected_columns: List[str]
+    fault_density_scaler: Any
+    hubdist_scaler: Any
+    mag_scaler: Any
+
+
+def _read_with_schema(path: Path, name: str, schema: schemas.Schema) -> pd.DataFrame:
+    return schemas.apply_schema(snapshots.read_source(path, name, dtypes=schema.dtypes), schema)
+
+
+def read_catalog(path: Path) -> pd.DataFrame:
+    """USGS catalog restricted to India, with parsed times, sorted under an epoch index"""
+    with timed("Read catalog"):
+        df = _read_with_schema(path, "catalog", schemas.CATALOG)
+    with timed("Filter to India"):
+        df = filter_india(df)
+    with timed("Parse times and sort"):
+        df['time'] = pd.to_datetime(df['time'], errors='coerce')
+        df = sort_by_time(df)
+    return df
+
+
+def read_table(path: Path) -> pd.DataFrame:
+    with timed(f"Read {path.name}"):
+        return snapshots.read_source(path)
+
+
+def read_features(path: Path) -> pd.DataFrame:
+    with timed(f"Read {path.name}"):
+        return _read_with_schema(path, "features", schemas.FEATURES)
+
+
+def read_labeled(path: Path) -> pd.DataFrame:
+    with timed(f"Read {path.name}"):
+        return _read_with_schema(path, "labeled", schemas.LABELED)
+
+
+def read_predictions(path: Path) -> pd.DataFrame:
+    """Either predictions file; `prediction_date` (when present) is parsed"""
+    with timed(f"Read {path.name}"):
+        return _read_with_schema(path, "pinn_predictions", schemas.PREDICTIONS)
+
+
+def read_susceptibility_model(model_path: Path, fault_density_path: Path,
+                              hubdist_path: Path, mag_path: Path) -> SusceptibilityModel:
+    import joblib
+
+    with timed("Load susceptibility model"):
+        model, expected_columns = joblib.load(model_path)
+        return SusceptibilityModel(model, list(expected_columns), joblib.load(fault_density_path),
+                                   joblib.load(hubdist_path), joblib.load(mag_path))
+
+
+_READERS = {
+    "catalog": read_catalog,
+    "table": read_table,
+    "features": read_features,
+    "labeled": read_labeled,
+    "predictions": read_predictions,
+    "susceptibility_model": read_susceptibility_model
+}
+
+# Reader for CSVs loaded by file name (see load_file)
+_FILE_READERS = {
+    DATASET_FILES["features"].filename: "features",
+    DATASET_FILES["labeled"].filename: "labeled",
+    DATASET_FILES["pinn_predictions"].filename: "predictions",
+    DATASET_FILES["rf_predictions"].filename: "predictions"
+}
+
+
+# Readers whose frames are shared between processes through memory-mapped
+# Arrow files (see datastore.shared); model files stay in process memory
+_MAPPED_READERS = {"catalog", "table", "features", "labeled", "predictions"}
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _load(reader: str, *versions):
+    """One shared object per (reader, file versions); versions come from file_signature"""
+    paths = [Path(version[0]) for version in versions]
+    logger.info(f"Loading {reader} from {', '.join(str(path) for path in paths)}")
+    if reader in _MAPPED_READERS:
+        return shared.shared_frame(reader, versions, lambda: _READERS[reader](*paths))
+    return _READERS[reader](*paths)
+
+
+def _require(name: str) -> Path:
+    path = dataset_path(name)
+    if path is None:
+        raise FileNotFoundError(f"{DATASET_FILES[name].filename} not found (looked in {searched_locations(name)})")
+    return path
+
+
+def is_available(name: str) -> bool:
+    """Whether a registered dataset exists on disk"""
+    return dataset_path(name) is not None
+
+
+def load_file(path: Path) -> pd.DataFrame:
+    """
+    Any CSV file, shared the same way as the named datasets. Files named
+    like a registered dataset load with its schema (and share its entry).
+    """
+    return _load(_FILE_READERS.get(Path(path).name, "table"), file_signature(path))
+
+
+def earthquake_catalog() -> pd.DataFrame:
+    """India earthquakes from earthquake.csv, time-sorted (see catalog_index.sort_by_time)"""
+    return _load("catalog", file_signature(_require("catalog")))
+
+
+def processed_catalog() -> pd.DataFrame:
+    return load_file(_require("processed_catalog"))
+
+
+def earthquake_features() -> pd.DataFrame:
+    """EarthquakeFeatures.csv: events with fault hub distance and density"""
+    return _load("features", file_signature(_require("features")))
+
+
+def labeled_earthquakes() -> pd.DataFrame:
+    """earthquakes_labeled.csv: features plus normalized columns and safety labels"""
+    return _load("labeled", file_signature(_require("labeled")))
+
+
+def pinn_predictions() -> pd.DataFrame:
+    """PINN 25-year (2025-2050) predictions with parsed `prediction_date`"""
+    return _load("predictions", file_signature(_require("pinn_predictions")))
+
+
+def rf_predictions() -> pd.DataFrame:
+    """Random Forest 100-year predictions"""
+    return _load("predictions", file_signature(_require("rf_predictions")))
+
+
+def susceptibility_model() -> SusceptibilityModel:
+    """Susceptibility classifier, its expected feature columns and the three input scalers"""
+    names = ("susceptibility_model", "fault_density_scaler", "hubdist_scaler", "mag_scaler")
+    return _load("susceptibility_model", *(file_signature(_require(name)) for name in names))
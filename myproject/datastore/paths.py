@@ -0,0 +1,79 @@
+"""
+Dataset Paths
+Resolves each dataset file once per process. Pages used to probe their own
+lists of relative paths (`data/`, `models/`, `../data`,
+`Susceptability_pred_ML/`), which only worked from some working
+directories; here every location is tried relative to the repository root
+first and the working directory second.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+REPO_DIR = PROJECT_DIR.parent
+
+# Search orders, relative to the repository root. The ML pages were built
+# against the susceptibility notebook's outputs, so its directory comes first
+# for model files; catalogs and predictions live in the app's data directory.
+MODEL_DIRS = ("Susceptability_pred_ML", "myproject/models", "myproject/data")
+DATA_DIRS = ("myproject/data", "myproject/models", "Susceptability_pred_ML")
+
+
+class DatasetFile(NamedTuple):
+    filename: str
+    directories: Tuple[str, ...]
+
+
+DATASET_FILES: Dict[str, DatasetFile] = {
+    "catalog": DatasetFile("earthquake.csv", DATA_DIRS),
+    "processed_catalog": DatasetFile("processed_earthquake_data.csv", DATA_DIRS),
+    "features": DatasetFile("EarthquakeFeatures.csv", MODEL_DIRS),
+    "labeled": DatasetFile("earthquakes_labeled.csv", MODEL_DIRS),
+    "pinn_predictions": DatasetFile("future_earthquake_predictions_india_25years_2025_2050.csv", DATA_DIRS),
+    "rf_predictions": DatasetFile("future_earthquake_predictions_100years.csv", DATA_DIRS),
+    "susceptibility_model": DatasetFile("EarthquakePredictor.pkl", MODEL_DIRS),
+    "fault_density_scaler": DatasetFile("fault_density_scaler.pkl", MODEL_DIRS),
+    "hubdist_scaler": DatasetFile("hubdist_scaler.pkl", MODEL_DIRS),
+    "mag_scaler": DatasetFile("mag_scaler.pkl", MODEL_DIRS)
+}
+
+
+def _candidates(directory: str):
+    yield REPO_DIR / directory
+    cwd = Path.cwd()
+    if cwd != REPO_DIR:
+        yield cwd / directory
+        # Legacy layout: run from inside myproject/ with paths like data/...
+        if directory.startswith("myproject/"):
+            yield cwd / directory[len("myproject/"):]
+
+
+@lru_cache(maxsize=None)
+def dataset_path(name: str) -> Optional[Path]:
+    """Path of a registered dataset (see DATASET_FILES), or None if absent"""
+    spec = DATASET_FILES[name]
+    for directory in spec.directories:
+        for candidate in _candidates(directory):
+            path = candidate / spec.filename
+            if path.is_file():
+                return path
+    return None
+
+
+def searched_locations(name: str) -> str:
+    """Human-readable list of where a dataset was looked for, for error messages"""
+    spec = DATASET_FILES[name]
+    return ", ".join(f"{directory}/{spec.filename}" for directory in spec.directories)
+
+
+@lru_cache(maxsize=None)
+def model_directory() -> Optional[Path]:
+    """First existing model directory, for listing its extra CSV files"""
+    for directory in MODEL_DIRS:
+        for candidate in _candidates(directory):
+            if candidate.is_dir():
+                return candidate
+    return None
+
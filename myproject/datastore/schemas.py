@@ -0,0 +1,110 @@
+"""
+Dataset Schemas
+Explicit column dtypes for every dataset the datastore loads. Coordinates,
+magnitudes and other measurements are float32, calendar fields are small
+integers and repeated labels are categoricals, which roughly halves each
+shared frame and speeds up filters and groupbys over it.
+
+Columns not listed keep pandas' inferred dtype. Magnitudes in float32 are
+the nearest float32 to the reported decimal (4.7 reads as 4.6999998), so
+code that widens them for binning goes through
+`catalog_index.magnitude_values`, and exports write them back at source
+precision (`data_export.source_precision`). Distances in metres and the
+columns the susceptibility and risk models read stay float64, so model
+inputs match the source files exactly.
+"""
+
+import logging
+from typing import Dict, NamedTuple, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class Schema(NamedTuple):
+    name: str
+    dtypes: Dict[str, str]
+    required: Tuple[str, ...] = ()
+
+
+class SchemaError(ValueError):
+    """A dataset is missing required columns or did not load with its schema's dtypes"""
+
+
+CATALOG = Schema("catalog", {
+    "latitude": "float32", "longitude": "float32", "depth": "float32", "mag": "float32",
+    "magType": "category", "nst": "float32", "gap": "float32", "dmin": "float32",
+    "rms": "float32", "net": "category", "type": "category",
+    "horizontalError": "float32", "depthError": "float32", "magError": "float32",
+    "magNst": "float32", "status": "category", "locationSource": "category",
+    "magSource": "category"
+}, required=("time", "latitude", "longitude", "depth", "mag", "place"))
+
+# Projected X/Y and HubDist are metres in the hundreds of thousands to
+# millions (float32 would round them to ~0.01-0.25 m); they, LAT/LONG_,
+# DEPTH_KM and FaultDensity feed the models and stay float64
+FEATURES = Schema("features", {
+    "X": "float64", "Y": "float64", "OBJECTID": "int32", "SOURCE": "category",
+    "YR": "int16", "MO": "int8", "DT": "int8", "HR": "int8", "MN": "int8",
+    "SEC": "float32", "LAT": "float64", "LONG_": "float64", "MAGMB": "float32",
+    "DEPTH_KM": "float64", "MW": "float32", "HubName": "category",
+    "HubDist": "float64", "FaultDensity": "float64"
+}, required=("LAT", "LONG_"))
+
+LABELED = Schema("labeled", {
+    **{column: dtype for column, dtype in FEATURES.dtypes.items() if column != "MAGMB"},
+    "mag": "float32", "FaultDensity_filled": "float64", "fault_density_norm": "float64",
+    "hub_dist_norm": "float64", "mag_norm": "float64", "safety_rating": "float32",
+    "label": "int8"
+}, required=("LAT", "LONG_", "mag"))
+
+PREDICTIONS = Schema("predictions", {
+    "year": "int16", "decade": "category", "years_from_now": "float32",
+    "latitude": "float32", "longitude": "float32", "depth": "float32",
+    "depth_category": "category", "predicted_magnitude": "float32",
+    "earthquake_probability": "float32", "risk_category": "category",
+    "time_since_last_eq": "float32", "stress_proxy": "float32",
+    "fault_distance_km": "float32", "prediction_confidence": "float32",
+    "regional_zone": "category", "model_type": "category",
+    "prediction_generated_on": "category", "region": "category",
+    "RF_Predicted_LAT": "float32", "RF_Predicted_LONG_": "float32",
+    "RF_Predicted_MAGMB": "float32"
+})
+
+
+def _is_integer(dtype: str) -> bool:
+    return dtype.startswith("int")
+
+
+def apply_schema(df: pd.DataFrame, schema: Schema) -> pd.DataFrame:
+    """Cast the schema's columns present in `df` and validate the result"""
+    missing = [column for column in schema.required if column not in df.columns]
+    if missing:
+        raise SchemaError(f"{schema.name}: missing required columns {missing}")
+
+    casts = {}
+    for column, dtype in schema.dtypes.items():
+        if column not in df.columns or str(df[column].dtype) == dtype:
+            continue
+        values = df[column]
+        if _is_integer(dtype):
+            if values.isna().any():
+                # pandas' nullable integer, e.g. Int16
+                dtype = dtype.capitalize()
+                logger.warning(f"{schema.name}.{column} has missing values; loading as {dtype}")
+            if (values.dropna() % 1 != 0).any():
+                raise SchemaError(f"{schema.name}.{column}: non-integer values for {dtype}")
+            info = np.iinfo(dtype.lower())
+            if values.min() < info.min or values.max() > info.max:
+                raise SchemaError(f"{schema.name}.{column}: values outside the {dtype} range")
+        casts[column] = dtype
+    if casts:
+        df = df.astype(casts)
+
+    mismatched = {column: str(df[column].dtype) for column, dtype in schema.dtypes.items()
+                  if column in df.columns and str(df[column].dtype).lower() != dtype}
+    if mismatched:
+        raise SchemaError(f"{schema.name}: columns did not load as their schema dtypes: {mismatched}")
+    return df
@@ -0,0 +1,120 @@
+"""
+Memory-Mapped Frames
+Loaded datasets written once as uncompressed Arrow IPC files and read back
+through a memory map, so that every process loading them through the
+datastore (Streamlit server replicas, workers) shares one copy of each
+frame in the OS page cache instead of holding a private one. Within a
+process, sessions already share the frame through `st.cache_resource`.
+
+Numeric, date and string columns without missing values convert to pandas
+without copying, so their pages stay file-backed: clean, shared between
+processes and evictable under memory pressure. Columns with missing values
+and index levels are copied into process memory (they are small). Mapped
+frames are read-only; pandas copy-on-write copies a column on assignment.
+
+A file is keyed by the reader and the (path, mtime, size) of its sources,
+so edited sources load into a new file. Bump FRAME_FORMAT when a reader's
+output changes shape; `clear_frames` (run by build_snapshots.py) removes
+every file.
+"""
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Sequence
+
+import pandas as pd
+
+from .snapshots import SNAPSHOT_DIR
+
+logger = logging.getLogger(__name__)
+
+FRAME_DIR = SNAPSHOT_DIR / "frames"
+FRAME_FORMAT = 3
+
+
+def frame_path(reader: str, versions: Sequence, directory: Path = FRAME_DIR) -> Path:
+    """IPC file for a reader's output over the given file_signature versions"""
+    digest = hashlib.sha256(repr((FRAME_FORMAT, reader, tuple(versions))).encode()).hexdigest()
+    stem = Path(versions[0][0]).stem if versions else reader
+    return Path(directory) / f"{reader}-{stem}-{digest[:16]}.arrow"
+
+
+def write_frame(df: pd.DataFrame, path: Path):
+    """Write `df` as one uncompressed record batch; replaces `path` atomically"""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with pa.OSFile(str(partial), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+        os.replace(partial, path)
+    finally:
+        if partial.exists():
+            partial.unlink()
+
+
+def map_frame(path: Path) -> pd.DataFrame:
+    """A frame whose column buffers point into a read-only memory map of `path`"""
+    import pyarrow as pa
+
+    with pa.memory_map(str(path), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    # split_blocks keeps one array per column, so pandas does not
+    # consolidate (and copy) columns of the same dtype
+    return table.to_pandas(split_blocks=True)
+
+
+def _prune(path: Path):
+    """Remove older files for the same reader and source"""
+    prefix = path.name.rsplit("-", 1)[0]
+    for stale in path.parent.glob(f"{prefix}-*.arrow"):
+        if stale != path:
+            try:
+                stale.unlink()
+            except OSError:
+                # Still mapped on a platform that refuses to unlink it
+                pass
+
+
+def shared_frame(reader: str, versions: Sequence, load: Callable[[], pd.DataFrame],
+                 directory: Path = FRAME_DIR) -> pd.DataFrame:
+    """
+    The memory-mapped output of `load()`. The first process to need it
+    runs `load` and writes the file; later ones (and later loads in the
+    same process) map it. Falls back to the loaded frame when the file
+    cannot be written or mapped.
+    """
+    path = frame_path(reader, versions, directory)
+    if path.exists():
+        try:
+            return map_frame(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Rebuilding unreadable frame file {path.name}: {e}")
+
+    df = load()
+    try:
+        write_frame(df, path)
+        _prune(path)
+        return map_frame(path)
+    except (OSError, ValueError, TypeError) as e:
+        # ValueError/TypeError cover pyarrow's ArrowInvalid/ArrowTypeError,
+        # e.g. object columns of mixed types
+        logger.warning(f"Keeping {reader} in process memory: {e}")
+        return df
+
+
+def clear_frames(directory: Path = FRAME_DIR) -> int:
+    """Delete every frame file; returns how many were removed"""
+    removed = 0
+    for path in Path(directory).glob("*.arrow"):
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
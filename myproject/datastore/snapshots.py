@@ -0,0 +1,319 @@
+"""
+Columnar Data Snapshots
+Parquet copies of the source CSVs, written by a build step
+(`python build_snapshots.py`) and read by every loader in their place.
+
+A snapshot holds the CSV's columns at full precision with date columns
+already parsed; the catalog and predictions are sorted by time and written
+in small row groups, so the per-group min/max statistics let date,
+magnitude and zone filters skip most of a file (predicate pushdown).
+Files are named by content hash and listed in `manifest.json` with the
+sha256 of the source they were built from. A loader uses a snapshot only
+while its source still hashes the same, and falls back to the CSV
+otherwise; dtype schemas are applied on top either way.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .paths import DATASET_FILES, PROJECT_DIR, REPO_DIR, dataset_path
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = PROJECT_DIR / "data" / "snapshots"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = 1
+
+# Small groups keep the statistics selective for datasets of ~10-20k rows
+ROW_GROUP_ROWS = 2048
+
+
+class SnapshotSpec(NamedTuple):
+    time_column: Optional[str] = None      # parsed to timestamps and sorted on
+    magnitude_column: Optional[str] = None
+    zone_column: Optional[str] = None
+
+
+SNAPSHOT_SPECS: Dict[str, SnapshotSpec] = {
+    "catalog": SnapshotSpec("time", "mag"),
+    "processed_catalog": SnapshotSpec(),
+    "features": SnapshotSpec(magnitude_column="MAGMB"),
+    "labeled": SnapshotSpec(magnitude_column="mag"),
+    "pinn_predictions": SnapshotSpec("prediction_date", "predicted_magnitude", "regional_zone"),
+    "rf_predictions": SnapshotSpec(magnitude_column="RF_Predicted_MAGMB")
+}
+
+Filters = List[Tuple[str, str, object]]
+
+
+def sha256_file(path: os.PathLike, chunk_bytes: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_bytes), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _relative(path: Path) -> str:
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(REPO_DIR).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def load_manifest(directory: Path = SNAPSHOT_DIR) -> Dict:
+    try:
+        with open(Path(directory) / MANIFEST_NAME, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"format": MANIFEST_FORMAT, "version": 0, "datasets": {}}
+    if manifest.get("format") != MANIFEST_FORMAT:
+        logger.warning(f"Ignoring snapshot manifest with format {manifest.get('format')}")
+        return {"format": MANIFEST_FORMAT, "version": 0, "datasets": {}}
+    return manifest
+
+
+def _write_manifest(manifest: Dict, directory: Path):
+    path = Path(directory) / MANIFEST_NAME
+    partial = path.with_name(f"{MANIFEST_NAME}.{os.getpid()}.tmp")
+    with open(partial, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(partial, path)
+
+
+def _parse_times(df: pd.DataFrame, column: str) -> pd.DataFrame:
+    df[column] = pd.to_datetime(df[column], errors="coerce")
+    return df.sort_values(column, kind="stable", na_position="last").reset_index(drop=True)
+
+
+def write_snapshot(name: str, source: Path, directory: Path = SNAPSHOT_DIR,
+                   source_sha256: Optional[str] = None) -> Dict:
+    """Convert one source CSV to a Parquet snapshot; returns its manifest entry"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    spec = SNAPSHOT_SPECS.get(name, SnapshotSpec())
+    source_sha256 = source_sha256 or sha256_file(source)
+    df = pd.read_csv(source)
+    if spec.time_column and spec.time_column in df.columns:
+        df = _parse_times(df, spec.time_column)
+
+    # Repeated labels are stored dictionary-encoded and read back as categoricals
+    for column in df.columns:
+        if df[column].dtype == object or pd.api.types.is_string_dtype(df[column]):
+            if df[column].nunique() <= max(1, len(df) // 10):
+                df[column] = df[column].astype("category")
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    file_name = f"{name}-{source_sha256[:12]}.parquet"
+    path = directory / file_name
+    partial = path.with_name(f"{file_name}.{os.getpid()}.tmp")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    try:
+        pq.write_table(table, partial, row_group_size=ROW_GROUP_ROWS,
+                       compression="zstd", write_statistics=True)
+        os.replace(partial, path)
+    finally:
+        if partial.exists():
+            partial.unlink()
+
+    return {
+        "source": _relative(source),
+        "source_sha256": source_sha256,
+        "source_bytes": Path(source).stat().st_size,
+        "snapshot": file_name,
+        "snapshot_sha256": sha256_file(path),
+        "snapshot_bytes": path.stat().st_size,
+        "rows": table.num_rows,
+        "row_groups": pq.ParquetFile(path).num_row_groups,
+        "sorted_by": spec.time_column if spec.time_column in df.columns else None,
+        "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds")
+    }
+
+
+def build_snapshots(names: Optional[Sequence[str]] = None, directory: Path = SNAPSHOT_DIR,
+                    force: bool = False) -> Dict:
+    """
+    Snapshot every available dataset (or `names`), skipping those whose
+    source is unchanged since the last build, then publish a new manifest
+    version and remove snapshot files it no longer lists.
+    """
+    directory = Path(directory)
+    manifest = load_manifest(directory)
+    datasets = dict(manifest["datasets"])
+    changed = False
+    for name in names or SNAPSHOT_SPECS:
+        if name not in DATASET_FILES:
+            raise ValueError(f"Unknown dataset: {name}")
+        source = dataset_path(name)
+        if source is None:
+            if datasets.pop(name, None) is not None:
+                changed = True
+            logger.info(f"{name}: no source file, skipped")
+            continue
+        source_sha256 = sha256_file(source)
+        current = datasets.get(name)
+        if (not force and current and current["source_sha256"] == source_sha256
+                and (directory / current["snapshot"]).exists()):
+            logger.info(f"{name}: up to date ({current['snapshot']})")
+            continue
+        datasets[name] = write_snapshot(name, source, directory, source_sha256)
+        changed = True
+        logger.info(f"{name}: wrote {datasets[name]['snapshot']} "
+                    f"({datasets[name]['rows']} rows, {datasets[name]['row_groups']} row groups)")
+
+    if changed or not (directory / MANIFEST_NAME).exists():
+        manifest = {
+            "format": MANIFEST_FORMAT,
+            "version": manifest.get("version", 0) + 1,
+            "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "datasets": datasets
+        }
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_manifest(manifest, directory)
+
+    referenced = {entry["snapshot"] for entry in datasets.values()}
+    for stale in directory.glob("*.parquet"):
+        if stale.name not in referenced:
+            stale.unlink()
+    return manifest
+
+
+def snapshot_for(source: os.PathLike, directory: Path = SNAPSHOT_DIR) -> Optional[Path]:
+    """Snapshot built from this exact source file, or None if missing or stale"""
+    datasets = load_manifest(directory)["datasets"]
+    if not datasets:
+        return None
+    source_sha256 = sha256_file(source)
+    for name, entry in datasets.items():
+        if entry["source_sha256"] != source_sha256:
+            continue
+        path = Path(directory) / entry["snapshot"]
+        if path.exists() and sha256_file(path) == entry["snapshot_sha256"]:
+            return path
+        logger.warning(f"Snapshot {entry['snapshot']} for {name} is missing or corrupt")
+    relative = _relative(Path(source))
+    if any(entry["source"] == relative for entry in datasets.values()):
+        logger.warning(f"Snapshot of {relative} is stale; run build_snapshots.py")
+    return None
+
+
+def pushdown_filters(spec: SnapshotSpec, start: Optional[date] = None, end: Optional[date] = None,
+                     min_mag: Optional[float] = None, max_mag: Optional[float] = None,
+                     zones: Optional[Sequence[str]] = None) -> Filters:
+    """pyarrow filters for an inclusive date range, magnitude range and zones"""
+    filters: Filters = []
+    if spec.time_column and (start is not None or end is not None):
+        if start is not None:
+            filters.append((spec.time_column, ">=", pd.Timestamp(start)))
+        if end is not None:
+            filters.append((spec.time_column, "<", pd.Timestamp(end) + timedelta(days=1)))
+    if spec.magnitude_column:
+        if min_mag is not None:
+            filters.append((spec.magnitude_column, ">=", float(min_mag)))
+        if max_mag is not None:
+            filters.append((spec.magnitude_column, "<=", float(max_mag)))
+    if spec.zone_column and zones is not None:
+        filters.append((spec.zone_column, "in", list(zones)))
+    return filters
+
+
+def _match_time_zone(filters: Filters, schema) -> Filters:
+    """Timestamp bounds in their column's time zone (pyarrow will not compare naive with aware)"""
+    matched = []
+    for column, op, value in filters:
+        if isinstance(value, pd.Timestamp):
+            tz = getattr(schema.field(column).type, "tz", None)
+            if tz and value.tzinfo is None:
+                value = value.tz_localize(tz)
+            elif not tz and value.tzinfo is not None:
+                value = value.tz_convert(None)
+        matched.append((column, op, value))
+    return matched
+
+
+def _filter_frame(df: pd.DataFrame, filters: Filters) -> pd.DataFrame:
+    """The same filters applied in pandas, for CSV fallbacks"""
+    keep = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        values = df[column]
+        if isinstance(value, pd.Timestamp):
+            values = pd.to_datetime(values, errors="coerce")
+            if values.dt.tz is not None and value.tzinfo is None:
+                value = value.tz_localize(values.dt.tz)
+        if op == ">=":
+            keep &= values >= value
+        elif op == "<":
+            keep &= values < value
+        elif op == "<=":
+            keep &= values <= value
+        elif op == "in":
+            keep &= values.isin(value)
+    return df[keep.to_numpy()]
+
+
+def _cast_table(table, dtypes: Dict[str, str]):
+    """
+    Cast columns to schema dtypes in Arrow, before conversion to pandas.
+    Arrow refuses lossy integer casts; the table is then returned as is and
+    `schemas.apply_schema` reports the problem.
+    """
+    import pyarrow as pa
+
+    targets = {"float32": pa.float32(), "float64": pa.float64(), "int8": pa.int8(),
+               "int16": pa.int16(), "int32": pa.int32(), "int64": pa.int64(),
+               "category": pa.dictionary(pa.int32(), pa.string())}
+    fields = [field.with_type(targets[dtypes[field.name]])
+              if dtypes.get(field.name) in targets else field
+              for field in table.schema]
+    try:
+        return table.cast(pa.schema(fields, metadata=table.schema.metadata))
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        logger.warning(f"Snapshot columns kept their stored types: {e}")
+        return table
+
+
+def read_source(source: os.PathLike, name: Optional[str] = None,
+                columns: Optional[Sequence[str]] = None, dtypes: Optional[Dict[str, str]] = None,
+                directory: Path = SNAPSHOT_DIR, **query) -> pd.DataFrame:
+    """
+    Rows of a source CSV, read from its snapshot when one is fresh. `dtypes`
+    (a schema's column dtypes) are applied while reading where possible;
+    `query` takes `pushdown_filters` arguments (start, end, min_mag,
+    max_mag, zones), interpreted through `name`'s SnapshotSpec.
+    """
+    spec = SNAPSHOT_SPECS.get(name, SnapshotSpec())
+    filters = pushdown_filters(spec, **query)
+    path = snapshot_for(source, directory)
+    if path is not None:
+        import pyarrow.parquet as pq
+
+        columns = list(columns) if columns else None
+        if filters:
+            table = pq.read_table(path, columns=columns,
+                                  filters=_match_time_zone(filters, pq.read_schema(path)))
+        else:
+            table = pq.ParquetFile(path).read(columns=columns)
+        if dtypes:
+            table = _cast_table(table, dtypes)
+        return table.to_pandas()
+
+    # Integer columns parse as floats so gaps do not fail the read
+    parse_dtypes = {column: ("float64" if dtype.startswith("int") else dtype)
+                    for column, dtype in (dtypes or {}).items()}
+    df = pd.read_csv(source, dtype=parse_dtypes or None)
+    if spec.time_column and spec.time_column in df.columns:
+        df = _parse_times(df, spec.time_column)
+    if filters:
+        df = _filter_frame(df, filters)
+    return df[list(columns)] if columns else df
@@ -0,0 +1,109 @@
+"""
+Delivery Metrics
+Per-day delivery counts (channel x status x regional zone) kept in
+`notification_daily_rollups` and updated in the same transaction as each
+`sent_notifications` insert, so dashboards read a handful of pre-aggregated
+rows instead of scanning and grouping the raw history.
+"""
+
+import sqlite3
+import logging
+import pandas as pd
+from typing import Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+UPSERT_SQL = '''
+    INSERT INTO notification_daily_rollups
+    (day, notification_type, status, regional_zone, count)
+    VALUES (date('now'), ?, ?, ?, ?)
+    ON CONFLICT (day, notification_type, status, regional_zone)
+    DO UPDATE SET count = count + excluded.count
+'''
+
+# (channel, status, regional_zone)
+MetricKey = Tuple[str, str, str]
+
+
+def init_metrics_tables(conn: sqlite3.Connection):
+    """
+    Switch the rollup table to write-time maintenance.
+
+    Before this, rows were only rolled up when archived; the raw rows still
+    in `sent_notifications` are folded in once, guarded by a marker row so
+    later archiving never counts them twice.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notification_metrics_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+    live = cursor.execute("SELECT 1 FROM notification_metrics_state "
+                          "WHERE key = 'rollups_live'").fetchone()
+    if live is not None:
+        return
+
+    cursor.execute('''
+        INSERT INTO notification_daily_rollups
+        (day, notification_type, status, regional_zone, count)
+        SELECT date(sn.sent_at), sn.notification_type, sn.status,
+               CASE WHEN json_valid(COALESCE(p.payload, sn.earthquake_data))
+                    THEN COALESCE(json_extract(COALESCE(p.payload, sn.earthquake_data),
+                                               '$.regional_zone'), '')
+                    ELSE '' END,
+               COUNT(*)
+        FROM sent_notifications sn
+        LEFT JOIN notification_payloads p ON p.id = sn.payload_id
+        WHERE sn.notification_type IS NOT NULL AND sn.status IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (day, notification_type, status, regional_zone)
+        DO UPDATE SET count = count + excluded.count
+    ''')
+    cursor.execute("INSERT INTO notification_metrics_state (key, value) "
+                   "VALUES ('rollups_live', datetime('now'))")
+    logger.info("Delivery metrics backfilled from raw notification history")
+
+
+def record_deliveries(conn: sqlite3.Connection, counts: Iterable[Tuple[MetricKey, int]]):
+    """Add ((channel, status, zone), n) counts to today's rollup rows (caller commits)"""
+    conn.executemany(UPSERT_SQL, [(channel, status, zone or '', int(n))
+                                  for (channel, status, zone), n in counts if n])
+
+
+def _window(days: int) -> str:
+    return f"-{int(days)} days"
+
+
+def delivery_totals(conn: sqlite3.Connection, days: int = 30) -> pd.DataFrame:
+    """Counts per channel and status over the last `days` days"""
+    return pd.read_sql_query('''
+        SELECT notification_type, status, SUM(count) AS count
+        FROM notification_daily_rollups
+        WHERE day >= date('now', ?)
+        GROUP BY notification_type, status
+    ''', conn, params=(_window(days),))
+
+
+def daily_deliveries(conn: sqlite3.Connection, days: int = 30) -> pd.DataFrame:
+    """Per-day counts by status, oldest day first"""
+    return pd.read_sql_query('''
+        SELECT day, status, SUM(count) AS count
+        FROM notification_daily_rollups
+        WHERE day >= date('now', ?)
+        GROUP BY day, status
+        ORDER BY day
+    ''', conn, params=(_window(days),))
+
+
+def zone_deliveries(conn: sqlite3.Connection, days: int = 30) -> pd.DataFrame:
+    """Counts per regional zone and status; digests without a zone show as 'All'"""
+    return pd.read_sql_query('''
+        SELECT CASE regional_zone WHEN '' THEN 'All' ELSE regional_zone END AS regional_zone,
+               status, SUM(count) AS count
+        FROM notification_daily_rollups
+        WHERE day >= date('now', ?)
+        GROUP BY 1, status
+        ORDER BY count DESC
+    ''', conn, params=(_window(days),))
@@ -0,0 +1,218 @@
+"""
+Real-Time Earthquake Event Stream
+Polls the USGS feed incrementally in a background thread and fans new
+events out to every connected session through a shared in-process bus.
+"""
+
+import pandas as pd
+import numpy as np
+import requests
+import threading
+import logging
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from geo_filter import INDIA_BBOX, INDIA_REGION, classify_regional_zone
+
+logger = logging.getLogger(__name__)
+
+USGS_QUERY_URL = "https://earthquake.usgs.gov/fdsnws/event/1/query"
+
+
+class EarthquakeEventBus:
+    """
+    Bounded, sequence-numbered log of earthquake events.
+
+    Readers keep an integer cursor and ask for everything published after it,
+    so any number of sessions can follow the stream without per-session
+    queues. Callbacks registered with `subscribe` are invoked on publish.
+    """
+
+    def __init__(self, max_events: int = 500):
+        self._events = deque(maxlen=max_events)
+        self._seq = 0
+        self._condition = threading.Condition()
+        self._listeners: List[Callable[[Dict], None]] = []
+
+    @property
+    def cursor(self) -> int:
+        """Sequence number of the most recently published event"""
+        with self._condition:
+            return self._seq
+
+    def publish(self, events: List[Dict]) -> int:
+        """Append events to the log and notify waiters and listeners"""
+        if not events:
+            return self.cursor
+
+        published = []
+        with self._condition:
+            for event in events:
+                self._seq += 1
+                event = dict(event, seq=self._seq)
+                self._events.append(event)
+                published.append(event)
+            listeners = list(self._listeners)
+            self._condition.notify_all()
+            cursor = self._seq
+
+        for event in published:
+            for listener in listeners:
+                try:
+                    listener(event)
+                except Exception as e:
+                    logger.error(f"Event listener failed for {event.get('id')}: {e}")
+
+        return cursor
+
+    def subscribe(self, callback: Callable[[Dict], None]) -> Callable[[], None]:
+        """Register a callback for new events; returns an unsubscribe function"""
+        with self._condition:
+            self._listeners.append(callback)
+
+        def unsubscribe():
+            with self._condition:
+                if callback in self._listeners:
+                    self._listeners.remove(callback)
+
+        return unsubscribe
+
+    def events_since(self, cursor: int) -> Tuple[List[Dict], int]:
+        """Return events published after `cursor` and the new cursor"""
+        with self._condition:
+            events = [event for event in self._events if event["seq"] > cursor]
+            return events, self._seq
+
+    def wait(self, cursor: int, timeout: float) -> bool:
+        """Block until an event newer than `cursor` arrives or timeout expires"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._seq > cursor, timeout)
+
+    def latest(self) -> Optional[Dict]:
+        """Most recent event by origin time"""
+        with self._condition:
+            if not self._events:
+                return None
+            return max(self._events, key=lambda event: event["time"])
+
+    def recent(self, hours: float) -> List[Dict]:
+        """Events whose origin time falls within the last `hours` (UTC)"""
+        cutoff = pd.Timestamp.now(tz="UTC").tz_localize(None) - pd.Timedelta(hours=hours)
+        with self._condition:
+            return [event for event in self._events if event["time"] >= cutoff]
+
+
+class USGSIncrementalPoller:
+    """
+    Fetches only what changed on USGS since the previous poll.
+
+    The first request backfills `lookback_days`; later requests use
+    `updatedafter` with a small overlap, and already-seen event ids are
+    dropped so each earthquake is published once.
+    """
+
+    def __init__(self, bus: EarthquakeEventBus, interval_seconds: int = 30,
+                 lookback_days: int = 30, max_seen: int = 5000):
+        self.bus = bus
+        self.interval_seconds = interval_seconds
+        self.lookback_days = lookback_days
+        self.max_seen = max_seen
+
+        self._seen = OrderedDict()
+        self._last_updated_ms: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _build_params(self) -> Dict:
+        params = {"format": "geojson", "orderby": "time-asc", **INDIA_BBOX}
+        if self._last_updated_ms is None:
+            start = pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=self.lookback_days)
+            params["starttime"] = start.strftime("%Y-%m-%dT%H:%M:%S")
+        else:
+            # Re-read the last minute to tolerate clock skew on the USGS side
+            since = pd.to_datetime(self._last_updated_ms - 60_000, unit="ms")
+            params["updatedafter"] = since.strftime("%Y-%m-%dT%H:%M:%S")
+        return params
+
+    def _parse_features(self, features: List[Dict]) -> List[Dict]:
+        if not features:
+            return []
+
+        lat = np.array([f["geometry"]["coordinates"][1] for f in features], dtype=np.float64)
+        lon = np.array([f["geometry"]["coordinates"][0] for f in features], dtype=np.float64)
+        inside = INDIA_REGION.contains(lat, lon)
+        zones = classify_regional_zone(lat)
+
+        events = []
+        for feature, is_inside, zone in zip(features, inside, zones):
+            props = feature["properties"]
+            coords = feature["geometry"]["coordinates"]
+            self._last_updated_ms = max(self._last_updated_ms or 0, props.get("updated") or 0)
+
+            event_id = feature.get("id") or props.get("code")
+            if not is_inside or props.get("mag") is None or event_id in self._seen:
+                continue
+
+            self._seen[event_id] = True
+            if len(self._seen) > self.max_seen:
+                self._seen.popitem(last=False)
+
+            events.append({
+                "id": event_id,
+                "magnitude": props["mag"],
+                "place": props["place"],
+                "time": pd.to_datetime(props["time"], unit="ms"),
+                "latitude": coords[1],
+                "longitude": coords[0],
+                "depth": coords[2] if len(coords) > 2 else 0,
+                "regional_zone": str(zone),
+                "tsunami": props.get("tsunami", 0)
+            })
+
+        events.sort(key=lambda event: event["time"])
+        return events
+
+    def poll_once(self) -> List[Dict]:
+        """Fetch new events from USGS and publish them to the bus"""
+        response = requests.get(USGS_QUERY_URL, params=self._build_params(), timeout=20)
+        response.raise_for_status()
+        events = self._parse_features(response.json().get("features", []))
+        if events:
+            self.bus.publish(events)
+            logger.info(f"Published {len(events)} new earthquake event(s)")
+        return events
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"USGS poll failed: {e}")
+            self._stop.wait(self.interval_seconds)
+
+    def start(self):
+        """Start polling in a daemon thread (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="usgs-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+_stream_lock = threading.Lock()
+_event_bus: Optional[EarthquakeEventBus] = None
+_poller: Optional[USGSIncrementalPoller] = None
+
+
+def get_event_stream(interval_seconds: int = 30) -> EarthquakeEventBus:
+    """Return the process-wide event bus, starting its poller on first use"""
+    global _event_bus, _poller
+    with _stream_lock:
+        if _event_bus is None:
+            _event_bus = EarthquakeEventBus()
+            _poller = USGSIncrementalPoller(_event_bus, interval_seconds=interval_seconds)
+            _poller.start()
+        return _event_bus
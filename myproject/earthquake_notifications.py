@@ -12,11 +12,28 @@ import requests
 import json
 import sqlite3
 import os
-from typing import List, Dict, Optional
-import schedule
+import socket
+from typing import Iterable, List, Dict, Optional, Tuple
 import time
 import threading
 import logging
+import uuid
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+from datastore import snapshots
+from weekly_digest import build_weekly_digest, render_weekly_digest, upcoming_week_start
+from message_templates import MessageRenderer, RenderedMessage, prepare_message, prediction_key
+from notification_ledger import SuppressionLedger, ledger_key
+from subscriber_index import SubscriberIndex, init_subscriber_tables, write_subscriber_links
+import subscriber_bulk
+from query_pages import keyset_page, build_filters
+from notification_retention import (PayloadStore, init_retention_tables, run_retention,
+                                    serialize_payload)
+import delivery_metrics
+from provider_health import (MessageRejected, ProviderHealthRegistry, ProviderThrottled,
+                             ProviderUnavailable)
+from notification_queue import DEFER, DONE, RETRY, init_queue_tables, open_work_queue
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,10 +45,55 @@ class EarthquakeNotificationSystem:
     via WhatsApp and SMS using various APIs.
     """
     
-    def __init__(self):
-        self.db_path = "earthquake_notifications.db"
+    def __init__(self, db_path: str = "earthquake_notifications.db"):
+        self.db_path = db_path
+        self.payload_store = PayloadStore()
         self.init_database()
         
+        # Raw history older than this is rolled up and archived to Parquet
+        self.history_retention_days = 90
+        self.archive_dir = "data/notification_archive"
+        
+        # Prediction files checked by the daily run and the prediction watcher
+        self.prediction_files = [
+            "data/future_earthquake_predictions_india_25years_2025_2050.csv",
+            "data/future_earthquake_predictions_100years.csv"
+        ]
+        
+        # Historical catalog used for observed counts in the weekly digest
+        self.catalog_file = "data/earthquake.csv"
+        
+        # Each prediction is rendered once per message type and language
+        self.message_renderer = MessageRenderer()
+        
+        # Already-delivered (subscriber, prediction, channel) entries
+        self.ledger = SuppressionLedger(self.db_path)
+        
+        # Region / alert-type inverted index over active subscribers
+        self.subscriber_index = SubscriberIndex(self.db_path)
+        
+        # Circuit breakers and adaptive concurrency per messaging provider;
+        # dispatch threads beyond a provider's current limit wait for a slot
+        self.provider_health = ProviderHealthRegistry()
+        self.default_providers = {"whatsapp": "ultramsg", "sms": "textbelt"}
+        self.dispatch_workers = 32
+        self._write_lock = threading.Lock()
+        self.request_timeout = 10
+        
+        # (week_start, digest, {profile: message}) for queued weekly digests
+        self._digest_cache = (None, None, {})
+        self._digest_lock = threading.Lock()
+        
+        # Daily sends go through a leased work queue that notification_worker
+        # processes (and this process) drain
+        self.work_queue = open_work_queue(self.db_path, self.payload_store)
+        
+        # HTTP providers' base URLs (point these at provider_simulator for load tests)
+        self.provider_urls = {
+            "ultramsg": "https://api.ultramsg.com",
+            "textbelt": "https://textbelt.com"
+        }
+        
         # Notification APIs configuration
         self.whatsapp_apis = {
             "twilio": {
@@ -65,6 +127,15 @@ class EarthquakeNotificationSystem:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        # Only takes effect on a new file; existing ones switch through the
+        # one-off migration in notification_retention (a full VACUUM)
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        
+        # Sender workers in other processes write to the same file; WAL lets
+        # them commit without blocking readers (set before any write opens a
+        # transaction, where the mode cannot change)
+        cursor.execute('PRAGMA journal_mode = WAL')
+        
         # Create tables
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS notification_subscribers (
@@ -111,12 +182,53 @@ class EarthquakeNotificationSystem:
             )
         ''')
         
+        # Subscriber language was added after the table first shipped
+        columns = [row[1] for row in cursor.execute('PRAGMA table_info(notification_subscribers)')]
+        if 'language' not in columns:
+            cursor.execute("ALTER TABLE notification_subscribers ADD COLUMN language TEXT DEFAULT 'en'")
+        
+        init_subscriber_tables(conn)
+        init_retention_tables(conn)
+        delivery_metrics.init_metrics_tables(conn)
+        init_queue_tables(conn)
+        
+        # Indexes backing the keyset-paginated admin views
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_sent_notifications_sent_at
+            ON sent_notifications (sent_at, id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_sent_notifications_subscriber
+            ON sent_notifications (subscriber_id, sent_at, id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_subscribers_created_at
+            ON notification_subscribers (created_at, id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_subscribers_name
+            ON notification_subscribers (name, id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_subscribers_min_magnitude
+            ON notification_subscribers (min_magnitude, id)
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS weekly_digests (
+                week_start DATE PRIMARY KEY,
+                payload TEXT,  -- JSON of the aggregated digest
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
         conn.commit()
         conn.close()
     
     def add_subscriber(self, name: str, phone_number: str, whatsapp_number: str = None,
                       notification_types: List[str] = None, preferred_method: str = "both",
-                      min_magnitude: float = 4.0, regions: List[str] = None):
+                      min_magnitude: float = 4.0, regions: List[str] = None,
+                      language: str = "en"):
         """Add a new notification subscriber"""
         if notification_types is None:
             notification_types = ["high_risk", "medium_risk"]
@@ -130,14 +242,16 @@ class EarthquakeNotificationSystem:
             cursor.execute('''
                 INSERT INTO notification_subscribers 
                 (name, phone_number, whatsapp_number, notification_types, 
-                 preferred_method, min_magnitude, regions)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                 preferred_method, min_magnitude, regions, language)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             ''', (name, phone_number, whatsapp_number or phone_number,
                   json.dumps(notification_types), preferred_method, 
-                  min_magnitude, json.dumps(regions)))
+                  min_magnitude, json.dumps(regions), language))
             
-            conn.commit()
             subscriber_id = cursor.lastrowid
+            write_subscriber_links(cursor, subscriber_id, regions, notification_types)
+            conn.commit()
+            self.subscriber_index.invalidate()
             logger.info(f"Added subscriber: {name} (ID: {subscriber_id})")
             return subscriber_id
             
@@ -147,6 +261,21 @@ class EarthquakeNotificationSystem:
         finally:
             conn.close()
     
+    def import_subscribers(self, source, reject_path: str = None,
+                           chunksize: int = subscriber_bulk.DEFAULT_CHUNKSIZE) -> Dict:
+        """Bulk-import subscribers from a CSV/Excel file, buffer or DataFrame"""
+        summary = subscriber_bulk.import_subscribers(source, self.db_path, chunksize,
+                                                     reject_path=reject_path)
+        self.subscriber_index.invalidate()
+        logger.info(f"Bulk import: {summary['upserted']} upserted, "
+                    f"{summary['rejected']} rejected of {summary['read']} rows")
+        return summary
+    
+    def export_subscribers(self, destination, active_only: bool = False) -> int:
+        """Stream all subscribers to a CSV path or text buffer"""
+        return subscriber_bulk.export_subscribers(destination, self.db_path,
+                                                  active_only=active_only)
+    
     def configure_whatsapp_api(self, provider: str, **config):
         """Configure WhatsApp API settings"""
         if provider in self.whatsapp_apis:
@@ -162,15 +291,48 @@ class EarthquakeNotificationSystem:
             logger.info(f"Configured {provider} SMS API")
     
     def load_prediction_data(self, file_path: str) -> pd.DataFrame:
-        """Load earthquake prediction data from CSV"""
+        """Load earthquake prediction data (from its Parquet snapshot when built)"""
         try:
-            df = pd.read_csv(file_path)
+            df = snapshots.read_source(file_path)
             df['prediction_date'] = pd.to_datetime(df['prediction_date']).dt.date
             return df
         except Exception as e:
             logger.error(f"Error loading prediction data: {e}")
             return pd.DataFrame()
     
+    def load_all_predictions(self) -> pd.DataFrame:
+        """Load and combine every available prediction file"""
+        frames = [self.load_prediction_data(file_path)
+                  for file_path in self.prediction_files if os.path.exists(file_path)]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+    
+    def event_to_earthquake_data(self, event: Dict) -> Dict:
+        """Convert a live USGS event into the record shape used for notifications"""
+        magnitude = float(event['magnitude'])
+        if magnitude >= 5.0:
+            risk = 'High'
+        elif magnitude >= 4.0:
+            risk = 'Medium'
+        else:
+            risk = 'Low'
+        
+        return {
+            'event_id': event['id'],
+            'prediction_date': pd.Timestamp(event['time']).strftime('%Y-%m-%d %H:%M UTC'),
+            'predicted_magnitude': magnitude,
+            'earthquake_probability': 1.0,
+            'region': 'India',
+            'regional_zone': event['regional_zone'],
+            'model_type': 'USGS Live Feed',
+            'risk_category': risk,
+            'latitude': event['latitude'],
+            'longitude': event['longitude'],
+            'depth': event.get('depth'),
+            'place': event.get('place', '')
+        }
+    
     def filter_predictions_for_notifications(self, df: pd.DataFrame, 
                                            target_date: date = None) -> pd.DataFrame:
         """Filter predictions that should trigger notifications"""
@@ -190,96 +352,58 @@ class EarthquakeNotificationSystem:
         return filtered_df.sort_values(['predicted_magnitude', 'earthquake_probability'], 
                                      ascending=[False, False])
     
+    def render_notification(self, earthquake_data: Dict,
+                            notification_type: str = "alert",
+                            language: str = "en") -> RenderedMessage:
+        """Render a notification (cached) together with its SMS form"""
+        return self.message_renderer.render(earthquake_data, notification_type, language)
+    
     def generate_notification_message(self, earthquake_data: Dict, 
-                                    notification_type: str = "alert") -> str:
+                                    notification_type: str = "alert",
+                                    language: str = "en") -> str:
         """Generate notification message text"""
-        date_str = earthquake_data['prediction_date']
-        magnitude = earthquake_data['predicted_magnitude']
-        probability = earthquake_data['earthquake_probability'] * 100
-        region = earthquake_data['region']
-        regional_zone = earthquake_data['regional_zone']
-        model = earthquake_data['model_type']
-        risk = earthquake_data['risk_category']
-        lat = earthquake_data['latitude']
-        lng = earthquake_data['longitude']
-        
-        # Determine urgency emoji
-        if magnitude >= 6.0:
-            urgency_emoji = "🚨🚨🚨"
-        elif magnitude >= 5.0:
-            urgency_emoji = "⚠️⚠️"
-        else:
-            urgency_emoji = "⚡"
-        
-        if notification_type == "daily_summary":
-            message = f"""
-🌍 *Bhukamp Daily Earthquake Forecast - {date_str}*
-
-{urgency_emoji} *{risk} Risk Prediction*
-📍 *Location*: {regional_zone}, {region}
-📊 *Magnitude*: {magnitude:.1f}
-🎯 *Probability*: {probability:.1f}%
-🤖 *Model*: {model}
-📍 *Coordinates*: {lat:.2f}°N, {lng:.2f}°E
-
-*About Bhukamp*: AI-powered earthquake forecasting for India using PINN and Random Forest models.
-
-⚠️ *Disclaimer*: This is a prediction based on AI models. Maintain earthquake preparedness always.
-
-Stay safe! 🙏
-Team Bhukamp
-            """.strip()
-        
-        else:  # alert type
-            message = f"""
-🚨 *EARTHQUAKE PREDICTION ALERT*
-
-{urgency_emoji} *{risk} Risk Earthquake Predicted*
-📅 *Date*: {date_str}
-📍 *Region*: {regional_zone}, {region}
-📊 *Magnitude*: {magnitude:.1f}
-🎯 *Probability*: {probability:.1f}%
-🤖 *Model*: {model}
-
-📍 *Coordinates*: {lat:.2f}°N, {lng:.2f}°E
-
-⚠️ *Preparedness Recommendations*:
-• Keep emergency kit ready
-• Review evacuation plans
-• Stay informed through official channels
-
-*This is an AI prediction - maintain general earthquake preparedness.*
-
-🌍 Bhukamp - Earthquake Forecasting for India
-            """.strip()
-        
-        return message
+        return self.render_notification(earthquake_data, notification_type, language).text
     
     def send_whatsapp_message(self, phone_number: str, message: str, 
-                            provider: str = "ultramsg") -> bool:
+                            provider: str = None) -> bool:
         """Send WhatsApp message using specified provider"""
+        return self._send_whatsapp(phone_number, message, provider) == "sent"
+    
+    def _send_whatsapp(self, phone_number: str, message: str, provider: str = None) -> str:
+        """Send a WhatsApp message; returns a delivery status (see _deliver)"""
+        provider = provider or self.default_providers["whatsapp"]
         if not self.whatsapp_apis[provider]["enabled"]:
             logger.error(f"{provider} WhatsApp API not configured")
-            return False
+            return "rejected"
         
+        if provider == "twilio":
+            send = self._send_whatsapp_twilio
+        elif provider == "ultramsg":
+            send = self._send_whatsapp_ultramsg
+        else:
+            logger.error(f"Unknown WhatsApp provider: {provider}")
+            return "rejected"
+        
+        return self._call_provider("whatsapp", provider, send, phone_number, message)
+    
+    def _call_provider(self, channel: str, provider: str, send, phone_number: str,
+                       message: str) -> str:
         try:
-            if provider == "twilio":
-                return self._send_whatsapp_twilio(phone_number, message)
-            elif provider == "ultramsg":
-                return self._send_whatsapp_ultramsg(phone_number, message)
-            else:
-                logger.error(f"Unknown WhatsApp provider: {provider}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error sending WhatsApp message: {e}")
-            return False
+            if self.provider_health.get(channel, provider).call(send, phone_number, message):
+                return "sent"
+            return "failed"
+        except ProviderUnavailable:
+            logger.warning(f"{provider} {channel} circuit open; message to {phone_number} deferred")
+            return "deferred"
+        except MessageRejected as e:
+            logger.error(f"{provider} {channel} rejected the message to {phone_number}: {e}")
+            return "rejected"
     
     def _send_whatsapp_ultramsg(self, phone_number: str, message: str) -> bool:
         """Send WhatsApp message using UltraMsg API"""
         config = self.whatsapp_apis["ultramsg"]
         
-        url = f"https://api.ultramsg.com/{config['instance_id']}/messages/chat"
+        url = f"{self.provider_urls['ultramsg']}/{config['instance_id']}/messages/chat"
         
         payload = {
             "token": config["token"],
@@ -287,14 +411,17 @@ Team Bhukamp
             "body": message
         }
         
-        response = requests.post(url, data=payload)
+        response = requests.post(url, data=payload, timeout=self.request_timeout)
         
+        if response.status_code == 429:
+            raise ProviderThrottled(response.text)
         if response.status_code == 200:
             logger.info(f"WhatsApp message sent successfully to {phone_number}")
             return True
-        else:
-            logger.error(f"Failed to send WhatsApp message: {response.text}")
-            return False
+        if 400 <= response.status_code < 500:
+            raise MessageRejected(response.text)
+        logger.error(f"Failed to send WhatsApp message: {response.text}")
+        return False
     
     def _send_whatsapp_twilio(self, phone_number: str, message: str) -> bool:
         """Send WhatsApp message using Twilio API"""
@@ -315,51 +442,54 @@ Team Bhukamp
             return True
             
         except Exception as e:
+            self._raise_twilio_status(e)
             logger.error(f"Twilio WhatsApp error: {e}")
             return False
     
     def send_sms_message(self, phone_number: str, message: str, 
-                        provider: str = "textbelt") -> bool:
+                        provider: str = None) -> bool:
         """Send SMS message using specified provider"""
+        return self._send_sms(phone_number, message, provider) == "sent"
+    
+    def _send_sms(self, phone_number: str, message: str, provider: str = None) -> str:
+        """Send an SMS; returns a delivery status (see _deliver)"""
+        provider = provider or self.default_providers["sms"]
         if not self.sms_apis[provider]["enabled"]:
             logger.error(f"{provider} SMS API not configured")
-            return False
+            return "rejected"
         
-        try:
-            if provider == "twilio":
-                return self._send_sms_twilio(phone_number, message)
-            elif provider == "textbelt":
-                return self._send_sms_textbelt(phone_number, message)
-            else:
-                logger.error(f"Unknown SMS provider: {provider}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error sending SMS message: {e}")
-            return False
+        if provider == "twilio":
+            send = self._send_sms_twilio
+        elif provider == "textbelt":
+            send = self._send_sms_textbelt
+        else:
+            logger.error(f"Unknown SMS provider: {provider}")
+            return "rejected"
+        
+        return self._call_provider("sms", provider, send, phone_number, message)
     
     def _send_sms_textbelt(self, phone_number: str, message: str) -> bool:
         """Send SMS using TextBelt API"""
         config = self.sms_apis["textbelt"]
         
-        # Truncate message for SMS limits
-        if len(message) > 1600:
-            message = message[:1600] + "..."
-        
-        response = requests.post('https://textbelt.com/text', {
+        response = requests.post(f"{self.provider_urls['textbelt']}/text", {
             'phone': phone_number,
             'message': message,
             'key': config["api_key"] if config["api_key"] else "textbelt"
-        })
+        }, timeout=self.request_timeout)
         
+        if response.status_code == 429:
+            raise ProviderThrottled(response.text)
+        if response.status_code >= 500:
+            logger.error(f"Failed to send SMS: {response.text}")
+            return False
         result = response.json()
         
         if result.get('success'):
             logger.info(f"SMS sent successfully to {phone_number}")
             return True
-        else:
-            logger.error(f"Failed to send SMS: {result.get('error')}")
-            return False
+        # TextBelt answers per-message problems (bad number, quota) with success: false
+        raise MessageRejected(result.get('error'))
     
     def _send_sms_twilio(self, phone_number: str, message: str) -> bool:
         """Send SMS using Twilio API"""
@@ -370,10 +500,6 @@ Team Bhukamp
             
             client = Client(config["account_sid"], config["auth_token"])
             
-            # Truncate message for SMS limits
-            if len(message) > 1600:
-                message = message[:1600] + "..."
-            
             message_obj = client.messages.create(
                 body=message,
                 from_=config["phone_number"],
@@ -384,13 +510,78 @@ Team Bhukamp
             return True
             
         except Exception as e:
+            self._raise_twilio_status(e)
             logger.error(f"Twilio SMS error: {e}")
             return False
     
+    @staticmethod
+    def _raise_twilio_status(error: Exception):
+        """Re-raise a Twilio API error as throttling or a per-message rejection"""
+        status = getattr(error, "status", None)
+        if status == 429:
+            raise ProviderThrottled(str(error)) from error
+        if isinstance(status, int) and 400 <= status < 500:
+            raise MessageRejected(str(error)) from error
+    
+    @staticmethod
+    def _channels(method: str) -> List[str]:
+        """Channels used for a preferred notification method"""
+        return [channel for channel in ("whatsapp", "sms") if method in [channel, "both"]]
+    
+    def _channel_health(self, channel: str):
+        return self.provider_health.get(channel, self.default_providers[channel])
+    
+    def _send_on(self, channel: str, phone: str, whatsapp: Optional[str],
+                 message: RenderedMessage) -> str:
+        if channel == "whatsapp":
+            return self._send_whatsapp(whatsapp or phone, message.text)
+        return self._send_sms(phone, message.sms_text)
+    
+    def _deliver(self, phone: str, whatsapp: Optional[str], channels: List[str],
+                 message: RenderedMessage, method: str = "both") -> List[tuple]:
+        """
+        Send a message over the given channels; returns (channel, status) pairs.
+        
+        Status is "sent", "failed" (the provider failed; worth retrying),
+        "rejected" (the channel is not configured or the provider refused
+        this message) or "deferred" (the provider's circuit did not admit
+        the call; nothing was attempted and nothing should be logged).
+        WhatsApp-only subscribers fail over to SMS when WhatsApp is down or
+        the send fails.
+        """
+        results = [(channel, self._send_on(channel, phone, whatsapp, message))
+                   for channel in channels]
+        
+        if (method == "whatsapp" and "whatsapp" in channels and
+                not any(status == "sent" for _, status in results) and
+                self.sms_apis[self.default_providers["sms"]]["enabled"] and
+                self._channel_health("sms").available()):
+            logger.info(f"WhatsApp unavailable for {phone}; failing over to SMS")
+            results.append(("sms", self._send_on("sms", phone, whatsapp, message)))
+        return results
+    
     def send_notification_to_subscriber(self, subscriber_id: int, 
                                       earthquake_data: Dict,
                                       notification_type: str = "alert") -> bool:
         """Send notification to a specific subscriber"""
+        outcome = self._send_to_subscriber(subscriber_id, earthquake_data, notification_type)
+        return outcome in ("sent", "partial")
+    
+    def _send_to_subscriber(self, subscriber_id: int, earthquake_data: Dict,
+                            notification_type: str, log_failures: bool = True) -> str:
+        """
+        Deliver one prediction to one subscriber.
+        
+        Returns "sent" (every pending channel delivered), "partial" (some
+        delivered, the rest worth retrying), "failed" (nothing delivered;
+        worth retrying), "deferred" (no channel's provider admitted the
+        call), "rejected" (nothing delivered and nothing worth retrying: the
+        channels are not configured or the provider refused the message) or
+        "skipped" (inactive, not matching or already delivered).
+        
+        With `log_failures=False` failed channels are not written to the
+        history, for callers that will retry and log the final attempt.
+        """
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
@@ -398,7 +589,7 @@ Team Bhukamp
             # Get subscriber details
             cursor.execute('''
                 SELECT name, phone_number, whatsapp_number, preferred_method,
-                       min_magnitude, regions, notification_types
+                       min_magnitude, regions, notification_types, language
                 FROM notification_subscribers 
                 WHERE id = ? AND active = 1
             ''', (subscriber_id,))
@@ -406,65 +597,231 @@ Team Bhukamp
             subscriber = cursor.fetchone()
             if not subscriber:
                 logger.error(f"Subscriber {subscriber_id} not found or inactive")
-                return False
+                return "skipped"
             
-            name, phone, whatsapp, method, min_mag, regions_json, types_json = subscriber
+            name, phone, whatsapp, method, min_mag, regions_json, types_json, language = subscriber
             
             # Check if earthquake meets subscriber criteria
-            regions = json.loads(regions_json)
-            types = json.loads(types_json)
+            regions = json.loads(regions_json or "[]")
+            types = json.loads(types_json or "[]")
             
-            if (earthquake_data['predicted_magnitude'] < min_mag or
-                earthquake_data['regional_zone'] not in regions):
+            if notification_type == "weekly_summary":
+                # The digest goes to every opted-in subscriber, filtered by
+                # their profile when it is rendered
+                key = ledger_key(('weekly_summary', earthquake_data['prediction_date']))
+            elif (earthquake_data['predicted_magnitude'] < min_mag or
+                  earthquake_data['regional_zone'] not in regions):
                 logger.info(f"Earthquake doesn't meet criteria for {name}")
-                return False
+                return "skipped"
+            else:
+                key = ledger_key(prediction_key(earthquake_data))
             
-            # Generate message
-            message = self.generate_notification_message(earthquake_data, notification_type)
+            # Skip channels that already delivered this prediction
+            channels = self.ledger.filter_unsent(subscriber_id, key, self._channels(method))
+            if method == "whatsapp" and self.ledger.seen(subscriber_id, key, "sms"):
+                channels = []  # delivered earlier through SMS failover
+            if not channels:
+                logger.info(f"Prediction already sent to {name}; suppressed")
+                return "skipped"
             
-            success = False
+            # Generate message
+            if notification_type == "weekly_summary":
+                message = self._digest_message(earthquake_data['prediction_date'],
+                                               tuple(sorted(regions)), float(min_mag or 0))
+                if message is None:
+                    logger.error(f"No stored digest for the week of "
+                                 f"{earthquake_data['prediction_date']}")
+                    return "rejected"
+            else:
+                message = self.render_notification(earthquake_data, notification_type,
+                                                   language or "en")
             
             # Send notifications based on preference
-            if method in ["whatsapp", "both"]:
-                success_wa = self.send_whatsapp_message(whatsapp or phone, message)
-                if success_wa:
-                    self._log_notification(subscriber_id, earthquake_data, "whatsapp", "sent")
-                    success = True
-                else:
-                    self._log_notification(subscriber_id, earthquake_data, "whatsapp", "failed")
-            
-            if method in ["sms", "both"]:
-                success_sms = self.send_sms_message(phone, message)
-                if success_sms:
-                    self._log_notification(subscriber_id, earthquake_data, "sms", "sent")
-                    success = True
-                else:
-                    self._log_notification(subscriber_id, earthquake_data, "sms", "failed")
+            results = self._deliver(phone, whatsapp, channels, message, method)
+            self._log_notification(subscriber_id, earthquake_data, results, key, log_failures)
             
-            return success
+            delivered_channels = {channel for channel, status in results if status == "sent"}
+            remaining = [channel for channel in channels if channel not in delivered_channels]
+            if method == "whatsapp" and "sms" in delivered_channels:
+                remaining = []
+            if not remaining:
+                return "sent"
+            statuses = {status for _, status in results}
+            if "failed" in statuses:
+                return "partial" if delivered_channels else "failed"
+            if "deferred" in statuses:
+                return "partial" if delivered_channels else "deferred"
+            # Whatever is left was refused for good
+            return "sent" if delivered_channels else "rejected"
             
         except Exception as e:
             logger.error(f"Error sending notification to subscriber {subscriber_id}: {e}")
-            return False
+            return "failed"
         finally:
             conn.close()
     
-    def _log_notification(self, subscriber_id: int, earthquake_data: Dict,
-                         notification_type: str, status: str, error_msg: str = None):
-        """Log notification attempt to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def get_matching_subscribers(self, magnitude: float, regional_zone: str,
+                                 alert_type: str = None) -> List[int]:
+        """Get active subscribers whose preferences match an earthquake"""
+        return self.subscriber_index.match(magnitude, regional_zone, alert_type).tolist()
+    
+    def notify_matching_subscribers(self, earthquake_data: Dict,
+                                    notification_type: str = "alert",
+                                    alert_type: str = None) -> int:
+        """Send one earthquake to every subscriber whose preferences match it"""
+        subscriber_ids = self.get_matching_subscribers(
+            earthquake_data['predicted_magnitude'],
+            earthquake_data['regional_zone'],
+            alert_type
+        )
         
-        cursor.execute('''
-            INSERT INTO sent_notifications 
-            (subscriber_id, prediction_date, earthquake_data, notification_type, 
-             status, error_message)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (subscriber_id, earthquake_data['prediction_date'],
-              json.dumps(earthquake_data), notification_type, status, error_msg))
+        sent = self.dispatch_notifications(
+            ((subscriber_id, earthquake_data) for subscriber_id in subscriber_ids),
+            notification_type
+        )
         
-        conn.commit()
-        conn.close()
+        logger.info(f"Sent {notification_type} to {sent}/{len(subscriber_ids)} matching subscribers")
+        return sent
+    
+    def _dispatch(self, jobs: Iterable[tuple]) -> Iterable[Tuple[object, str]]:
+        """
+        Run (tag, subscriber_id, earthquake_data, notification_type[,
+        log_failures]) jobs on a worker pool, yielding (tag, outcome) as they
+        finish.
+        
+        Pacing is left to each provider's AIMD limiter, so throughput follows
+        what the providers currently sustain.
+        """
+        def run(tag, subscriber_id, earthquake_data, notification_type, log_failures=True):
+            return tag, self._send_to_subscriber(subscriber_id, earthquake_data,
+                                                 notification_type, log_failures)
+        
+        pending = set()
+        with ThreadPoolExecutor(max_workers=self.dispatch_workers,
+                                thread_name_prefix="notify") as pool:
+            for job in jobs:
+                # Bound the queue so huge runs don't hold every job in memory
+                if len(pending) >= self.dispatch_workers * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                pending.add(pool.submit(run, *job))
+            for future in as_completed(pending):
+                yield future.result()
+    
+    def dispatch_notifications(self, jobs: Iterable[Tuple[int, Dict]],
+                               notification_type: str = "alert") -> int:
+        """Send (subscriber_id, earthquake_data) jobs concurrently; returns subscribers reached"""
+        results = self._dispatch((None, subscriber_id, earthquake_data, notification_type)
+                                 for subscriber_id, earthquake_data in jobs)
+        return sum(outcome in ("sent", "partial") for _, outcome in results)
+    
+    def enqueue_notifications(self, jobs: Iterable[Tuple[int, Dict]],
+                              notification_type: str) -> int:
+        """Queue (subscriber_id, earthquake_data) sends; already-queued ones are ignored"""
+        payloads = {}
+        
+        def entries():
+            for subscriber_id, earthquake_data in jobs:
+                key = ledger_key(prediction_key(earthquake_data))
+                if key not in payloads:
+                    payloads[key] = serialize_payload(earthquake_data)
+                yield subscriber_id, key, notification_type, payloads[key]
+        
+        return self.work_queue.enqueue(entries())
+    
+    # How each _send_to_subscriber outcome settles its queue item
+    QUEUE_SETTLEMENT = {"sent": DONE, "skipped": DONE, "rejected": DONE,
+                        "partial": RETRY, "failed": RETRY, "deferred": DEFER}
+    
+    def drain_queue(self, worker_id: str = None, batch_size: int = None,
+                    exit_when_empty: bool = True, idle_seconds: float = 1.0) -> int:
+        """
+        Claim and send queued notifications.
+        
+        Safe to run in many processes at once: each batch is leased to one
+        worker (and the lease renewed while the batch is still sending), and
+        the delivery ledger is re-read for the claimed items so a prediction
+        another process already delivered is not sent again. Failed sends
+        are only written to the history on their last attempt.
+        
+        With `exit_when_empty` the call returns once nothing is ready to
+        claim; retries still waiting out their backoff are left for a later
+        drain. Otherwise the worker keeps polling. `worker_id` owns the
+        leases and must be unique to this drain; the default is. Returns the
+        number of subscribers reached.
+        """
+        # Unique per call: the scheduler can run two drains in one process,
+        # and lease ownership must tell them apart
+        worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:12]}"
+        batch_size = batch_size or self.dispatch_workers * 4
+        renew_every = self.work_queue.lease_seconds / 3
+        reached = 0
+        
+        while True:
+            items = self.work_queue.claim(worker_id, batch_size)
+            if not items:
+                if exit_when_empty:
+                    break
+                time.sleep(idle_seconds)
+                continue
+            
+            self.ledger.sync((item.subscriber_id, item.prediction_key) for item in items)
+            results = []
+            renewed_at = time.monotonic()
+            jobs = ((item, item.subscriber_id, item.earthquake_data, item.notification_type,
+                     item.attempts >= self.work_queue.max_attempts) for item in items)
+            for item, outcome in self._dispatch(jobs):
+                results.append((item, self.QUEUE_SETTLEMENT[outcome]))
+                reached += outcome in ("sent", "partial")
+                
+                # Keep a slow batch from being reclaimed by another worker
+                # before it is settled
+                if time.monotonic() - renewed_at >= renew_every:
+                    held = self.work_queue.renew(worker_id, items)
+                    if held < len(items):
+                        logger.warning(f"{len(items) - held} leased notifications were "
+                                       f"taken over by another worker")
+                    renewed_at = time.monotonic()
+            self.work_queue.complete(worker_id, results)
+        
+        return reached
+    
+    def _log_notification(self, subscriber_id: int, earthquake_data: Dict,
+                          results: List[tuple], key: str, log_failures: bool = True):
+        """
+        Log one subscriber's (channel, status) attempts, count them in the
+        daily metrics and record delivered channels in the ledger, in one
+        transaction. Deferred channels were not attempted and are not logged;
+        failed ones only with `log_failures`.
+        """
+        logged = {"sent", "rejected", "failed"} if log_failures else {"sent", "rejected"}
+        statuses = [(channel, "sent" if status == "sent" else "failed")
+                    for channel, status in results if status in logged]
+        if not statuses:
+            return
+        delivered = [(subscriber_id, key, channel) for channel, status in statuses
+                     if status == "sent"]
+        
+        # One writer per process at a time: queuing on a Python lock is far
+        # cheaper than SQLite's sleep-and-retry busy handler
+        with self._write_lock:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA synchronous = NORMAL')
+            payload_id = self.payload_store.get_id(conn, serialize_payload(earthquake_data))
+            conn.executemany('''
+                INSERT INTO sent_notifications 
+                (subscriber_id, prediction_date, payload_id, notification_type, status)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(subscriber_id, str(earthquake_data['prediction_date']), payload_id, channel, status)
+                  for channel, status in statuses])
+            zone = earthquake_data.get('regional_zone')
+            delivery_metrics.record_deliveries(conn, Counter((channel, status, zone)
+                                                             for channel, status in statuses).items())
+            self.ledger.write(conn, delivered)
+            conn.commit()
+            conn.close()
+        self.ledger.remember(delivered)
     
     def process_daily_notifications(self, target_date: date = None):
         """Process and send daily earthquake prediction notifications"""
@@ -474,17 +831,7 @@ Team Bhukamp
         logger.info(f"Processing notifications for {target_date}")
         
         # Load prediction data
-        prediction_files = [
-            "data/future_earthquake_predictions_india_25years_2025_2050.csv",
-            "data/future_earthquake_predictions_100years.csv"
-        ]
-        
-        all_predictions = pd.DataFrame()
-        
-        for file_path in prediction_files:
-            if os.path.exists(file_path):
-                df = self.load_prediction_data(file_path)
-                all_predictions = pd.concat([all_predictions, df], ignore_index=True)
+        all_predictions = self.load_all_predictions()
         
         if all_predictions.empty:
             logger.warning("No prediction data found")
@@ -499,32 +846,113 @@ Team Bhukamp
             logger.info(f"No significant predictions for {target_date}")
             return
         
-        # Get active subscribers
+        # Every (prediction, matching subscriber) pair goes through the work queue
+        def jobs():
+            for earthquake_data in notification_predictions.to_dict('records'):
+                subscriber_ids = self.get_matching_subscribers(
+                    earthquake_data['predicted_magnitude'], earthquake_data['regional_zone']
+                )
+                for subscriber_id in subscriber_ids:
+                    yield subscriber_id, earthquake_data
+        
+        queued = self.enqueue_notifications(jobs(), "daily_summary")
+        logger.info(f"Queued {queued} notifications for {target_date}")
+        
+        # One pass over what is ready, alongside any notification_worker
+        # processes; retries are picked up by workers or the next drain
+        sent = self.drain_queue()
+        
+        logger.info(f"Completed processing notifications for {target_date}: {sent} sent")
+        for health in self.provider_health.snapshot():
+            logger.info(f"Provider health: {health}")
+    
+    def _load_digest(self, week_start: date) -> Optional[Dict]:
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT id FROM notification_subscribers WHERE active = 1')
-        subscriber_ids = [row[0] for row in cursor.fetchall()]
+        row = conn.execute('SELECT payload FROM weekly_digests WHERE week_start = ?',
+                           (str(week_start),)).fetchone()
         conn.close()
+        return json.loads(row[0]) if row else None
+    
+    def build_weekly_digest(self, week_start: date = None) -> Dict:
+        """Aggregate the week's catalog and predictions once and store the result"""
+        if week_start is None:
+            week_start = upcoming_week_start()
         
-        # Send notifications for each significant prediction
-        for _, prediction in notification_predictions.iterrows():
-            earthquake_data = prediction.to_dict()
-            
-            for subscriber_id in subscriber_ids:
-                try:
-                    success = self.send_notification_to_subscriber(
-                        subscriber_id, earthquake_data, "daily_summary"
-                    )
-                    if success:
-                        logger.info(f"Notification sent to subscriber {subscriber_id}")
-                    
-                    # Small delay between notifications
-                    time.sleep(1)
-                    
-                except Exception as e:
-                    logger.error(f"Error sending to subscriber {subscriber_id}: {e}")
-        
-        logger.info(f"Completed processing notifications for {target_date}")
+        catalog = pd.DataFrame()
+        if os.path.exists(self.catalog_file):
+            # Only the two observed weeks before week_start; with a fresh
+            # snapshot the date range skips every other row group
+            catalog = snapshots.read_source(self.catalog_file, "catalog",
+                                            columns=['time', 'latitude', 'longitude', 'mag'],
+                                            start=week_start - timedelta(days=14),
+                                            end=week_start - timedelta(days=1))
+        
+        previous = self._load_digest(week_start - timedelta(days=7))
+        digest = build_weekly_digest(catalog, self.load_all_predictions(),
+                                     week_start, previous)
+        
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            INSERT INTO weekly_digests (week_start, payload) VALUES (?, ?)
+            ON CONFLICT(week_start) DO UPDATE SET
+                payload = excluded.payload,
+                created_at = CURRENT_TIMESTAMP
+        ''', (str(week_start), json.dumps(digest)))
+        conn.commit()
+        conn.close()
+        
+        with self._digest_lock:
+            self._digest_cache = (None, None, {})
+        return digest
+    
+    def _digest_message(self, week_start: str, regions: tuple,
+                        min_magnitude: float) -> Optional[RenderedMessage]:
+        """
+        The stored digest for `week_start` rendered for one (regions,
+        minimum magnitude) profile; subscribers sharing a profile share the
+        message. None when no digest was stored for that week.
+        """
+        with self._digest_lock:
+            if self._digest_cache[0] != week_start:
+                self._digest_cache = (week_start, self._load_digest(week_start), {})
+            _, digest, messages = self._digest_cache
+            if digest is None:
+                return None
+            profile = (regions, min_magnitude)
+            if profile not in messages:
+                messages[profile] = prepare_message(
+                    render_weekly_digest(digest, regions, min_magnitude))
+            return messages[profile]
+    
+    def send_weekly_summary(self, week_start: date = None) -> int:
+        """
+        Queue the weekly digest for every subscriber who opted into it and
+        drain the queue once. Each send is logged as it completes, and sends
+        a provider did not take (or that failed) stay queued for the
+        workers and the next drains, as daily notifications do.
+        """
+        digest = self.build_weekly_digest(week_start)
+        
+        conn = sqlite3.connect(self.db_path)
+        subscriber_ids = [row[0] for row in conn.execute('''
+            SELECT s.id FROM notification_subscribers s
+            WHERE s.active = 1 AND s.id IN (
+                SELECT subscriber_id FROM subscriber_alert_types
+                WHERE alert_type = 'weekly_summary'
+            )
+        ''')]
+        conn.close()
+        
+        summary_data = {'prediction_date': digest['week_start'], 'digest': 'weekly_summary'}
+        payload = serialize_payload(summary_data)
+        key = ledger_key(('weekly_summary', digest['week_start']))
+        queued = self.work_queue.enqueue((subscriber_id, key, "weekly_summary", payload)
+                                         for subscriber_id in subscriber_ids)
+        logger.info(f"Queued the weekly digest for {queued}/{len(subscriber_ids)} subscribers")
+        
+        sent = self.drain_queue()
+        logger.info(f"Weekly digest run reached {sent} subscribers")
+        return sent
     
     def get_subscribers(self) -> pd.DataFrame:
         """Get list of all subscribers"""
@@ -538,18 +966,155 @@ Team Bhukamp
         conn.close()
         return df
     
+    # Sortable columns for the subscriber view (trusted SQL expressions)
+    SUBSCRIBER_SORTS = {
+        "created_at": "s.created_at",
+        "name": "s.name",
+        "min_magnitude": "s.min_magnitude",
+        "id": "s.id"
+    }
+    
+    def query_subscribers(self, limit: int = 50, cursor: tuple = None,
+                          sort_by: str = "created_at", descending: bool = True,
+                          active: Optional[bool] = None, region: str = None,
+                          preferred_method: str = None, search: str = None):
+        """
+        One page of subscribers, filtered and sorted in SQL.
+        
+        Returns (page DataFrame, cursor for the next page or None).
+        Regions and alert types come back as comma-separated text.
+        """
+        sort_column = self.SUBSCRIBER_SORTS[sort_by]
+        where, params = build_filters({
+            "s.active = ?": None if active is None else int(active),
+            "s.id IN (SELECT subscriber_id FROM subscriber_regions WHERE region = ?)": region,
+            "s.preferred_method = ?": preferred_method,
+            "(s.name LIKE ? OR s.phone_number LIKE ?)":
+                (f"{search}%", f"%{search}%") if search else None
+        })
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return keyset_page(conn, f'''
+                SELECT s.id, s.name, s.phone_number, s.whatsapp_number, s.preferred_method,
+                       s.min_magnitude, s.language,
+                       (SELECT group_concat(r.region, ', ') FROM subscriber_regions r
+                        WHERE r.subscriber_id = s.id) AS regions,
+                       (SELECT group_concat(t.alert_type, ', ') FROM subscriber_alert_types t
+                        WHERE t.subscriber_id = s.id) AS notification_types,
+                       s.created_at, s.active,
+                       {sort_column} AS _sort_key, s.id AS _row_id
+                FROM notification_subscribers s
+            ''', where, params, sort_column, "s.id", descending, cursor, limit)
+        finally:
+            conn.close()
+    
+    def get_subscriber_stats(self) -> Dict:
+        """Subscriber counts computed in SQL rather than over a loaded table"""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('''
+            SELECT COUNT(*),
+                   COALESCE(SUM(active = 1), 0),
+                   COALESCE(SUM(preferred_method IN ('whatsapp', 'both')), 0),
+                   COALESCE(SUM(preferred_method IN ('sms', 'both')), 0),
+                   AVG(min_magnitude)
+            FROM notification_subscribers
+        ''').fetchone()
+        conn.close()
+        return {
+            'total': row[0],
+            'active': row[1],
+            'whatsapp': row[2],
+            'sms': row[3],
+            'avg_min_magnitude': row[4] or 0.0
+        }
+    
+    def query_notification_history(self, limit: int = 50, cursor: tuple = None,
+                                   days: int = 30, status: str = None,
+                                   channel: str = None, subscriber_id: int = None):
+        """
+        One page of notification history, newest first.
+        
+        Returns (page DataFrame, cursor for the next page or None).
+        """
+        where, params = build_filters({
+            "sn.sent_at >= datetime('now', ?)": f"-{int(days)} days" if days else None,
+            "sn.status = ?": status,
+            "sn.notification_type = ?": channel,
+            "sn.subscriber_id = ?": subscriber_id
+        })
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return keyset_page(conn, '''
+                SELECT sn.id, sn.sent_at, sn.subscriber_id, ns.name, ns.phone_number,
+                       sn.prediction_date, sn.notification_type, sn.status, sn.error_message,
+                       sn.sent_at AS _sort_key, sn.id AS _row_id
+                FROM sent_notifications sn
+                LEFT JOIN notification_subscribers ns ON ns.id = sn.subscriber_id
+            ''', where, params, "sn.sent_at", "sn.id", True, cursor, limit)
+        finally:
+            conn.close()
+    
+    def get_notification_stats(self, days: int = 30) -> pd.DataFrame:
+        """Notification counts per channel and status over the last `days`"""
+        conn = sqlite3.connect(self.db_path)
+        df = delivery_metrics.delivery_totals(conn, days)
+        conn.close()
+        return df
+    
+    def get_daily_notification_stats(self, days: int = 30) -> pd.DataFrame:
+        """Per-day notification counts by status over the last `days`"""
+        conn = sqlite3.connect(self.db_path)
+        df = delivery_metrics.daily_deliveries(conn, days)
+        conn.close()
+        return df
+    
+    def get_zone_notification_stats(self, days: int = 30) -> pd.DataFrame:
+        """Notification counts per regional zone and status over the last `days`"""
+        conn = sqlite3.connect(self.db_path)
+        df = delivery_metrics.zone_deliveries(conn, days)
+        conn.close()
+        return df
+    
     def get_notification_history(self, days: int = 30) -> pd.DataFrame:
         """Get notification history"""
         conn = sqlite3.connect(self.db_path)
         df = pd.read_sql_query('''
-            SELECT sn.*, ns.name, ns.phone_number
+            SELECT sn.id, sn.subscriber_id, sn.prediction_date,
+                   COALESCE(p.payload, sn.earthquake_data) AS earthquake_data,
+                   sn.notification_type, sn.status, sn.sent_at, sn.error_message,
+                   ns.name, ns.phone_number
             FROM sent_notifications sn
             JOIN notification_subscribers ns ON sn.subscriber_id = ns.id
+            LEFT JOIN notification_payloads p ON p.id = sn.payload_id
             WHERE sn.sent_at >= datetime('now', '-{} days')
             ORDER BY sn.sent_at DESC
         '''.format(days), conn)
         conn.close()
         return df
 
-# Initialize global notification system
-notification_system = EarthquakeNotificationSystem()
+    def run_history_retention(self) -> Dict:
+        """Compact payloads, archive old history and release free pages"""
+        return run_retention(self.db_path, self.archive_dir, self.payload_store,
+                             retention_days=self.history_retention_days)
+
+_notification_system = None
+_notification_system_lock = threading.Lock()
+
+
+def get_notification_system() -> EarthquakeNotificationSystem:
+    """The process-wide notification system on the default database"""
+    global _notification_system
+    with _notification_system_lock:
+        if _notification_system is None:
+            _notification_system = EarthquakeNotificationSystem()
+        return _notification_system
+
+
+def __getattr__(name):
+    # `notification_system` is created on first use, so importing this module
+    # (as sender workers do, with their own database) opens nothing
+    if name == "notification_system":
+        return get_notification_system()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,235 @@
+"""
+Geographic Filtering for Earthquake Catalogs
+Vectorized point-in-polygon tests against India's boundary, used by every
+loader instead of matching "India" inside the free-text `place` column.
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+from typing import List, Optional, Sequence, Tuple
+
+# Bounding box used by the USGS/EMSC queries across the app
+INDIA_BBOX = {
+    "minlatitude": 6.0,
+    "maxlatitude": 37.5,
+    "minlongitude": 68.0,
+    "maxlongitude": 98.0
+}
+
+# Simplified India boundary as (longitude, latitude) vertices, following the
+# official map (including Jammu & Kashmir and Ladakh) and excluding Nepal,
+# Bhutan and Bangladesh. Resolution is roughly 0.5-1 degree along borders;
+# the coastline sits slightly offshore so near-coast events are kept.
+INDIA_MAINLAND = [
+    (68.1, 23.6), (68.7, 24.3), (70.8, 24.2), (71.1, 24.7), (70.3, 25.7),
+    (70.1, 26.6), (69.5, 27.0), (70.6, 28.0), (71.9, 27.9), (72.9, 29.0),
+    (73.4, 29.9), (74.6, 31.0), (74.6, 31.9), (74.0, 32.6), (73.6, 33.4),
+    (73.4, 34.6), (72.5, 35.6), (73.8, 36.7), (74.9, 37.1), (75.8, 36.8),
+    (77.0, 35.8), (78.0, 35.5), (79.0, 35.9), (80.3, 35.4), (79.4, 34.3),
+    (78.7, 34.0), (78.9, 33.0), (79.4, 32.5), (78.4, 32.5), (78.8, 31.3),
+    (79.8, 30.9), (80.3, 30.2), (80.1, 28.8), (81.3, 28.2), (82.7, 27.4),
+    (84.1, 27.4), (85.2, 26.6), (86.5, 26.5), (88.0, 26.4), (88.1, 28.0),
+    (88.9, 27.3), (89.0, 26.9), (90.0, 26.8), (92.1, 26.9), (91.6, 27.8),
+    (92.6, 28.1), (94.0, 29.2), (95.4, 29.1), (96.1, 29.4), (97.1, 28.3),
+    (97.4, 27.9), (96.6, 27.3), (95.2, 26.6), (94.6, 25.5), (94.2, 24.0),
+    (93.4, 23.0), (93.2, 22.2), (92.6, 21.9), (92.3, 23.7), (91.6, 22.9),
+    (91.2, 23.0), (91.2, 24.1), (92.0, 24.2), (92.3, 24.9), (90.0, 25.2),
+    (89.8, 25.9), (88.6, 26.4), (88.1, 25.9), (88.4, 24.9), (88.7, 24.2),
+    (88.9, 23.2), (89.0, 22.0), (89.0, 21.3), (87.0, 20.6), (86.0, 19.4),
+    (85.0, 18.8), (83.5, 17.3), (82.6, 16.3), (81.5, 15.5), (80.6, 15.2),
+    (80.6, 13.4), (80.2, 11.7), (80.2, 10.3), (79.5, 9.2), (78.0, 8.0),
+    (77.5, 7.7), (76.4, 8.6), (75.7, 10.5), (75.1, 12.0), (74.5, 12.9),
+    (74.0, 14.6), (73.3, 15.9), (72.6, 18.0), (72.4, 19.0), (72.4, 21.0),
+    (72.0, 20.6), (70.8, 20.4), (68.8, 22.2), (68.6, 23.0)
+]
+
+# Andaman & Nicobar island arc and its surrounding waters, drawn around
+# USGS's "Andaman Islands, India region" and "Nicobar Islands, India region"
+# (whose events reach 90.3E to the west and 95.8E in the Andaman Sea); the
+# south and east edges follow the maritime boundaries with Indonesia,
+# Thailand and Myanmar
+INDIA_ANDAMAN_NICOBAR = [
+    (91.0, 15.0), (93.5, 15.0), (94.3, 13.8), (96.0, 13.0), (96.0, 10.0),
+    (95.6, 7.8), (94.8, 6.0), (91.0, 6.0), (90.0, 8.0), (90.0, 10.0)
+]
+
+# Zone boundaries used by the prediction files (`regional_zone` column)
+REGIONAL_ZONE_BANDS = [
+    ("South", 15.0),
+    ("Central", 30.0),
+    ("Himalayan", 90.0)
+]
+
+
+def points_in_polygon(lon: np.ndarray, lat: np.ndarray,
+                      polygon: Sequence[Tuple[float, float]]) -> np.ndarray:
+    """Even-odd ray casting test of many points against one polygon"""
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    inside = np.zeros(lon.shape, dtype=bool)
+
+    vertices = np.asarray(polygon, dtype=np.float64)
+    x1, y1 = vertices[:, 0], vertices[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for ax, ay, bx, by in zip(x1, y1, x2, y2):
+            crosses = (ay > lat) != (by > lat)
+            if not crosses.any():
+                continue
+            x_cross = ax + (lat - ay) * (bx - ax) / (by - ay)
+            inside ^= crosses & (lon < x_cross)
+
+    return inside
+
+
+class PreparedRegion:
+    """
+    A set of polygons prepared for fast repeated containment tests.
+
+    Points are first rejected by the bounding box, then looked up in a coarse
+    grid whose cells are classified once as inside, outside or boundary.
+    Only points falling in boundary cells pay for the exact polygon test.
+    """
+
+    OUTSIDE, INSIDE, BOUNDARY = 0, 1, 2
+
+    def __init__(self, polygons: List[Sequence[Tuple[float, float]]],
+                 cell_size: float = 0.25):
+        self.polygons = [np.asarray(p, dtype=np.float64) for p in polygons]
+        self.cell_size = cell_size
+
+        all_vertices = np.vstack(self.polygons)
+        self.min_lon, self.min_lat = all_vertices.min(axis=0)
+        self.max_lon, self.max_lat = all_vertices.max(axis=0)
+
+        self.n_cols = int(np.ceil((self.max_lon - self.min_lon) / cell_size)) + 1
+        self.n_rows = int(np.ceil((self.max_lat - self.min_lat) / cell_size)) + 1
+        self.grid = self._build_grid()
+
+    def _exact_contains(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        inside = np.zeros(np.shape(lon), dtype=bool)
+        for polygon in self.polygons:
+            inside |= points_in_polygon(lon, lat, polygon)
+        return inside
+
+    def _build_grid(self) -> np.ndarray:
+        """Classify every grid cell as inside, outside or boundary"""
+        grid = np.zeros((self.n_rows, self.n_cols), dtype=np.uint8)
+
+        # Cells touched by an edge's bounding box need the exact test
+        for polygon in self.polygons:
+            start = polygon
+            end = np.roll(polygon, -1, axis=0)
+            lo = np.minimum(start, end)
+            hi = np.maximum(start, end)
+            col_lo = np.floor((lo[:, 0] - self.min_lon) / self.cell_size).astype(int)
+            col_hi = np.floor((hi[:, 0] - self.min_lon) / self.cell_size).astype(int)
+            row_lo = np.floor((lo[:, 1] - self.min_lat) / self.cell_size).astype(int)
+            row_hi = np.floor((hi[:, 1] - self.min_lat) / self.cell_size).astype(int)
+            for c0, c1, r0, r1 in zip(col_lo, col_hi, row_lo, row_hi):
+                grid[r0:r1 + 1, c0:c1 + 1] = self.BOUNDARY
+
+        # Every other cell is wholly inside or outside, so its center decides
+        rows, cols = np.nonzero(grid != self.BOUNDARY)
+        centers_lon = self.min_lon + (cols + 0.5) * self.cell_size
+        centers_lat = self.min_lat + (rows + 0.5) * self.cell_size
+        inside = self._exact_contains(centers_lon, centers_lat)
+        grid[rows[inside], cols[inside]] = self.INSIDE
+
+        return grid
+
+    def contains(self, lat, lon) -> np.ndarray:
+        """Return a boolean mask of the points that fall inside the region"""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        mask = np.zeros(lat.shape, dtype=bool)
+
+        candidates = np.flatnonzero(
+            (lat >= self.min_lat) & (lat <= self.max_lat) &
+            (lon >= self.min_lon) & (lon <= self.max_lon)
+        )
+        if candidates.size == 0:
+            return mask
+
+        cand_lat = lat[candidates]
+        cand_lon = lon[candidates]
+        rows = ((cand_lat - self.min_lat) / self.cell_size).astype(np.intp)
+        cols = ((cand_lon - self.min_lon) / self.cell_size).astype(np.intp)
+        state = self.grid[rows, cols]
+
+        mask[candidates[state == self.INSIDE]] = True
+
+        boundary = state == self.BOUNDARY
+        if boundary.any():
+            exact = self._exact_contains(cand_lon[boundary], cand_lat[boundary])
+            mask[candidates[boundary][exact]] = True
+
+        return mask
+
+
+INDIA_REGION = PreparedRegion([INDIA_MAINLAND, INDIA_ANDAMAN_NICOBAR])
+
+
+def _find_column(df: pd.DataFrame, candidates: Sequence[str]) -> Optional[str]:
+    for col in candidates:
+        if col in df.columns:
+            return col
+    return None
+
+
+def india_mask(df: pd.DataFrame) -> np.ndarray:
+    """Boolean mask of rows whose coordinates lie within India"""
+    lat_col = _find_column(df, ["latitude", "lat", "LAT"])
+    lon_col = _find_column(df, ["longitude", "lon", "LONG_", "long", "LON"])
+
+    if lat_col is None or lon_col is None:
+        raise KeyError("No latitude/longitude columns found for geographic filtering")
+
+    lat = pd.to_numeric(df[lat_col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    lon = pd.to_numeric(df[lon_col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return INDIA_REGION.contains(lat, lon)
+
+
+def filter_india(df: pd.DataFrame) -> pd.DataFrame:
+    """Keep only the events located inside India's boundary"""
+    if df.empty:
+        return df
+    return df[india_mask(df)]
+
+
+# USGS Flinn-Engdahl region names that lie wholly in Indian territory. Other
+# "..., India" places name the nearest town and can sit across a border
+INDIA_REGION_PLACES = r"(?:Andaman|Nicobar) Islands, India region$"
+
+
+def unmatched_india_region_events(df: pd.DataFrame, place_column: str = "place") -> pd.DataFrame:
+    """Rows placed in an Indian USGS region that the boundary leaves out (should be empty)"""
+    named = df[place_column].astype("string").str.contains(INDIA_REGION_PLACES, na=False)
+    return df[named.to_numpy() & ~india_mask(df)]
+
+
+def regional_zone_codes(lat) -> np.ndarray:
+    """Index into REGIONAL_ZONE_BANDS of each latitude's zone"""
+    lat = np.asarray(lat, dtype=np.float64)
+    bounds = [upper for _, upper in REGIONAL_ZONE_BANDS]
+    return np.clip(np.searchsorted(bounds, lat, side="right"), 0, len(bounds) - 1)
+
+
+def classify_regional_zone(lat) -> np.ndarray:
+    """Map latitudes onto the Himalayan/Central/South zones used by predictions"""
+    names = np.array([name for name, _ in REGIONAL_ZONE_BANDS])
+    return names[regional_zone_codes(lat)]
+
+
+if __name__ == "__main__":
+    # Boundary check against a catalog CSV: python geo_filter.py data/earthquake.csv
+    catalog = pd.read_csv(sys.argv[1] if len(sys.argv) > 1 else "data/earthquake.csv")
+    missed = unmatched_india_region_events(catalog)
+    print(f"{int(india_mask(catalog).sum())} of {len(catalog)} events inside India; "
+          f"{len(missed)} India-region events outside the boundary")
+    if not missed.empty:
+        print(missed[["latitude", "longitude", "place"]].to_string(index=False))
+        sys.exit(1)
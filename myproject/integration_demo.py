@@ -243,9 +243,6 @@ def send_test_alerts():
                 # Simulate error sound
                 print("🔊 [AUDIO] Error notification sound")
             
-            # Small delay between notifications
-            time.sleep(2)
-            
         except Exception as e:
             print(f"❌ Error sending to {subscriber['name']}: {e}")
             print("🔊 [AUDIO] Error notification sound")
@@ -300,25 +297,8 @@ def process_daily_predictions():
         elif risk_level == 'medium':
             print("🔊 [AUDIO] Medium risk alert sound for this prediction")
         
-        # Get subscribers who should receive this alert
-        subscribers = notification_system.get_subscribers()
-        active_subscribers = subscribers[subscribers['active'] == 1]
-        
-        sent_count = 0
-        for _, subscriber in active_subscribers.iterrows():
-            try:
-                success = notification_system.send_notification_to_subscriber(
-                    subscriber['id'],
-                    prediction,
-                    "daily_summary"
-                )
-                if success:
-                    sent_count += 1
-                    
-                time.sleep(1)  # Rate limiting
-                
-            except Exception as e:
-                print(f"❌ Error sending to subscriber {subscriber['id']}: {e}")
+        # Matching subscribers are sent to concurrently; provider limits pace the sends
+        sent_count = notification_system.notify_matching_subscribers(prediction, "daily_summary")
         
         print(f"📤 Sent to {sent_count} subscribers")
     
@@ -330,20 +310,21 @@ def show_analytics():
     print("=" * 40)
     
     # Subscriber statistics
-    subscribers = notification_system.get_subscribers()
-    print(f"👥 Total Subscribers: {len(subscribers)}")
-    print(f"✅ Active Subscribers: {len(subscribers[subscribers['active'] == 1])}")
+    stats = notification_system.get_subscriber_stats()
+    print(f"👥 Total Subscribers: {stats['total']}")
+    print(f"✅ Active Subscribers: {stats['active']}")
     
     # Notification history
-    history = notification_system.get_notification_history(days=30)
+    history = notification_system.get_notification_stats(days=30)
     if not history.empty:
-        print(f"📱 Notifications (30 days): {len(history)}")
+        total = history['count'].sum()
+        print(f"📱 Notifications (30 days): {total}")
         
-        success_rate = len(history[history['status'] == 'sent']) / len(history) * 100
+        success_rate = history.loc[history['status'] == 'sent', 'count'].sum() / total * 100
         print(f"✅ Success Rate: {success_rate:.1f}%")
         
-        whatsapp_count = len(history[history['notification_type'] == 'whatsapp'])
-        sms_count = len(history[history['notification_type'] == 'sms'])
+        whatsapp_count = history.loc[history['notification_type'] == 'whatsapp', 'count'].sum()
+        sms_count = history.loc[history['notification_type'] == 'sms', 'count'].sum()
         print(f"💬 WhatsApp: {whatsapp_count}, 📨 SMS: {sms_count}")
     else:
         print("📭 No notification history available")
@@ -492,12 +473,11 @@ def demo_government_deployment():
         }
     ]
     
-    for sub in government_subscribers:
-        subscriber_id = notification_system.add_subscriber(**sub)
-        if subscriber_id:
-            print(f"✅ Added: {sub['name']} - Government Stakeholder (ID: {subscriber_id})")
-        else:
-            print(f"⚠️ {sub['name']} already exists or failed to add")
+    # Government contact lists run to tens of thousands of rows, so they go
+    # through the bulk importer (the same call accepts a CSV/Excel path)
+    summary = notification_system.import_subscribers(pd.DataFrame(government_subscribers))
+    print(f"✅ Imported {summary['upserted']} government stakeholders "
+          f"({summary['rejected']} rejected)")
     
     # Government notification example
     print("\n🚨 SIMULATING GOVERNMENT ALERT...")
@@ -0,0 +1,360 @@
+"""
+Notification Job Scheduler
+Priority queue of due times feeding a worker pool, with no overlapping runs
+of the same job, persisted last-run state for missed-run catch-up, and
+per-job timing metrics.
+"""
+
+import heapq
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def _parse_time_of_day(at: str):
+    hour, minute = (int(part) for part in at.split(":"))
+    return hour, minute
+
+
+class DailyTrigger:
+    """Fires every day at a fixed local time ("HH:MM")"""
+
+    def __init__(self, at: str):
+        self.at = at
+        self.hour, self.minute = _parse_time_of_day(at)
+
+    def previous(self, now: datetime) -> datetime:
+        """Most recent scheduled time at or before `now`"""
+        candidate = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if candidate > now:
+            candidate -= timedelta(days=1)
+        return candidate
+
+    def next(self, now: datetime) -> datetime:
+        """First scheduled time strictly after `now`"""
+        return self.previous(now) + timedelta(days=1)
+
+    def __str__(self):
+        return f"daily at {self.at}"
+
+
+class WeeklyTrigger:
+    """Fires once a week on a given weekday at a fixed local time"""
+
+    def __init__(self, weekday: str, at: str):
+        self.weekday = weekday.lower()
+        self.weekday_index = WEEKDAYS.index(self.weekday)
+        self.at = at
+        self.hour, self.minute = _parse_time_of_day(at)
+
+    def previous(self, now: datetime) -> datetime:
+        candidate = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        candidate -= timedelta(days=(now.weekday() - self.weekday_index) % 7)
+        if candidate > now:
+            candidate -= timedelta(days=7)
+        return candidate
+
+    def next(self, now: datetime) -> datetime:
+        return self.previous(now) + timedelta(days=7)
+
+    def __str__(self):
+        return f"every {self.weekday.title()} at {self.at}"
+
+
+class IntervalTrigger:
+    """Fires at a fixed interval measured from the previous run"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def previous(self, now: datetime, last_run: Optional[datetime] = None) -> datetime:
+        if last_run is None:
+            return now
+        return last_run + timedelta(seconds=self.seconds)
+
+    def next(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=self.seconds)
+
+    def __str__(self):
+        return f"every {self.seconds:g}s"
+
+
+class Job:
+    """A scheduled callable plus its run state and timing metrics"""
+
+    def __init__(self, name: str, func: Callable[[], None], trigger, catch_up: bool = True):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.catch_up = catch_up
+
+        self.running = False
+        self.next_run: Optional[datetime] = None
+        self.last_run: Optional[datetime] = None
+
+        self.run_count = 0
+        self.failure_count = 0
+        self.skipped_overlaps = 0
+        self.last_duration: Optional[float] = None
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.last_error: Optional[str] = None
+
+    @property
+    def average_duration(self) -> Optional[float]:
+        if self.run_count == 0:
+            return None
+        return self.total_duration / self.run_count
+
+    def metrics(self) -> Dict:
+        return {
+            "job": self.name,
+            "schedule": str(self.trigger),
+            "running": self.running,
+            "next_run": self.next_run,
+            "last_run": self.last_run,
+            "runs": self.run_count,
+            "failures": self.failure_count,
+            "skipped_overlaps": self.skipped_overlaps,
+            "last_duration_s": self.last_duration,
+            "avg_duration_s": self.average_duration,
+            "max_duration_s": self.max_duration,
+            "last_error": self.last_error
+        }
+
+
+class JobScheduler:
+    """
+    Runs jobs from a heap ordered by due time on a thread pool.
+
+    A job that is still running when it comes due again is skipped for that
+    slot rather than started twice. Last-run times are stored in SQLite so a
+    restarted scheduler runs any job whose most recent slot was missed.
+    """
+
+    def __init__(self, db_path: str = "earthquake_notifications.db", max_workers: int = 4):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.jobs: Dict[str, Job] = {}
+
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+        self.init_database()
+
+    def init_database(self):
+        """Create the table that persists job run state"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS scheduler_job_state (
+                job_name TEXT PRIMARY KEY,
+                last_run_at TIMESTAMP,
+                last_duration REAL,
+                last_status TEXT,
+                run_count INTEGER DEFAULT 0,
+                failure_count INTEGER DEFAULT 0,
+                total_duration REAL DEFAULT 0,
+                max_duration REAL DEFAULT 0
+            )
+        ''')
+        # Duration totals were added after the table first shipped; averages
+        # span every persisted run, so the total is persisted with the count
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(scheduler_job_state)')]
+        for column in ("total_duration", "max_duration"):
+            if column not in columns:
+                conn.execute(f'ALTER TABLE scheduler_job_state ADD COLUMN {column} REAL DEFAULT 0')
+        conn.commit()
+        conn.close()
+
+    def _load_state(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute('''
+            SELECT job_name, last_run_at, last_duration, run_count, failure_count,
+                   total_duration, max_duration
+            FROM scheduler_job_state
+        ''').fetchall()
+        conn.close()
+
+        for (name, last_run_at, last_duration, run_count, failure_count,
+             total_duration, max_duration) in rows:
+            job = self.jobs.get(name)
+            if job is None:
+                continue
+            job.last_run = datetime.fromisoformat(last_run_at) if last_run_at else None
+            job.run_count = run_count or 0
+            job.failure_count = failure_count or 0
+            job.last_duration = last_duration
+            job.max_duration = max_duration or last_duration or 0.0
+            # Rows written before durations were persisted: assume earlier
+            # runs took as long as the last one
+            if total_duration is None or (total_duration == 0 and job.run_count and last_duration):
+                total_duration = (last_duration or 0.0) * job.run_count
+            job.total_duration = total_duration
+
+    def _save_state(self, job: Job, status: str):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            INSERT INTO scheduler_job_state
+            (job_name, last_run_at, last_duration, last_status, run_count, failure_count,
+             total_duration, max_duration)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(job_name) DO UPDATE SET
+                last_run_at = excluded.last_run_at,
+                last_duration = excluded.last_duration,
+                last_status = excluded.last_status,
+                run_count = excluded.run_count,
+                failure_count = excluded.failure_count,
+                total_duration = excluded.total_duration,
+                max_duration = excluded.max_duration
+        ''', (job.name, job.last_run.isoformat(), job.last_duration, status,
+              job.run_count, job.failure_count, job.total_duration, job.max_duration))
+        conn.commit()
+        conn.close()
+
+    def add_job(self, name: str, func: Callable[[], None], trigger, catch_up: bool = True) -> Job:
+        """Register (or replace) a job"""
+        job = Job(name, func, trigger, catch_up)
+        with self._condition:
+            self.jobs[name] = job
+            if self._thread is not None:
+                self._schedule(job, self._first_run(job, datetime.now()))
+        return job
+
+    def _first_run(self, job: Job, now: datetime) -> datetime:
+        """Due time on startup: now if a slot was missed, else the next slot"""
+        if isinstance(job.trigger, IntervalTrigger):
+            due = job.trigger.previous(now, job.last_run)
+            return due if job.catch_up or job.last_run is None else max(due, now)
+
+        if job.catch_up and job.last_run is not None and job.last_run < job.trigger.previous(now):
+            logger.info(f"Job '{job.name}' missed its {job.trigger.previous(now)} run; catching up")
+            return now
+        return job.trigger.next(now)
+
+    def _schedule(self, job: Job, due: datetime):
+        job.next_run = due
+        heapq.heappush(self._heap, (due, next(self._counter), job.name))
+        self._condition.notify()
+
+    def start(self):
+        """Load persisted state and start dispatching in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._load_state()
+        self._stopped.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="scheduler-job")
+
+        now = datetime.now()
+        with self._condition:
+            self._heap = []
+            for job in self.jobs.values():
+                self._schedule(job, self._first_run(job, now))
+
+        self._thread = threading.Thread(target=self._loop, name="job-scheduler", daemon=True)
+        self._thread.start()
+
+        for job in self.jobs.values():
+            logger.info(f"- {job.name}: {job.trigger} (next run {job.next_run:%Y-%m-%d %H:%M})")
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            with self._condition:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                due, _, name = self._heap[0]
+                delay = (due - datetime.now()).total_seconds()
+                if delay > 0:
+                    self._condition.wait(timeout=min(delay, 60))
+                    continue
+
+                heapq.heappop(self._heap)
+                job = self.jobs.get(name)
+                if job is None or job.next_run != due:
+                    continue
+                self._schedule(job, job.trigger.next(datetime.now()))
+
+            self._dispatch(job)
+
+    def _dispatch(self, job: Job):
+        with self._condition:
+            if job.running:
+                job.skipped_overlaps += 1
+                logger.warning(f"Job '{job.name}' is still running; skipping this slot")
+                return
+            job.running = True
+        self._executor.submit(self._execute, job)
+
+    def _execute(self, job: Job):
+        started_at = datetime.now()
+        start = time.perf_counter()
+        status = "success"
+
+        try:
+            job.func()
+            job.last_error = None
+        except Exception as e:
+            status = "failed"
+            job.failure_count += 1
+            job.last_error = str(e)
+            logger.error(f"Job '{job.name}' failed: {e}")
+        finally:
+            duration = time.perf_counter() - start
+            job.run_count += 1
+            job.last_run = started_at
+            job.last_duration = duration
+            job.total_duration += duration
+            job.max_duration = max(job.max_duration, duration)
+
+            with self._condition:
+                job.running = False
+
+            logger.info(f"Job '{job.name}' finished ({status}) in {duration:.2f}s")
+            try:
+                self._save_state(job, status)
+            except Exception as e:
+                logger.error(f"Could not persist state for job '{job.name}': {e}")
+
+    def run_now(self, name: str):
+        """Trigger a job immediately, respecting the no-overlap rule"""
+        self._dispatch(self.jobs[name])
+
+    def get_metrics(self) -> Dict[str, Dict]:
+        """Timing and status metrics for every job"""
+        return {name: job.metrics() for name, job in self.jobs.items()}
+
+    def run_forever(self):
+        """Start the scheduler and block until stopped or interrupted"""
+        self.start()
+        try:
+            while not self._stopped.wait(timeout=1):
+                pass
+        except KeyboardInterrupt:
+            logger.info("Scheduler stopped by user")
+        finally:
+            self.stop()
+
+    def stop(self, wait: bool = True):
+        """Stop dispatching; optionally wait for running jobs to finish"""
+        self._stopped.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,142 @@
+"""
+Map Aggregation Pyramid
+Bins event coordinates into a square lat/lon grid pyramid, one level per
+map zoom, so maps send aggregated cells (count, centroid, magnitude stats,
+dominant category) when a view holds more points than the browser should
+draw, and raw points once the view is zoomed in far enough.
+
+Cell coordinates are computed once at the finest level; each coarser level
+halves the resolution, so its cells are the finest ones shifted right.
+"""
+
+import math
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple, Union
+
+# Map zoom of the finest level; mapbox shows streets around zoom 14
+MAX_ZOOM = 14
+
+# On-screen width of one cell, in pixels of a 256-px map tile
+CELL_PIXELS = 12
+
+# Views with at most this many points are drawn as raw points
+MAX_RAW_POINTS = 5000
+
+Rows = Union[slice, np.ndarray, None]
+Bounds = Tuple[float, float, float, float]  # (min_lat, max_lat, min_lon, max_lon)
+
+
+def cell_degrees(zoom: int, cell_pixels: int = CELL_PIXELS) -> float:
+    """Cell edge length in degrees at a map zoom (360 degrees = 256 * 2**zoom px)"""
+    return 360.0 / (2 ** zoom) * cell_pixels / 256.0
+
+
+def viewport_bounds(center_lat: float, center_lon: float, zoom: float,
+                    width_px: int = 1000, height_px: int = 700) -> Bounds:
+    """Approximate (min_lat, max_lat, min_lon, max_lon) visible in a mapbox view"""
+    degrees_per_px = 360.0 / (256.0 * 2 ** zoom)
+    half_lon = width_px / 2 * degrees_per_px
+    # Web Mercator stretches latitude by 1 / cos(lat)
+    half_lat = height_px / 2 * degrees_per_px * math.cos(math.radians(center_lat))
+    return (center_lat - half_lat, center_lat + half_lat,
+            center_lon - half_lon, center_lon + half_lon)
+
+
+class MapPyramid:
+    """
+    Grid pyramid over the rows of `frame`.
+
+    `rows` arguments select a subset of the frame by position (a slice or
+    an index array, e.g. from `CatalogIndex.positions`), so one pyramid
+    serves every filtered view of the same frame.
+    """
+
+    def __init__(self, frame: pd.DataFrame, lat_column: str = "latitude",
+                 lon_column: str = "longitude", max_zoom: int = MAX_ZOOM,
+                 cell_pixels: int = CELL_PIXELS):
+        self.frame = frame
+        self.lat_column = lat_column
+        self.lon_column = lon_column
+        self.max_zoom = max_zoom
+        self.cell_pixels = cell_pixels
+
+        self.lat = frame[lat_column].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.lon = frame[lon_column].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.valid = ~(np.isnan(self.lat) | np.isnan(self.lon))
+
+        finest = cell_degrees(max_zoom, cell_pixels)
+        with np.errstate(invalid="ignore"):
+            self.cell_x = np.floor((np.nan_to_num(self.lon) + 180.0) / finest).astype(np.int64)
+            self.cell_y = np.floor((np.nan_to_num(self.lat) + 90.0) / finest).astype(np.int64)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def _positions(self, rows: Rows = None, bounds: Optional[Bounds] = None) -> np.ndarray:
+        """Row positions with coordinates, optionally restricted to `bounds`"""
+        if rows is None:
+            rows = slice(None)
+        positions = np.arange(len(self.frame))[rows]
+        keep = self.valid[positions]
+        if bounds is not None:
+            min_lat, max_lat, min_lon, max_lon = bounds
+            lat, lon = self.lat[positions], self.lon[positions]
+            keep &= (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+        return positions[keep]
+
+    def cell_keys(self, zoom: int, positions: np.ndarray) -> np.ndarray:
+        """int64 cell id of each row at `zoom`"""
+        shift = self.max_zoom - min(max(int(zoom), 0), self.max_zoom)
+        return ((self.cell_x[positions] >> shift) << 32) | (self.cell_y[positions] >> shift)
+
+    def aggregate(self, zoom: int, rows: Rows = None, bounds: Optional[Bounds] = None,
+                  value_column: Optional[str] = None,
+                  category_column: Optional[str] = None) -> pd.DataFrame:
+        """
+        One row per occupied cell at `zoom`: the centroid of its events under
+        the frame's lat/lon column names, `count`, and for `value_column`
+        its mean (same name), `<value>_max` and `<value>_sum`. With
+        `category_column`, the cell's most common category (same name).
+        """
+        positions = self._positions(rows, bounds)
+        cells = pd.DataFrame({
+            "cell": self.cell_keys(zoom, positions),
+            self.lat_column: self.lat[positions],
+            self.lon_column: self.lon[positions]
+        })
+        spec = {
+            self.lat_column: (self.lat_column, "mean"),
+            self.lon_column: (self.lon_column, "mean"),
+            "count": (self.lat_column, "size")
+        }
+        if value_column:
+            cells[value_column] = self.frame[value_column].to_numpy(
+                dtype=np.float64, na_value=np.nan)[positions]
+            spec[value_column] = (value_column, "mean")
+            spec[f"{value_column}_max"] = (value_column, "max")
+            spec[f"{value_column}_sum"] = (value_column, "sum")
+        grouped = cells.groupby("cell", sort=False).agg(**spec)
+
+        if category_column:
+            categories = self.frame[category_column].to_numpy()[positions]
+            counts = (pd.DataFrame({"cell": cells["cell"], category_column: categories})
+                      .groupby(["cell", category_column], sort=False, observed=True).size())
+            dominant = counts.sort_values(ascending=False, kind="stable").reset_index()
+            dominant = dominant.drop_duplicates("cell").set_index("cell")[category_column]
+            grouped[category_column] = dominant.reindex(grouped.index)
+
+        return grouped.reset_index(drop=True)
+
+    def view(self, zoom: int, rows: Rows = None, bounds: Optional[Bounds] = None,
+             max_points: int = MAX_RAW_POINTS, value_column: Optional[str] = None,
+             category_column: Optional[str] = None) -> Tuple[pd.DataFrame, bool]:
+        """
+        Data for a map at `zoom` showing `bounds`: the raw rows when at most
+        `max_points` fall in view, otherwise `aggregate` cells. Returns the
+        frame and whether it is aggregated.
+        """
+        positions = self._positions(rows, bounds)
+        if len(positions) <= max_points:
+            return self.frame.iloc[positions], False
+        return self.aggregate(zoom, positions, None, value_column, category_column), True
@@ -0,0 +1,282 @@
+"""
+Notification Message Templates
+Precompiled, per-language message templates with a render cache so each
+prediction is rendered once per (message fields, message type, language)
+and its SMS form and segment count are worked out once rather than per send.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Tuple
+
+DEFAULT_LANGUAGE = "en"
+
+# Longest SMS we send; carriers and Twilio cap concatenated messages at 10 parts
+MAX_SMS_SEGMENTS = 10
+
+# GSM 03.38 basic character set (plus the extension table, which costs 2 septets)
+GSM7_BASIC = set(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+GSM7_EXTENDED = set("^{}\\[~]|€")
+
+TEMPLATES = {
+    "en": {
+        "live_event": """
+🚨 *EARTHQUAKE DETECTED*
+
+{urgency_emoji} *Magnitude {magnitude:.1f}* - {place}
+🕒 *Time*: {date_str}
+📍 *Region*: {regional_zone}, {region}
+📍 *Coordinates*: {lat:.2f}°N, {lng:.2f}°E
+
+⚠️ *Safety Actions*:
+• Drop, cover and hold on during aftershocks
+• Check for injuries and structural damage
+• Follow instructions from local authorities
+
+Source: USGS real-time feed
+🌍 Bhukamp - Earthquake Forecasting for India
+""",
+        "daily_summary": """
+🌍 *Bhukamp Daily Earthquake Forecast - {date_str}*
+
+{urgency_emoji} *{risk} Risk Prediction*
+📍 *Location*: {regional_zone}, {region}
+📊 *Magnitude*: {magnitude:.1f}
+🎯 *Probability*: {probability:.1f}%
+🤖 *Model*: {model}
+📍 *Coordinates*: {lat:.2f}°N, {lng:.2f}°E
+
+*About Bhukamp*: AI-powered earthquake forecasting for India using PINN and Random Forest models.
+
+⚠️ *Disclaimer*: This is a prediction based on AI models. Maintain earthquake preparedness always.
+
+Stay safe! 🙏
+Team Bhukamp
+""",
+        "alert": """
+🚨 *EARTHQUAKE PREDICTION ALERT*
+
+{urgency_emoji} *{risk} Risk Earthquake Predicted*
+📅 *Date*: {date_str}
+📍 *Region*: {regional_zone}, {region}
+📊 *Magnitude*: {magnitude:.1f}
+🎯 *Probability*: {probability:.1f}%
+🤖 *Model*: {model}
+
+📍 *Coordinates*: {lat:.2f}°N, {lng:.2f}°E
+
+⚠️ *Preparedness Recommendations*:
+• Keep emergency kit ready
+• Review evacuation plans
+• Stay informed through official channels
+
+*This is an AI prediction - maintain general earthquake preparedness.*
+
+🌍 Bhukamp - Earthquake Forecasting for India
+"""
+    },
+    "hi": {
+        "live_event": """
+🚨 *भूकंप दर्ज किया गया*
+
+{urgency_emoji} *परिमाण {magnitude:.1f}* - {place}
+🕒 *समय*: {date_str}
+📍 *क्षेत्र*: {regional_zone}, {region}
+📍 *निर्देशांक*: {lat:.2f}°N, {lng:.2f}°E
+
+⚠️ *सुरक्षा उपाय*:
+• आफ्टरशॉक के दौरान झुकें, ढकें और पकड़ें
+• चोटों और इमारत को हुए नुकसान की जांच करें
+• स्थानीय अधिकारियों के निर्देशों का पालन करें
+
+स्रोत: USGS रीयल-टाइम फ़ीड
+🌍 भूकंप - भारत के लिए भूकंप पूर्वानुमान
+""",
+        "daily_summary": """
+🌍 *भूकंप दैनिक पूर्वानुमान - {date_str}*
+
+{urgency_emoji} *{risk} जोखिम पूर्वानुमान*
+📍 *स्थान*: {regional_zone}, {region}
+📊 *परिमाण*: {magnitude:.1f}
+🎯 *संभावना*: {probability:.1f}%
+🤖 *मॉडल*: {model}
+📍 *निर्देशांक*: {lat:.2f}°N, {lng:.2f}°E
+
+*भूकंप के बारे में*: PINN और Random Forest मॉडल पर आधारित भारत के लिए AI भूकंप पूर्वानुमान।
+
+⚠️ *अस्वीकरण*: यह AI मॉडल पर आधारित पूर्वानुमान है। भूकंप की तैयारी हमेशा बनाए रखें।
+
+सुरक्षित रहें! 🙏
+टीम भूकंप
+""",
+        "alert": """
+🚨 *भूकंप पूर्वानुमान चेतावनी*
+
+{urgency_emoji} *{risk} जोखिम भूकंप का पूर्वानुमान*
+📅 *तारीख*: {date_str}
+📍 *क्षेत्र*: {regional_zone}, {region}
+📊 *परिमाण*: {magnitude:.1f}
+🎯 *संभावना*: {probability:.1f}%
+🤖 *मॉडल*: {model}
+
+📍 *निर्देशांक*: {lat:.2f}°N, {lng:.2f}°E
+
+⚠️ *तैयारी के सुझाव*:
+• आपातकालीन किट तैयार रखें
+• निकासी योजना की समीक्षा करें
+• आधिकारिक स्रोतों से जानकारी लेते रहें
+
+*यह AI पूर्वानुमान है - भूकंप की सामान्य तैयारी बनाए रखें।*
+
+🌍 भूकंप - भारत के लिए भूकंप पूर्वानुमान
+"""
+    }
+}
+
+SUPPORTED_LANGUAGES = {
+    "en": "English",
+    "hi": "हिंदी"
+}
+
+# Bound `str.format` methods of the stripped templates, built once at import
+COMPILED_TEMPLATES = {
+    language: {kind: template.strip().format for kind, template in templates.items()}
+    for language, templates in TEMPLATES.items()
+}
+
+
+class RenderedMessage(NamedTuple):
+    """A rendered notification in its WhatsApp and SMS forms"""
+    text: str
+    sms_text: str
+    sms_encoding: str  # 'GSM-7' or 'UCS-2'
+    sms_segments: int
+
+
+def sms_length(text: str) -> Tuple[str, int]:
+    """Encoding and length in encoding units (septets or UTF-16 code units)"""
+    if all(ch in GSM7_BASIC or ch in GSM7_EXTENDED for ch in text):
+        return "GSM-7", sum(2 if ch in GSM7_EXTENDED else 1 for ch in text)
+    return "UCS-2", len(text.encode("utf-16-le")) // 2
+
+
+def sms_segment_limits(encoding: str) -> Tuple[int, int]:
+    """(single-part limit, per-part limit when concatenated)"""
+    return (160, 153) if encoding == "GSM-7" else (70, 67)
+
+
+def count_sms_segments(text: str) -> Tuple[str, int]:
+    encoding, length = sms_length(text)
+    single, multi = sms_segment_limits(encoding)
+    if length <= single:
+        return encoding, 1
+    return encoding, -(-length // multi)
+
+
+def fit_sms(text: str, max_segments: int = MAX_SMS_SEGMENTS) -> Tuple[str, str, int]:
+    """Drop WhatsApp markup and trim whole lines until the text fits max_segments"""
+    sms_text = text.replace("*", "")
+    encoding, segments = count_sms_segments(sms_text)
+    if segments <= max_segments:
+        return sms_text, encoding, segments
+
+    _, multi = sms_segment_limits(encoding)
+    budget = multi * max_segments - 3
+    lines = sms_text.split("\n")
+    while lines and sms_length("\n".join(lines))[1] > budget:
+        lines.pop()
+    sms_text = "\n".join(lines).rstrip() + "..."
+    encoding, segments = count_sms_segments(sms_text)
+    return sms_text, encoding, segments
+
+
+def prepare_message(text: str) -> RenderedMessage:
+    """Wrap already-rendered text with its precomputed SMS form"""
+    sms_text, encoding, segments = fit_sms(text)
+    return RenderedMessage(text, sms_text, encoding, segments)
+
+
+def prediction_key(earthquake_data: Dict) -> Tuple:
+    """Stable identity of a prediction or live event for caching"""
+    if earthquake_data.get('event_id'):
+        return ('event', earthquake_data['event_id'])
+    return (str(earthquake_data['prediction_date']),
+            round(float(earthquake_data['latitude']), 4),
+            round(float(earthquake_data['longitude']), 4),
+            earthquake_data.get('model_type'))
+
+
+def _urgency_emoji(magnitude: float) -> str:
+    if magnitude >= 6.0:
+        return "🚨🚨🚨"
+    elif magnitude >= 5.0:
+        return "⚠️⚠️"
+    return "⚡"
+
+
+class MessageRenderer:
+    """
+    LRU cache of rendered messages keyed on (type, language, template
+    fields). The key holds every value that reaches the text, so a
+    prediction whose magnitude, zone, risk or probability changed (or a
+    test message reusing a prediction's date and coordinates) renders anew.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple, RenderedMessage]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, earthquake_data: Dict, notification_type: str = "alert",
+               language: str = DEFAULT_LANGUAGE) -> RenderedMessage:
+        if language not in COMPILED_TEMPLATES:
+            language = DEFAULT_LANGUAGE
+        if notification_type not in COMPILED_TEMPLATES[language]:
+            notification_type = "alert"
+
+        fields = self._fields(earthquake_data)
+        key = (notification_type, language, tuple(sorted(fields.items())))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        rendered = prepare_message(COMPILED_TEMPLATES[language][notification_type](**fields))
+
+        with self._lock:
+            self._cache[key] = rendered
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return rendered
+
+    @staticmethod
+    def _fields(earthquake_data: Dict) -> Dict:
+        """Template fields for a prediction or live event"""
+        magnitude = earthquake_data['predicted_magnitude']
+        region = earthquake_data['region']
+        regional_zone = earthquake_data['regional_zone']
+        return dict(
+            date_str=earthquake_data['prediction_date'],
+            magnitude=magnitude,
+            probability=earthquake_data['earthquake_probability'] * 100,
+            region=region,
+            regional_zone=regional_zone,
+            model=earthquake_data['model_type'],
+            risk=earthquake_data['risk_category'],
+            lat=earthquake_data['latitude'],
+            lng=earthquake_data['longitude'],
+            place=earthquake_data.get('place') or f"{regional_zone}, {region}",
+            urgency_emoji=_urgency_emoji(magnitude)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,138 @@
+"""
+Notification Suppression Ledger
+Remembers which (subscriber, prediction, channel) combinations have already
+been delivered so repeated scheduler runs never resend the same alert.
+Lookups hit an in-memory hash set warmed from an indexed SQLite table.
+"""
+
+import sqlite3
+import threading
+import logging
+from typing import Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def ledger_key(prediction_key: Tuple) -> str:
+    """Flatten a prediction identity tuple into the string stored in the ledger"""
+    return "|".join(str(part) for part in prediction_key)
+
+
+class SuppressionLedger:
+    """
+    Set of delivered (subscriber_id, prediction_key, channel) entries.
+
+    `seen` is an O(1) set lookup; `record` writes through to the
+    `notification_ledger` table so the set can be rebuilt on restart.
+    Entries older than `retention_days` are not loaded and are pruned,
+    since predictions that old are never sent again.
+    """
+
+    def __init__(self, db_path: str, retention_days: int = 60):
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self._entries = set()
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+        self.init_database()
+        self.warm()
+
+    def init_database(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS notification_ledger (
+                subscriber_id INTEGER NOT NULL,
+                prediction_key TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (subscriber_id, prediction_key, channel)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_notification_ledger_sent_at
+            ON notification_ledger (sent_at)
+        ''')
+        conn.commit()
+        conn.close()
+
+    def warm(self):
+        """Load recent ledger entries into memory, pruning expired ones"""
+        cutoff = f"-{int(self.retention_days)} days"
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DELETE FROM notification_ledger WHERE sent_at < datetime('now', ?)", (cutoff,))
+        rows = conn.execute('''
+            SELECT subscriber_id, prediction_key, channel FROM notification_ledger
+        ''').fetchall()
+        conn.commit()
+        conn.close()
+
+        with self._lock:
+            self._entries = set(rows)
+        logger.info(f"Suppression ledger warmed with {len(rows)} entries")
+
+    def seen(self, subscriber_id: int, prediction_key: str, channel: str) -> bool:
+        with self._lock:
+            return (subscriber_id, prediction_key, channel) in self._entries
+
+    def filter_unsent(self, subscriber_id: int, prediction_key: str,
+                      channels: Iterable[str]) -> list:
+        """Channels that have not yet delivered this prediction to the subscriber"""
+        channels = list(channels)
+        with self._lock:
+            unsent = [c for c in channels
+                      if (subscriber_id, prediction_key, c) not in self._entries]
+            self.suppressed += len(channels) - len(unsent)
+        return unsent
+
+    def record(self, entries: Iterable[Tuple[int, str, str]]):
+        """Mark (subscriber_id, prediction_key, channel) entries as delivered"""
+        entries = [tuple(entry) for entry in entries]
+        if not entries:
+            return
+
+        self.remember(entries)
+        conn = sqlite3.connect(self.db_path)
+        self.write(conn, entries)
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def write(conn: sqlite3.Connection, entries: Iterable[Tuple[int, str, str]]):
+        """Insert entries on the caller's connection (the caller commits, then calls remember)"""
+        conn.executemany('''
+            INSERT OR IGNORE INTO notification_ledger (subscriber_id, prediction_key, channel)
+            VALUES (?, ?, ?)
+        ''', entries)
+
+    def remember(self, entries: Iterable[Tuple[int, str, str]]):
+        with self._lock:
+            self._entries.update(tuple(entry) for entry in entries)
+
+    def sync(self, pairs: Iterable[Tuple[int, str]]):
+        """
+        Load entries for the given (subscriber_id, prediction_key) pairs from
+        the database, picking up deliveries recorded by other processes.
+        """
+        pairs = list(dict.fromkeys(pairs))
+        if not pairs:
+            return
+
+        conn = sqlite3.connect(self.db_path)
+        rows = []
+        # Row-value IN lists, kept well under SQLite's bound-parameter limit
+        for start in range(0, len(pairs), 400):
+            chunk = pairs[start:start + 400]
+            placeholders = ",".join(["(?, ?)"] * len(chunk))
+            rows.extend(conn.execute(f'''
+                SELECT subscriber_id, prediction_key, channel FROM notification_ledger
+                WHERE (subscriber_id, prediction_key) IN (VALUES {placeholders})
+            ''', [value for pair in chunk for value in pair]).fetchall())
+        conn.close()
+
+        with self._lock:
+            self._entries.update(rows)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,204 @@
+"""
+Notification Dispatch Load Test
+Seeds N subscribers and M same-day predictions into a temporary database,
+runs `process_daily_notifications` end to end against the local provider
+simulator, and reports delivered messages/s, provider latency percentiles
+and the cost of the history/ledger writes.
+
+    python notification_load_test.py --subscribers 2000 --predictions 3 --latency-ms 40
+    python notification_load_test.py --json --min-throughput 200   # CI gate
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from typing import Dict
+
+import pandas as pd
+
+from provider_simulator import ProviderSimulator, SimulatedProvider
+
+ZONES = ["Himalayan", "Central", "South", "West", "East"]
+
+
+def seed_subscribers(db_path: str, count: int, method: str) -> Dict:
+    import subscriber_bulk
+
+    subscribers = pd.DataFrame({
+        "name": [f"Load Test {i}" for i in range(count)],
+        "phone_number": [f"9{i:09d}" for i in range(count)],
+        "preferred_method": method,
+        "min_magnitude": 4.0,
+        "regions": ";".join(ZONES),
+        "notification_types": "high_risk;medium_risk;daily_summary"
+    })
+    return subscriber_bulk.import_subscribers(subscribers, db_path)
+
+
+def write_predictions(path: str, count: int, target_date: date):
+    rng = random.Random(42)
+    rows = []
+    for i in range(count):
+        rows.append({
+            "prediction_date": target_date.isoformat(),
+            "latitude": round(rng.uniform(8, 35), 4),
+            "longitude": round(rng.uniform(68, 97), 4),
+            "depth": round(rng.uniform(5, 60), 2),
+            "predicted_magnitude": round(rng.uniform(4.5, 6.5), 1),
+            "earthquake_probability": round(rng.uniform(0.3, 0.9), 3),
+            "risk_category": "High",
+            "prediction_confidence": 0.8,
+            "regional_zone": ZONES[i % len(ZONES)],
+            "model_type": "LoadTest",
+            "region": "India"
+        })
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+class WriteTimer:
+    """Accumulates wall time spent in wrapped database-writing methods"""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def wrap(self, method):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.seconds += time.perf_counter() - started
+                    self.calls += 1
+        return timed
+
+
+def run_load_test(args) -> Dict:
+    from earthquake_notifications import EarthquakeNotificationSystem
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    # The database and its WAL files live in a scratch directory that is
+    # removed afterwards; the cwd moves there for relative paths in the system
+    workdir = tempfile.mkdtemp(prefix="notification_load_test_")
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        db_path = os.path.join(workdir, "load_test.db")
+        predictions_path = os.path.join(workdir, "predictions.csv")
+        target_date = date.today()
+
+        system = EarthquakeNotificationSystem(db_path)
+        seeded = seed_subscribers(db_path, args.subscribers, args.method)
+        write_predictions(predictions_path, args.predictions, target_date)
+        system.prediction_files = [predictions_path]
+        system.catalog_file = os.path.join(workdir, "missing.csv")
+
+        def provider():
+            return SimulatedProvider(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit)
+
+        with ProviderSimulator(ultramsg=provider(), textbelt=provider()) as simulator:
+            system.provider_urls = {"ultramsg": simulator.base_url, "textbelt": simulator.base_url}
+            system.configure_whatsapp_api("ultramsg", token="load-test", instance_id="instance1")
+            system.configure_sms_api("textbelt", api_key="load-test")
+            system.dispatch_workers = args.workers
+
+            writes = WriteTimer()
+            system._log_notification = writes.wrap(system._log_notification)
+
+            db_bytes_before = os.path.getsize(db_path)
+            started = time.perf_counter()
+            system.process_daily_notifications(target_date)
+            elapsed = time.perf_counter() - started
+            server_counts = simulator.counts
+
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT status, COUNT(*) FROM sent_notifications GROUP BY status").fetchall()
+        conn.close()
+        logged = dict(rows)
+        delivered = logged.get("sent", 0)
+        total_rows = sum(logged.values())
+        db_growth = os.path.getsize(db_path) - db_bytes_before
+
+        return {
+            "subscribers": seeded["upserted"],
+            "predictions": args.predictions,
+            "method": args.method,
+            "workers": args.workers,
+            "elapsed_s": round(elapsed, 3),
+            "delivered": delivered,
+            "failed": logged.get("failed", 0),
+            "messages_per_s": round(delivered / elapsed, 1) if elapsed else None,
+            "providers": system.provider_health.snapshot(),
+            "simulator": server_counts,
+            "db_writes": {
+                "rows": total_rows,
+                "calls": writes.calls,
+                "seconds": round(writes.seconds, 3),
+                "ms_per_row": round(writes.seconds * 1000 / total_rows, 3) if total_rows else None,
+                "bytes_per_row": round(db_growth / total_rows, 1) if total_rows else None
+            }
+        }
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def print_report(report: Dict):
+    print(f"Subscribers: {report['subscribers']:,}  Predictions: {report['predictions']}  "
+          f"Method: {report['method']}  Workers: {report['workers']}")
+    print(f"Delivered {report['delivered']:,} messages ({report['failed']:,} failed) "
+          f"in {report['elapsed_s']:.2f}s -> {report['messages_per_s']} msg/s")
+    for health in report["providers"]:
+        print(f"  {health['provider']:<18} state={health['state']:<9} "
+              f"limit={health['concurrency_limit']:<3} p50={health['p50_ms']}ms "
+              f"p99={health['p99_ms']}ms sent={health['sent']} failed={health['failed']} "
+              f"throttled={health['throttled']} rejected={health['rejected']}")
+    writes = report["db_writes"]
+    print(f"DB writes: {writes['rows']:,} rows, {writes['seconds']:.2f}s in "
+          f"{writes['calls']:,} calls ({writes['ms_per_row']} ms/row, "
+          f"{writes['bytes_per_row']} bytes/row)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark notification dispatch end to end")
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--predictions", type=int, default=2)
+    parser.add_argument("--method", choices=["whatsapp", "sms", "both"], default="both")
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="simulated requests per second per provider")
+    parser.add_argument("--min-throughput", type=float, default=None,
+                        help="exit with status 1 if messages/s falls below this")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep per-message INFO logs")
+    args = parser.parse_args()
+
+    report = run_load_test(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.min_throughput is not None and (report["messages_per_s"] or 0) < args.min_throughput:
+        print(f"Throughput {report['messages_per_s']} msg/s is below {args.min_throughput}",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Notification Work Queue
+Sends are enqueued as (subscriber, prediction, notification type) rows and
+drained by any number of sender processes. Workers claim batches under a
+time-limited lease that the worker renews while it is still sending, so a
+crashed worker's items become claimable again once the lease expires.
+Finished items are deleted, failed ones are retried with exponential
+backoff and moved to a dead-letter table after `max_attempts`; deferred
+ones (the provider was not taking calls) are retried without using up an
+attempt.
+
+The queue lives in the notifications SQLite file, next to the subscribers,
+history and delivery ledger the workers read.
+"""
+
+import json
+import sqlite3
+import time
+import logging
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+from notification_retention import PayloadStore
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = 300
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF_SECONDS = 30
+
+# (subscriber_id, prediction_key, notification_type, payload JSON)
+QueueEntry = Tuple[int, str, str, str]
+
+# How a claimed item is settled (see SQLiteWorkQueue.complete)
+DONE, RETRY, DEFER = "done", "retry", "defer"
+
+
+class QueueItem(NamedTuple):
+    id: int
+    subscriber_id: int
+    prediction_key: str
+    notification_type: str
+    attempts: int
+    earthquake_data: Dict
+
+
+def init_queue_tables(conn: sqlite3.Connection):
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notification_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subscriber_id INTEGER NOT NULL,
+            prediction_key TEXT NOT NULL,
+            notification_type TEXT NOT NULL,
+            payload_id INTEGER NOT NULL REFERENCES notification_payloads (id),
+            status TEXT NOT NULL DEFAULT 'pending',  -- 'pending', 'leased'
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at REAL NOT NULL,  -- unix time the item may next be claimed
+            lease_owner TEXT,
+            lease_expires_at REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (subscriber_id, prediction_key, notification_type)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notification_queue_dead (
+            id INTEGER PRIMARY KEY,
+            subscriber_id INTEGER NOT NULL,
+            prediction_key TEXT NOT NULL,
+            notification_type TEXT NOT NULL,
+            payload_id INTEGER,
+            attempts INTEGER,
+            failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _retry_delay(attempts: int, backoff: float) -> float:
+    return backoff * 2 ** max(0, attempts - 1)
+
+
+class SQLiteWorkQueue:
+    """Work queue stored in the notifications SQLite database"""
+
+    def __init__(self, db_path: str, payload_store: PayloadStore,
+                 lease_seconds: float = LEASE_SECONDS, max_attempts: int = MAX_ATTEMPTS,
+                 retry_backoff: float = RETRY_BACKOFF_SECONDS):
+        self.db_path = db_path
+        self.payload_store = payload_store
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit, so claims can take the write lock up front with BEGIN IMMEDIATE
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def enqueue(self, entries: Iterable[QueueEntry], batch_size: int = 10_000) -> int:
+        """Add entries, ignoring ones already queued; returns the number added"""
+        conn = self._connect()
+        added = 0
+        payload_ids: Dict[str, int] = {}
+        now = time.time()
+        try:
+            batch = []
+            for subscriber_id, key, notification_type, payload in entries:
+                if payload not in payload_ids:
+                    conn.execute('BEGIN IMMEDIATE')
+                    payload_ids[payload] = self.payload_store.get_id(conn, payload)
+                    conn.execute('COMMIT')
+                batch.append((subscriber_id, key, notification_type, payload_ids[payload], now))
+                if len(batch) >= batch_size:
+                    added += self._insert(conn, batch)
+                    batch = []
+            if batch:
+                added += self._insert(conn, batch)
+        finally:
+            conn.close()
+        return added
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, batch: List[tuple]) -> int:
+        before = conn.total_changes
+        conn.execute('BEGIN IMMEDIATE')
+        conn.executemany('''
+            INSERT OR IGNORE INTO notification_queue
+            (subscriber_id, prediction_key, notification_type, payload_id, available_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', batch)
+        conn.execute('COMMIT')
+        return conn.total_changes - before
+
+    def claim(self, worker_id: str, limit: int) -> List[QueueItem]:
+        """Lease up to `limit` ready items (pending, or leased with an expired lease)"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute('''
+                UPDATE notification_queue
+                SET status = 'leased', lease_owner = ?, lease_expires_at = ?,
+                    attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM notification_queue
+                    WHERE (status = 'pending' AND available_at <= ?)
+                       OR (status = 'leased' AND lease_expires_at < ?)
+                    ORDER BY id
+                    LIMIT ?
+                )
+                RETURNING id, subscriber_id, prediction_key, notification_type,
+                          attempts, payload_id
+            ''', (worker_id, now + self.lease_seconds, now, now, limit)).fetchall()
+            conn.execute('COMMIT')
+
+            payload_ids = sorted({row[5] for row in rows})
+            payloads = {}
+            if payload_ids:
+                placeholders = ",".join("?" * len(payload_ids))
+                payloads = dict(conn.execute(
+                    f'SELECT id, payload FROM notification_payloads WHERE id IN ({placeholders})',
+                    payload_ids
+                ).fetchall())
+        finally:
+            conn.close()
+
+        return [QueueItem(row[0], row[1], row[2], row[3], row[4], json.loads(payloads[row[5]]))
+                for row in sorted(rows)]
+
+    def renew(self, worker_id: str, items: Sequence[QueueItem]) -> int:
+        """Extend the lease on items this worker still holds; returns how many it holds"""
+        if not items:
+            return 0
+        expires = time.time() + self.lease_seconds
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            before = conn.total_changes
+            conn.executemany('''
+                UPDATE notification_queue SET lease_expires_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = 'leased'
+            ''', [(expires, item.id, worker_id) for item in items])
+            renewed = conn.total_changes - before
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        return renewed
+
+    def complete(self, worker_id: str, results: Iterable[Tuple[QueueItem, str]]):
+        """
+        Settle claimed items: DONE deletes the item, RETRY schedules a retry
+        (or dead-letters it) and DEFER puts it back after one backoff period
+        without counting the attempt. Items whose lease was taken over are
+        left alone.
+        """
+        now = time.time()
+        done, retry, dead = [], [], []
+        for item, outcome in results:
+            if outcome == DONE:
+                done.append((item.id, worker_id))
+            elif outcome == DEFER:
+                retry.append((now + self.retry_backoff, -1, item.id, worker_id))
+            elif item.attempts >= self.max_attempts:
+                dead.append((item.id, worker_id))
+            else:
+                delay = _retry_delay(item.attempts, self.retry_backoff)
+                retry.append((now + delay, 0, item.id, worker_id))
+
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany('DELETE FROM notification_queue WHERE id = ? AND lease_owner = ?', done)
+            conn.executemany('''
+                UPDATE notification_queue
+                SET status = 'pending', available_at = ?, attempts = attempts + ?,
+                    lease_owner = NULL, lease_expires_at = NULL
+                WHERE id = ? AND lease_owner = ?
+            ''', retry)
+            conn.executemany('''
+                INSERT OR REPLACE INTO notification_queue_dead
+                (id, subscriber_id, prediction_key, notification_type, payload_id, attempts)
+                SELECT id, subscriber_id, prediction_key, notification_type, payload_id, attempts
+                FROM notification_queue WHERE id = ? AND lease_owner = ?
+            ''', dead)
+            conn.executemany('DELETE FROM notification_queue WHERE id = ? AND lease_owner = ?', dead)
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+        if dead:
+            logger.warning(f"{len(dead)} queued notifications failed {self.max_attempts} times "
+                           f"and were moved to notification_queue_dead")
+
+    def outstanding(self) -> int:
+        """Items still pending or leased"""
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM notification_queue').fetchone()[0]
+        finally:
+            conn.close()
+
+
+def open_work_queue(db_path: str, payload_store: PayloadStore, **options) -> SQLiteWorkQueue:
+    """The work queue stored in `db_path`"""
+    return SQLiteWorkQueue(db_path, payload_store, **options)
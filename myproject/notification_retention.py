@@ -0,0 +1,277 @@
+"""
+Notification History Retention
+Keeps `sent_notifications` small: prediction payloads are stored once and
+referenced by id, rows older than the retention window are archived to
+compressed Parquet (their counts live on in the daily rollups), and freed
+pages are returned to the filesystem with incremental VACUUM.
+
+Databases created before retention existed need a one-off full VACUUM to
+switch to incremental auto_vacuum; run it while nothing else uses the file:
+
+    python notification_retention.py --enable-incremental-vacuum --db earthquake_notifications.db
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import logging
+import pandas as pd
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_BATCH_SIZE = 50_000
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def enable_incremental_vacuum(db_path: str, timeout: float = 30.0) -> bool:
+    """
+    Switch an existing database to incremental auto_vacuum. This is a full
+    VACUUM: it rewrites the file and needs exclusive access, so run it as a
+    migration while the app, scheduler and workers are stopped. Returns
+    False when the database already uses incremental mode.
+    """
+    conn = sqlite3.connect(db_path, timeout=timeout)
+    try:
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+            return False
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+    logger.info(f"{db_path} switched to incremental auto_vacuum")
+    return True
+
+
+def payload_hash(payload: str) -> str:
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def serialize_payload(earthquake_data: Dict) -> str:
+    """Canonical JSON so identical predictions share one payload row"""
+    return json.dumps(earthquake_data, sort_keys=True, default=str)
+
+
+def init_retention_tables(conn: sqlite3.Connection):
+    """Create payload/rollup tables and migrate sent_notifications to payload ids"""
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notification_payloads (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            payload_hash TEXT NOT NULL UNIQUE,
+            payload TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notification_daily_rollups (
+            day DATE NOT NULL,
+            notification_type TEXT NOT NULL,
+            status TEXT NOT NULL,
+            regional_zone TEXT NOT NULL DEFAULT '',
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, notification_type, status, regional_zone)
+        ) WITHOUT ROWID
+    ''')
+
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(sent_notifications)')]
+    if 'payload_id' not in columns:
+        cursor.execute('ALTER TABLE sent_notifications ADD COLUMN payload_id INTEGER '
+                       'REFERENCES notification_payloads (id)')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sent_notifications_payload
+        ON sent_notifications (payload_id)
+    ''')
+
+
+class PayloadStore:
+    """
+    Get-or-create payload ids, with a small in-memory cache of recent hashes.
+    Cached ids are checked against the table before use: another process (or
+    a retention run racing this one) may have pruned the row since.
+    """
+
+    def __init__(self, max_cached: int = 4096):
+        self.max_cached = max_cached
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_id(self, conn: sqlite3.Connection, payload: str) -> int:
+        digest = payload_hash(payload)
+        with self._lock:
+            payload_id = self._ids.get(digest)
+        if payload_id is not None:
+            # Primary-key probe; cheaper than re-inserting through the hash index
+            if conn.execute('SELECT 1 FROM notification_payloads WHERE id = ?',
+                            (payload_id,)).fetchone():
+                with self._lock:
+                    if digest in self._ids:
+                        self._ids.move_to_end(digest)
+                return payload_id
+            with self._lock:
+                self._ids.pop(digest, None)
+
+        conn.execute('INSERT OR IGNORE INTO notification_payloads (payload_hash, payload) '
+                     'VALUES (?, ?)', (digest, payload))
+        payload_id = conn.execute('SELECT id FROM notification_payloads WHERE payload_hash = ?',
+                                  (digest,)).fetchone()[0]
+
+        with self._lock:
+            self._ids[digest] = payload_id
+            if len(self._ids) > self.max_cached:
+                self._ids.popitem(last=False)
+        return payload_id
+
+    def forget(self):
+        """Drop cached ids (after payload rows may have been deleted)"""
+        with self._lock:
+            self._ids.clear()
+
+
+def compact_legacy_payloads(conn: sqlite3.Connection, store: PayloadStore,
+                            batch_size: int = 10_000) -> int:
+    """Move inline earthquake_data blobs from older rows into the payload table"""
+    moved = 0
+    while True:
+        rows = conn.execute('''
+            SELECT id, earthquake_data FROM sent_notifications
+            WHERE payload_id IS NULL AND earthquake_data IS NOT NULL
+            LIMIT ?
+        ''', (batch_size,)).fetchall()
+        if not rows:
+            break
+
+        with conn:
+            updates = []
+            for row_id, blob in rows:
+                try:
+                    payload = serialize_payload(json.loads(blob))
+                except (TypeError, ValueError):
+                    payload = blob
+                updates.append((store.get_id(conn, payload), row_id))
+            conn.executemany('UPDATE sent_notifications SET payload_id = ?, earthquake_data = NULL '
+                             'WHERE id = ?', updates)
+        moved += len(rows)
+    return moved
+
+
+def _write_archive(frame: pd.DataFrame, archive_dir: str) -> str:
+    """Write one batch to Parquet (zstd), or gzip CSV when pyarrow is missing"""
+    os.makedirs(archive_dir, exist_ok=True)
+    stem = os.path.join(archive_dir, f"sent_notifications_{frame['id'].min()}_{frame['id'].max()}")
+    try:
+        import pyarrow  # noqa: F401
+        path = stem + ".parquet"
+        frame.to_parquet(path, compression="zstd", index=False)
+    except ImportError:
+        path = stem + ".csv.gz"
+        frame.to_csv(path, compression="gzip", index=False)
+    return path
+
+
+def archive_old_notifications(conn: sqlite3.Connection, archive_dir: str,
+                              retention_days: int = 90,
+                              batch_size: int = ARCHIVE_BATCH_SIZE) -> Dict:
+    """
+    Archive rows older than `retention_days` and delete them from SQLite.
+
+    Daily rollups are maintained as rows are written (see delivery_metrics),
+    so long-range counts already survive deletion.
+    """
+    cutoff = f"-{int(retention_days)} days"
+    summary = {"archived": 0, "files": []}
+
+    while True:
+        batch = pd.read_sql_query('''
+            SELECT sn.id, sn.subscriber_id, sn.prediction_date, sn.notification_type,
+                   sn.status, sn.sent_at, sn.error_message,
+                   COALESCE(p.payload, sn.earthquake_data) AS earthquake_data
+            FROM sent_notifications sn
+            LEFT JOIN notification_payloads p ON p.id = sn.payload_id
+            WHERE sn.sent_at < datetime('now', ?)
+            ORDER BY sn.sent_at, sn.id
+            LIMIT ?
+        ''', conn, params=(cutoff, batch_size))
+        if batch.empty:
+            break
+
+        summary["files"].append(_write_archive(batch, archive_dir))
+
+        with conn:
+            conn.executemany('DELETE FROM sent_notifications WHERE id = ?',
+                             [(int(row_id),) for row_id in batch['id']])
+        summary["archived"] += len(batch)
+
+    return summary
+
+
+def prune_orphan_payloads(conn: sqlite3.Connection) -> int:
+    with conn:
+        cursor = conn.execute('''
+            DELETE FROM notification_payloads
+            WHERE NOT EXISTS (
+                SELECT 1 FROM sent_notifications sn WHERE sn.payload_id = notification_payloads.id
+            ) AND NOT EXISTS (
+                SELECT 1 FROM notification_queue q WHERE q.payload_id = notification_payloads.id
+            )
+        ''')
+    return cursor.rowcount
+
+
+def run_retention(db_path: str, archive_dir: str, store: PayloadStore,
+                  retention_days: int = 90, vacuum_pages: Optional[int] = None) -> Dict:
+    """Compact, archive, prune and incrementally vacuum in one pass"""
+    started = datetime.now()
+    conn = sqlite3.connect(db_path)
+    try:
+        summary = {"compacted": compact_legacy_payloads(conn, store)}
+        summary.update(archive_old_notifications(conn, archive_dir, retention_days))
+        summary["payloads_pruned"] = prune_orphan_payloads(conn)
+        if summary["payloads_pruned"]:
+            store.forget()
+
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+            logger.info("Incremental VACUUM is off for this database; run "
+                        "`python notification_retention.py --enable-incremental-vacuum` "
+                        "during maintenance to release free pages")
+
+        free_before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        # The pragma frees one page per step; executescript steps it to completion
+        pages = "" if vacuum_pages is None else f"({int(vacuum_pages)})"
+        conn.executescript(f'PRAGMA incremental_vacuum{pages};')
+        free_after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        summary["pages_released"] = free_before - free_after
+    finally:
+        conn.close()
+
+    summary["duration_s"] = (datetime.now() - started).total_seconds()
+    logger.info(f"Retention run: {summary['archived']} rows archived into "
+                f"{len(summary['files'])} file(s), {summary['compacted']} payloads compacted, "
+                f"{summary['pages_released']} pages released")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notification history maintenance")
+    parser.add_argument("--db", default="earthquake_notifications.db")
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="one-off full VACUUM switching the database to incremental "
+                             "auto_vacuum (stop every other user of the file first)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.enable_incremental_vacuum:
+        if not enable_incremental_vacuum(args.db):
+            logger.info(f"{args.db} already uses incremental auto_vacuum")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,16 @@ Automated Earthquake Notification Scheduler
 Runs daily to send earthquake prediction notifications to subscribers
 """
 
-import schedule
 import time
 import logging
+import os
+import itertools
+import queue
+import pandas as pd
 from datetime import datetime, date
 from earthquake_notifications import notification_system
+from earthquake_event_stream import get_event_stream
+from job_scheduler import JobScheduler, DailyTrigger, IntervalTrigger, WeeklyTrigger
 import threading
 
 # Configure logging
@@ -35,52 +40,231 @@ def send_daily_notifications():
         
     except Exception as e:
         logger.error(f"Error in daily notification process: {e}")
+        # Re-raised so the scheduler records the failure
+        raise
 
 def send_weekly_summary():
     """Send weekly earthquake activity summary"""
     try:
         logger.info("Starting weekly summary process...")
-        # TODO: Implement weekly summary functionality
+        notification_system.send_weekly_summary()
         logger.info("Weekly summary process completed")
         
     except Exception as e:
         logger.error(f"Error in weekly summary process: {e}")
+        raise
+
+def drain_notification_queue():
+    """Send queued notifications whose retry backoff has passed"""
+    try:
+        notification_system.drain_queue()
+    except Exception as e:
+        logger.error(f"Error draining the notification queue: {e}")
+        raise
+
+def run_history_retention():
+    """Roll up and archive old notification history"""
+    try:
+        logger.info("Starting history retention...")
+        notification_system.run_history_retention()
+        logger.info("History retention completed")
+        
+    except Exception as e:
+        logger.error(f"Error in history retention: {e}")
+        raise
+
+# Thresholds for the event-driven high-priority path
+HIGH_PRIORITY_MAGNITUDE = 5.0
+LIVE_ALERT_MAGNITUDE = 4.0
+LIVE_ALERT_MAX_AGE_MINUTES = 60
+PREDICTION_CHECK_SECONDS = 60
+
+def classify_alert_type(magnitude, risk_category=None):
+    """Map an earthquake onto the subscriber alert types"""
+    if risk_category == 'High' or magnitude >= HIGH_PRIORITY_MAGNITUDE:
+        return "high_risk"
+    return "medium_risk"
+
+class AlertDispatcher:
+    """Sends targeted alerts from a priority queue as soon as they arrive"""
+    
+    def __init__(self):
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._thread = None
+    
+    def enqueue(self, earthquake_data, notification_type, alert_type, priority=1):
+        """Queue an earthquake for immediate delivery (lower priority runs first)"""
+        self._queue.put((priority, next(self._counter), earthquake_data,
+                         notification_type, alert_type))
+        logger.info(f"Queued {alert_type} {notification_type} for "
+                    f"M{earthquake_data['predicted_magnitude']:.1f} "
+                    f"in {earthquake_data['regional_zone']}")
+    
+    def _run(self):
+        while True:
+            _, _, earthquake_data, notification_type, alert_type = self._queue.get()
+            try:
+                notification_system.notify_matching_subscribers(
+                    earthquake_data, notification_type, alert_type
+                )
+            except Exception as e:
+                logger.error(f"Error dispatching high-priority alert: {e}")
+            finally:
+                self._queue.task_done()
+    
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+        self._thread.start()
+
+alert_dispatcher = AlertDispatcher()
+
+def on_live_earthquake(event):
+    """Enqueue alerts for a newly published USGS event that crosses the thresholds"""
+    if event['magnitude'] < LIVE_ALERT_MAGNITUDE:
+        return
+    
+    # The stream backfills recent history on startup; only alert on fresh quakes
+    now = pd.Timestamp.now(tz="UTC").tz_localize(None)
+    if event['time'] < now - pd.Timedelta(minutes=LIVE_ALERT_MAX_AGE_MINUTES):
+        return
+    
+    earthquake_data = notification_system.event_to_earthquake_data(event)
+    alert_dispatcher.enqueue(
+        earthquake_data, "live_event",
+        classify_alert_type(event['magnitude'], earthquake_data['risk_category']),
+        priority=0
+    )
+
+class PredictionWatcher:
+    """Detects newly added prediction rows and enqueues the high-priority ones"""
+    
+    KEY_COLUMNS = ['prediction_date', 'latitude', 'longitude', 'model_type']
+    
+    def __init__(self, interval_seconds=PREDICTION_CHECK_SECONDS):
+        self.interval_seconds = interval_seconds
+        self._mtimes = {}
+        self._known_keys = None
+        self._thread = None
+    
+    def _row_keys(self, df):
+        columns = [col for col in self.KEY_COLUMNS if col in df.columns]
+        return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    
+    def check_once(self):
+        """Reload prediction files if they changed and enqueue new urgent rows"""
+        mtimes = {
+            path: os.path.getmtime(path)
+            for path in notification_system.prediction_files if os.path.exists(path)
+        }
+        if mtimes == self._mtimes:
+            return 0
+        self._mtimes = mtimes
+        
+        predictions = notification_system.load_all_predictions()
+        if predictions.empty:
+            return 0
+        
+        keys = self._row_keys(predictions)
+        if self._known_keys is None:
+            # First load is the baseline; only later additions are "new"
+            self._known_keys = keys
+            return 0
+        
+        new_predictions = predictions[~pd.Series(keys).isin(self._known_keys).to_numpy()]
+        self._known_keys = keys
+        
+        urgent = new_predictions[
+            (new_predictions['prediction_date'] >= date.today()) &
+            (
+                (new_predictions['risk_category'] == 'High') |
+                (new_predictions['predicted_magnitude'] >= HIGH_PRIORITY_MAGNITUDE)
+            )
+        ]
+        
+        for _, prediction in urgent.iterrows():
+            earthquake_data = prediction.to_dict()
+            alert_dispatcher.enqueue(
+                earthquake_data, "alert",
+                classify_alert_type(earthquake_data['predicted_magnitude'],
+                                    earthquake_data['risk_category'])
+            )
+        
+        return len(urgent)
+    
+    def _run(self):
+        while True:
+            try:
+                self.check_once()
+            except Exception as e:
+                logger.error(f"Error checking prediction files: {e}")
+            time.sleep(self.interval_seconds)
+    
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="prediction-watcher", daemon=True)
+        self._thread.start()
+
+prediction_watcher = PredictionWatcher()
+
+def start_event_driven_alerts():
+    """Start the immediate alert path fed by the live feed and new predictions"""
+    alert_dispatcher.start()
+    get_event_stream().subscribe(on_live_earthquake)
+    prediction_watcher.start()
+    logger.info("Event-driven high-priority alerts started")
+
+scheduler = JobScheduler(db_path=notification_system.db_path, max_workers=4)
 
 def setup_scheduler():
     """Setup the notification scheduler"""
     logger.info("Setting up earthquake notification scheduler...")
     
     # Schedule daily notifications at 7:00 AM IST
-    schedule.every().day.at("07:00").do(send_daily_notifications)
+    scheduler.add_job("daily_notifications", send_daily_notifications, DailyTrigger("07:00"))
     
     # Schedule weekly summary on Sundays at 8:00 AM IST
-    schedule.every().sunday.at("08:00").do(send_weekly_summary)
+    scheduler.add_job("weekly_summary", send_weekly_summary, WeeklyTrigger("sunday", "08:00"))
+    
+    # Retries of failed or deferred sends, for deployments without sender workers
+    scheduler.add_job("notification_queue", drain_notification_queue, IntervalTrigger(60))
     
-    # Schedule high-priority alerts check every 3 hours
-    schedule.every(3).hours.do(send_daily_notifications)
+    # Archive old notification history overnight, away from the send windows
+    scheduler.add_job("history_retention", run_history_retention, DailyTrigger("03:30"))
     
     logger.info("Scheduler setup completed")
     logger.info("Scheduled tasks:")
     logger.info("- Daily notifications: 7:00 AM IST")
     logger.info("- Weekly summary: Sunday 8:00 AM IST")
-    logger.info("- High-priority checks: Every 3 hours")
+    logger.info("- Notification queue retries: every minute")
+    logger.info("- History retention: 3:30 AM IST")
+    logger.info("- High-priority alerts: event-driven (live USGS feed + new predictions)")
+
+def log_job_metrics():
+    """Log timing metrics for every scheduled job"""
+    for name, metrics in scheduler.get_metrics().items():
+        logger.info(f"{name}: runs={metrics['runs']} failures={metrics['failures']} "
+                    f"skipped={metrics['skipped_overlaps']} "
+                    f"last={metrics['last_duration_s']} avg={metrics['avg_duration_s']} "
+                    f"max={metrics['max_duration_s']}")
 
 def run_scheduler():
-    """Run the scheduler in a loop"""
+    """Run the scheduler until interrupted"""
     setup_scheduler()
+    start_event_driven_alerts()
     
     logger.info("Starting earthquake notification scheduler...")
     logger.info("Press Ctrl+C to stop the scheduler")
     
     try:
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
-            
-    except KeyboardInterrupt:
-        logger.info("Scheduler stopped by user")
+        scheduler.run_forever()
     except Exception as e:
         logger.error(f"Scheduler error: {e}")
+    finally:
+        log_job_metrics()
 
 def run_scheduler_in_background():
     """Run scheduler in background thread"""
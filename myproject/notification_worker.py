@@ -0,0 +1,100 @@
+"""
+Notification Sender Workers
+Starts N processes that drain the notification work queue. Each process
+has its own interpreter, provider connections and dispatch thread pool, so
+sending scales across cores.
+
+    python notification_worker.py --processes 4
+    python notification_worker.py --processes 8 --exit-when-empty
+
+Provider credentials are read from the environment:
+ULTRAMSG_TOKEN / ULTRAMSG_INSTANCE_ID, TEXTBELT_API_KEY,
+TWILIO_ACCOUNT_SID / TWILIO_AUTH_TOKEN / TWILIO_WHATSAPP_NUMBER /
+TWILIO_PHONE_NUMBER, plus optional ULTRAMSG_BASE_URL / TEXTBELT_BASE_URL.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+
+logger = logging.getLogger(__name__)
+
+
+def configure_from_env(system):
+    """Enable every provider whose credentials are present in the environment"""
+    env = os.environ
+    if env.get("ULTRAMSG_TOKEN") and env.get("ULTRAMSG_INSTANCE_ID"):
+        system.configure_whatsapp_api("ultramsg", token=env["ULTRAMSG_TOKEN"],
+                                      instance_id=env["ULTRAMSG_INSTANCE_ID"])
+    if env.get("TWILIO_ACCOUNT_SID") and env.get("TWILIO_AUTH_TOKEN"):
+        credentials = {"account_sid": env["TWILIO_ACCOUNT_SID"],
+                       "auth_token": env["TWILIO_AUTH_TOKEN"]}
+        if env.get("TWILIO_WHATSAPP_NUMBER"):
+            system.configure_whatsapp_api("twilio", whatsapp_number=env["TWILIO_WHATSAPP_NUMBER"],
+                                          **credentials)
+        if env.get("TWILIO_PHONE_NUMBER"):
+            system.configure_sms_api("twilio", phone_number=env["TWILIO_PHONE_NUMBER"],
+                                     **credentials)
+    if "TEXTBELT_API_KEY" in env:
+        system.configure_sms_api("textbelt", api_key=env["TEXTBELT_API_KEY"])
+
+    for provider in ("ultramsg", "textbelt"):
+        base_url = env.get(f"{provider.upper()}_BASE_URL")
+        if base_url:
+            system.provider_urls[provider] = base_url.rstrip("/")
+
+
+def run_worker(db_path: str, index: int, exit_when_empty: bool, batch_size: int = None,
+               dispatch_workers: int = None):
+    """Body of one worker process"""
+    logging.basicConfig(level=logging.INFO,
+                        format=f"%(asctime)s worker-{index} %(levelname)s %(message)s")
+    from earthquake_notifications import EarthquakeNotificationSystem
+
+    system = EarthquakeNotificationSystem(db_path)
+    configure_from_env(system)
+    if dispatch_workers:
+        system.dispatch_workers = dispatch_workers
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info(f"Worker {worker_id} draining {db_path}")
+    reached = system.drain_queue(worker_id, batch_size, exit_when_empty=exit_when_empty)
+    logger.info(f"Worker {worker_id} finished: {reached} subscribers reached")
+    for health in system.provider_health.snapshot():
+        logger.info(f"Provider health: {health}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drain the notification work queue")
+    parser.add_argument("--db", default="earthquake_notifications.db")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=None,
+                        help="dispatch threads per process (default: the system's setting)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="items claimed per lease (default: 4x dispatch threads)")
+    parser.add_argument("--exit-when-empty", action="store_true",
+                        help="stop once nothing is ready to send instead of polling "
+                             "(retries still in backoff are left queued)")
+    args = parser.parse_args()
+
+    # spawn: each worker builds its own connections instead of inheriting the parent's
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker, name=f"notification-worker-{i}",
+                        args=(args.db, i, args.exit_when_empty, args.batch_size, args.threads))
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
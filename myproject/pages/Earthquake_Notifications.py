@@ -6,10 +6,16 @@ import plotly.express as px
 import plotly.graph_objects as go
 import sys
 import os
+import io
 import numpy as np
 from geopy.distance import geodesic
 import requests
 
+import datastore
+from earthquake_notifications import notification_system
+from message_templates import SUPPORTED_LANGUAGES
+from query_pages import PageNavigator
+
 # Page configuration
 st.set_page_config(
     page_title="Earthquake Notifications - Bhukamp",
@@ -19,27 +25,37 @@ st.set_page_config(
 )
 
 # Enhanced data loading and processing functions
-@st.cache_data
 def load_prediction_data():
-    """Load PINN prediction data from CSV"""
+    """PINN prediction data, shared through the datastore"""
     try:
-        csv_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'future_earthquake_predictions_india_25years_2025_2050.csv')
-        df = pd.read_csv(csv_path)
-        df['prediction_date'] = pd.to_datetime(df['prediction_date'])
-        return df
+        return datastore.pinn_predictions()
     except Exception as e:
         st.error(f"Error loading prediction data: {e}")
         return pd.DataFrame()
 
+@st.cache_data
+def summarize_month_predictions(month):
+    """Predictions for one calendar month plus their headline statistics, computed once per month"""
+    all_predictions = load_prediction_data()
+    if all_predictions.empty:
+        return all_predictions, None
+    current_month = all_predictions[all_predictions['prediction_date'].dt.month == month]
+    summary = {
+        'total': len(current_month),
+        'high_risk': int((current_month['risk_category'] == 'High').sum()),
+        'avg_magnitude': current_month['predicted_magnitude'].mean(),
+        'avg_probability': current_month['earthquake_probability'].mean(),
+        'risk_counts': current_month['risk_category'].value_counts()
+    }
+    return current_month, summary
+
 @st.cache_data
 def load_historical_earthquake_data():
     """Load historical earthquake data for probability calculations"""
     try:
         # Load from processed earthquake data or fetch from USGS
-        historical_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'processed_earthquake_data.csv')
-        if os.path.exists(historical_path):
-            df = pd.read_csv(historical_path)
-            return df
+        if datastore.is_available("processed_catalog"):
+            return datastore.processed_catalog()
         else:
             # Fetch historical data from USGS API
             return fetch_historical_usgs_data()
@@ -415,28 +431,17 @@ def main():
     with col2:
         st.header("📊 Statistics")
         
-        # Load all prediction data for statistics
-        all_predictions = load_prediction_data()
+        # Current month's predictions and statistics, aggregated once per month
+        current_month, month_stats = summarize_month_predictions(datetime.now().month)
         
-        if not all_predictions.empty:
-            # Filter for current month
-            current_month = all_predictions[
-                all_predictions['prediction_date'].dt.month == datetime.now().month
-            ]
-            
-            # Statistics
-            total_predictions = len(current_month)
-            high_risk = len(current_month[current_month['risk_category'] == 'High'])
-            avg_magnitude = current_month['predicted_magnitude'].mean()
-            avg_probability = current_month['earthquake_probability'].mean()
-            
-            st.metric("Total Predictions (This Month)", total_predictions)
-            st.metric("High Risk Predictions", high_risk)
-            st.metric("Average Magnitude", f"{avg_magnitude:.1f}")
-            st.metric("Average Probability", f"{avg_probability:.1%}")
+        if month_stats is not None:
+            st.metric("Total Predictions (This Month)", month_stats['total'])
+            st.metric("High Risk Predictions", month_stats['high_risk'])
+            st.metric("Average Magnitude", f"{month_stats['avg_magnitude']:.1f}")
+            st.metric("Average Probability", f"{month_stats['avg_probability']:.1%}")
             
             # Risk distribution chart
-            risk_counts = current_month['risk_category'].value_counts()
+            risk_counts = month_stats['risk_counts']
             
             fig_risk = px.pie(
                 values=risk_counts.values,
@@ -649,15 +654,22 @@ if selected_page == "📝 Subscribe to Alerts":
                 default=["Himalayan", "Central", "South", "West", "East"],
                 help="Select regions you want to monitor"
             )
+            
+            language = st.selectbox(
+                "Message Language",
+                list(SUPPORTED_LANGUAGES.keys()),
+                format_func=lambda x: SUPPORTED_LANGUAGES[x]
+            )
         
         notification_types = st.multiselect(
             "Alert Types",
-            ["high_risk", "medium_risk", "daily_summary"],
+            ["high_risk", "medium_risk", "daily_summary", "weekly_summary"],
             default=["high_risk", "medium_risk"],
             format_func=lambda x: {
                 "high_risk": "🚨 High Risk Alerts",
                 "medium_risk": "⚠️ Medium Risk Alerts",
-                "daily_summary": "📅 Daily Summary"
+                "daily_summary": "📅 Daily Summary",
+                "weekly_summary": "📰 Weekly Digest"
             }[x]
         )
         
@@ -677,7 +689,8 @@ if selected_page == "📝 Subscribe to Alerts":
                         notification_types=notification_types,
                         preferred_method=preferred_method,
                         min_magnitude=min_magnitude,
-                        regions=regions
+                        regions=regions,
+                        language=language
                     )
                     
                     if subscriber_id:
@@ -820,48 +833,86 @@ elif selected_page == "👥 Manage Subscribers":
     st.markdown("<div class='glass-container'>", unsafe_allow_html=True)
     st.markdown("## 👥 Manage Subscribers")
     
-    # Get subscribers data
-    subscribers_df = notification_system.get_subscribers()
+    stats = notification_system.get_subscriber_stats()
     
-    if not subscribers_df.empty:
-        st.markdown(f"### 📊 Total Subscribers: {len(subscribers_df)}")
+    if stats['total']:
+        st.markdown(f"### 📊 Total Subscribers: {stats['total']:,}")
         
         # Subscriber statistics
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            active_count = len(subscribers_df[subscribers_df['active'] == 1])
-            st.metric("Active Subscribers", active_count)
+            st.metric("Active Subscribers", f"{stats['active']:,}")
         
         with col2:
-            whatsapp_count = len(subscribers_df[subscribers_df['preferred_method'].isin(['whatsapp', 'both'])])
-            st.metric("WhatsApp Users", whatsapp_count)
+            st.metric("WhatsApp Users", f"{stats['whatsapp']:,}")
         
         with col3:
-            sms_count = len(subscribers_df[subscribers_df['preferred_method'].isin(['sms', 'both'])])
-            st.metric("SMS Users", sms_count)
+            st.metric("SMS Users", f"{stats['sms']:,}")
         
         with col4:
-            avg_magnitude = subscribers_df['min_magnitude'].mean()
-            st.metric("Avg Magnitude Threshold", f"{avg_magnitude:.1f}")
+            st.metric("Avg Magnitude Threshold", f"{stats['avg_min_magnitude']:.1f}")
         
-        # Subscribers table
+        # Subscribers table (filtered, sorted and paged in SQL)
         st.markdown("### 📋 Subscriber List")
         
-        # Parse JSON columns for better display
-        display_df = subscribers_df.copy()
-        display_df['regions'] = display_df['regions'].apply(lambda x: ', '.join(json.loads(x)) if pd.notna(x) else '')
-        display_df['notification_types'] = display_df['notification_types'].apply(lambda x: ', '.join(json.loads(x)) if pd.notna(x) else '')
-        display_df['created_at'] = pd.to_datetime(display_df['created_at']).dt.strftime('%Y-%m-%d %H:%M')
-        
-        st.dataframe(
-            display_df[['id', 'name', 'phone_number', 'preferred_method', 'min_magnitude', 'regions', 'active', 'created_at']],
-            use_container_width=True
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            search = st.text_input("Search name / phone", key="subscriber_search")
+        with col2:
+            region_filter = st.selectbox("Region", ["All", "Himalayan", "Central", "South", "West", "East"])
+        with col3:
+            method_filter = st.selectbox("Method", ["All", "whatsapp", "sms", "both"])
+        with col4:
+            status_filter = st.selectbox("Status", ["All", "Active", "Inactive"])
+        with col5:
+            sort_by = st.selectbox("Sort by", ["created_at", "name", "min_magnitude", "id"])
+        
+        page_size = 50
+        if 'subscriber_pages' not in st.session_state:
+            st.session_state.subscriber_pages = PageNavigator()
+        pages = st.session_state.subscriber_pages
+        pages.sync((search, region_filter, method_filter, status_filter, sort_by))
+        
+        subscribers_page, next_cursor = notification_system.query_subscribers(
+            limit=page_size,
+            cursor=pages.cursor,
+            sort_by=sort_by,
+            descending=sort_by != "name",
+            active={"All": None, "Active": True, "Inactive": False}[status_filter],
+            region=None if region_filter == "All" else region_filter,
+            preferred_method=None if method_filter == "All" else method_filter,
+            search=search.strip() or None
         )
         
+        if not subscribers_page.empty:
+            display_df = subscribers_page.copy()
+            display_df['created_at'] = pd.to_datetime(display_df['created_at']).dt.strftime('%Y-%m-%d %H:%M')
+            st.dataframe(
+                display_df[['id', 'name', 'phone_number', 'preferred_method', 'min_magnitude', 'regions', 'active', 'created_at']],
+                use_container_width=True
+            )
+        else:
+            st.info("No subscribers match these filters.")
+        
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("⬅️ Previous", disabled=pages.page_number == 1, key="subscribers_prev"):
+                pages.back()
+                st.rerun()
+        with col2:
+            st.caption(f"Page {pages.page_number}")
+        with col3:
+            if st.button("Next ➡️", disabled=next_cursor is None, key="subscribers_next"):
+                pages.advance(next_cursor)
+                st.rerun()
+        
         # Subscriber management actions
         st.markdown("### ⚙️ Subscriber Actions")
         
+        active_on_page = subscribers_page[subscribers_page['active'] == 1]
+        names_on_page = dict(zip(active_on_page['id'], active_on_page['name']))
+        
         col1, col2 = st.columns(2)
         
         with col1:
@@ -869,8 +920,8 @@ elif selected_page == "👥 Manage Subscribers":
             st.markdown("#### 🔴 Deactivate Subscriber")
             subscriber_id_deactivate = st.selectbox(
                 "Select Subscriber to Deactivate",
-                options=subscribers_df[subscribers_df['active'] == 1]['id'].tolist(),
-                format_func=lambda x: f"ID {x}: {subscribers_df[subscribers_df['id'] == x]['name'].iloc[0]}",
+                options=list(names_on_page),
+                format_func=lambda x: f"ID {x}: {names_on_page[x]}",
                 key="deactivate_select"
             )
             
@@ -883,8 +934,8 @@ elif selected_page == "👥 Manage Subscribers":
             st.markdown("#### 📤 Send Test Notification")
             subscriber_id_test = st.selectbox(
                 "Select Subscriber for Test",
-                options=subscribers_df[subscribers_df['active'] == 1]['id'].tolist(),
-                format_func=lambda x: f"ID {x}: {subscribers_df[subscribers_df['id'] == x]['name'].iloc[0]}",
+                options=list(names_on_page),
+                format_func=lambda x: f"ID {x}: {names_on_page[x]}",
                 key="test_select"
             )
             
@@ -895,43 +946,72 @@ elif selected_page == "👥 Manage Subscribers":
     else:
         st.info("📝 No subscribers yet. Use the 'Subscribe to Alerts' page to add subscribers.")
     
+    # Bulk onboarding for organisations
+    st.markdown("### 📥 Bulk Import / Export")
+    st.caption("Columns: name, phone_number, whatsapp_number, notification_types, "
+               "preferred_method, min_magnitude, regions, language, and optionally active "
+               "(1/0; blank keeps a known number's current status). "
+               "List columns are separated by ';'.")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        upload = st.file_uploader("Subscriber list (CSV or Excel)", type=["csv", "xlsx"])
+        if upload is not None and st.button("📥 Import Subscribers", key="bulk_import_btn"):
+            reject_buffer = io.StringIO()
+            with st.spinner("Importing subscribers..."):
+                summary = notification_system.import_subscribers(upload, reject_path=reject_buffer)
+            st.success(f"✅ {summary['upserted']} subscribers imported or updated "
+                       f"out of {summary['read']} rows")
+            if summary['rejected']:
+                st.warning(f"⚠️ {summary['rejected']} rows rejected")
+                st.download_button("📄 Download Reject Report", reject_buffer.getvalue(),
+                                   file_name="subscriber_import_rejects.csv", mime="text/csv")
+    
+    with col2:
+        if st.button("📤 Prepare Export", key="bulk_export_btn"):
+            export_buffer = io.StringIO()
+            exported = notification_system.export_subscribers(export_buffer)
+            st.download_button(f"💾 Download {exported} Subscribers", export_buffer.getvalue(),
+                               file_name="subscribers.csv", mime="text/csv")
+    
     st.markdown("</div>", unsafe_allow_html=True)
 
 elif selected_page == "📊 Notification Analytics":
     st.markdown("<div class='glass-container'>", unsafe_allow_html=True)
     st.markdown("## 📊 Notification Analytics")
     
-    # Get notification history
-    history_df = notification_system.get_notification_history(days=30)
+    # Aggregated in SQL; the table below fetches only the visible page
+    stats_df = notification_system.get_notification_stats(days=30)
     
-    if not history_df.empty:
+    if not stats_df.empty:
+        total_sent = int(stats_df['count'].sum())
+        by_channel = stats_df.groupby('notification_type')['count'].sum()
+        by_status = stats_df.groupby('status')['count'].sum()
+        
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            total_sent = len(history_df)
-            st.metric("Total Notifications", total_sent)
+            st.metric("Total Notifications", f"{total_sent:,}")
         
         with col2:
-            success_rate = len(history_df[history_df['status'] == 'sent']) / len(history_df) * 100
+            success_rate = by_status.get('sent', 0) / total_sent * 100
             st.metric("Success Rate", f"{success_rate:.1f}%")
         
         with col3:
-            whatsapp_count = len(history_df[history_df['notification_type'] == 'whatsapp'])
-            st.metric("WhatsApp Sent", whatsapp_count)
+            st.metric("WhatsApp Sent", f"{int(by_channel.get('whatsapp', 0)):,}")
         
         with col4:
-            sms_count = len(history_df[history_df['notification_type'] == 'sms'])
-            st.metric("SMS Sent", sms_count)
+            st.metric("SMS Sent", f"{int(by_channel.get('sms', 0)):,}")
         
         # Charts
         col1, col2 = st.columns(2)
         
         with col1:
             # Notifications by method
-            method_counts = history_df['notification_type'].value_counts()
             fig1 = px.pie(
-                values=method_counts.values,
-                names=method_counts.index,
+                values=by_channel.values,
+                names=by_channel.index,
                 title="Notifications by Method"
             )
             fig1.update_traces(textposition='inside', textinfo='percent+label')
@@ -939,23 +1019,68 @@ elif selected_page == "📊 Notification Analytics":
         
         with col2:
             # Status distribution
-            status_counts = history_df['status'].value_counts()
             fig2 = px.bar(
-                x=status_counts.index,
-                y=status_counts.values,
+                x=by_status.index,
+                y=by_status.values,
                 title="Notification Status Distribution"
             )
             st.plotly_chart(fig2, use_container_width=True)
-        
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            daily_df = notification_system.get_daily_notification_stats(days=30)
+            fig3 = px.bar(daily_df, x='day', y='count', color='status',
+                          title="Daily Notifications (30 days)")
+            st.plotly_chart(fig3, use_container_width=True)
+
+        with col2:
+            zone_df = notification_system.get_zone_notification_stats(days=30)
+            fig4 = px.bar(zone_df, x='regional_zone', y='count', color='status',
+                          title="Notifications by Region")
+            st.plotly_chart(fig4, use_container_width=True)
+
         # Recent notifications table
         st.markdown("### 📋 Recent Notifications")
-        display_history = history_df.copy()
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            history_status = st.selectbox("Status", ["All", "sent", "failed"], key="history_status")
+        with col2:
+            history_channel = st.selectbox("Channel", ["All", "whatsapp", "sms"], key="history_channel")
+        
+        if 'history_pages' not in st.session_state:
+            st.session_state.history_pages = PageNavigator()
+        pages = st.session_state.history_pages
+        pages.sync((history_status, history_channel))
+        
+        history_page, next_cursor = notification_system.query_notification_history(
+            limit=20,
+            cursor=pages.cursor,
+            days=30,
+            status=None if history_status == "All" else history_status,
+            channel=None if history_channel == "All" else history_channel
+        )
+        
+        display_history = history_page.copy()
         display_history['sent_at'] = pd.to_datetime(display_history['sent_at']).dt.strftime('%Y-%m-%d %H:%M')
         
         st.dataframe(
-            display_history[['sent_at', 'name', 'phone_number', 'notification_type', 'status']].head(20),
+            display_history[['sent_at', 'name', 'phone_number', 'notification_type', 'status']],
             use_container_width=True
         )
+        
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            if st.button("⬅️ Newer", disabled=pages.page_number == 1, key="history_prev"):
+                pages.back()
+                st.rerun()
+        with col2:
+            st.caption(f"Page {pages.page_number}")
+        with col3:
+            if st.button("Older ➡️", disabled=next_cursor is None, key="history_next"):
+                pages.advance(next_cursor)
+                st.rerun()
     
     else:
         st.info("📈 No notification history available yet.")
@@ -982,6 +1107,11 @@ elif selected_page == "🔔 Send Test Notification":
             ["alert", "daily_summary"],
             format_func=lambda x: "🚨 Alert" if x == "alert" else "📅 Daily Summary"
         )
+        test_language = st.selectbox(
+            "Language",
+            list(SUPPORTED_LANGUAGES.keys()),
+            format_func=lambda x: SUPPORTED_LANGUAGES[x]
+        )
         
         # Create test earthquake data
         test_earthquake = {
@@ -998,10 +1128,12 @@ elif selected_page == "🔔 Send Test Notification":
         
         # Preview message
         st.markdown("### 📱 Message Preview")
-        preview_message = notification_system.generate_notification_message(
-            test_earthquake, test_message_type
+        rendered_message = notification_system.render_notification(
+            test_earthquake, test_message_type, test_language
         )
+        preview_message = rendered_message.text
         st.text_area("Message Content", preview_message, height=200, disabled=True)
+        st.caption(f"SMS: {rendered_message.sms_segments} segment(s), {rendered_message.sms_encoding}")
         
         sent_test = st.form_submit_button("📤 Send Test Notification", use_container_width=True)
         
@@ -1013,7 +1145,7 @@ elif selected_page == "🔔 Send Test Notification":
                     if test_method == "whatsapp":
                         success = notification_system.send_whatsapp_message(test_phone, preview_message)
                     else:
-                        success = notification_system.send_sms_message(test_phone, preview_message)
+                        success = notification_system.send_sms_message(test_phone, rendered_message.sms_text)
                     
                     if success:
                         st.success("✅ Test notification sent successfully!")
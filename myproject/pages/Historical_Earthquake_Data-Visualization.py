@@ -3,12 +3,17 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import altair as alt
-import time
 import matplotlib as mpl
 import plotly.express as px
-from pathlib import Path
 import numpy as np
 import os
+from catalog_index import CatalogIndex
+from catalog_rollups import RollupCube
+from data_export import export_controls, export_fingerprint
+from datastore import earthquake_catalog
+from map_aggregation import MapPyramid, viewport_bounds
+from place_search import PlaceIndex
+from stage_timing import StageTimer, timed
 
 # Set style and page layout
 st.set_page_config(page_title="Historical Earthquake Analysis", layout="wide")
@@ -114,51 +119,25 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Function to get relative path for data file
-@st.cache_data
-def get_data_path():
-    """Get the path to the earthquake data file, handling different deployment environments"""
-    # Try different possible locations
-    possible_paths = [
-        # Local development path - relative to this script
-        Path(__file__).parent.parent / "data" / "earthquake.csv",
-        # Repository root relative path
-        Path("myproject/data/earthquake.csv"),
-        # Current directory path
-        Path("data/earthquake.csv"),
-        # Fallback to original path (not recommended for deployment)
-        Path("C:/Users/Supravo Biswas/Desktop/Coding/Python Coding/StreamlitPython/myproject/data/earthquake.csv")
-    ]
-    
-    for path in possible_paths:
-        if path.exists():
-            return str(path)
-    
-    # If no file is found, return the first path (will cause an error, but with a meaningful path)
-    return str(possible_paths[0])
-
 # Load and process data with caching
-@st.cache_data(ttl=3600)
+@st.cache_resource(ttl=3600)
 def load_earthquake_data():
-    """Load and preprocess earthquake data with caching for better performance"""
+    """The shared India catalog plus the calendar columns this page analyses"""
     try:
-        data_path = get_data_path()
-        df = pd.read_csv(data_path)
-        # Filter for India
-        df = df[df['place'].str.contains('India', case=False, na=False)]
-        df['time'] = pd.to_datetime(df['time'], errors='coerce')
-        df.dropna(subset=['time'], inplace=True)
+        # Shallow copy: the datastore catalog is shared, so columns go on a copy
+        df = earthquake_catalog().copy(deep=False)
         
         # Add additional calculated columns for analysis
-        df['year'] = df['time'].dt.year
-        df['month'] = df['time'].dt.month
-        df['day'] = df['time'].dt.day
-        df['hour'] = df['time'].dt.hour
-        df['magnitude_category'] = pd.cut(
-            df['mag'], 
-            bins=[0, 2, 4, 6, 8, 10], 
-            labels=['Very Minor', 'Minor', 'Moderate', 'Strong', 'Major']
-        )
+        with timed("Derive columns"):
+            df['year'] = df['time'].dt.year
+            df['month'] = df['time'].dt.month
+            df['day'] = df['time'].dt.day
+            df['hour'] = df['time'].dt.hour
+            df['magnitude_category'] = pd.cut(
+                df['mag'], 
+                bins=[0, 2, 4, 6, 8, 10], 
+                labels=['Very Minor', 'Minor', 'Moderate', 'Strong', 'Major']
+            )
         
         return df
     except Exception as e:
@@ -166,32 +145,71 @@ def load_earthquake_data():
         # Return empty DataFrame with expected columns to prevent further errors
         return pd.DataFrame(columns=['time', 'place', 'mag', 'depth', 'latitude', 'longitude'])
 
-# Load the data with spinner
+@st.cache_resource(ttl=3600)
+def get_catalog_index():
+    """Filter engine over the loaded catalog, shared across reruns without copying"""
+    frame = load_earthquake_data()
+    with timed("Build time index"):
+        return CatalogIndex(frame)
+
+@st.cache_resource(ttl=3600)
+def get_rollup_cube():
+    """Counts and magnitude stats per (day, hour, zone, magnitude band) for the trend charts"""
+    frame = get_catalog_index().frame
+    with timed("Build rollup cube"):
+        return RollupCube(frame)
+
+@st.cache_resource(ttl=3600)
+def get_map_pyramid():
+    """Grid pyramid over the catalog rows for level-of-detail maps"""
+    frame = get_catalog_index().frame
+    with timed("Build map pyramid"):
+        return MapPyramid(frame)
+
+@st.cache_resource(ttl=3600)
+def get_place_index():
+    """Token/trigram index over the catalog's place names for the location search"""
+    frame = get_catalog_index().frame
+    with timed("Build place index"):
+        return PlaceIndex(frame['place'])
+
+# Derived structures built after the catalog loads, in progress-bar order
+INDEX_BUILDS = [
+    ("Building rollup cube", get_rollup_cube),
+    ("Building map pyramid", get_map_pyramid),
+    ("Building place index", get_place_index)
+]
+
+# Times every stage of this run for the debug panel below
+timer = StageTimer().activate()
+
+# Load the data with spinner; the progress bar advances as each real load step
+# finishes (the cached functions themselves must not touch page elements)
+progress = st.progress(0.0, text="🔄 Loading Earthquake Data...")
 with st.spinner("🔄 Loading Earthquake Data..."):
-    df = load_earthquake_data()
+    catalog = get_catalog_index()
+    df = catalog.frame
     if df.empty:
         st.warning("No earthquake data found for India. Please check the data source.")
-
-# Progress bar
-if not df.empty:
-    progress = st.progress(0)
-    for percent in range(50, 101, 10):
-        time.sleep(0.03)  # Reduced sleep time for better UX
-        progress.progress(percent)
-    progress.empty()
+    else:
+        for done, (label, build) in enumerate(INDEX_BUILDS, 1):
+            progress.progress(done / (len(INDEX_BUILDS) + 1), text=f"🔄 {label}...")
+            build()
+progress.empty()
 
 # Sidebar - Data Overview and Filters
 st.sidebar.header("📂 Data Overview")
 if not df.empty:
     st.sidebar.write("Total Earthquakes:", len(df))
-    st.sidebar.write("Date Range:", df['time'].min().date(), "to", df['time'].max().date())
+    first_time, last_time = catalog.time_bounds
+    st.sidebar.write("Date Range:", first_time.date(), "to", last_time.date())
     
     # Add interactive filters
     st.sidebar.header("🔍 Filters")
     
     # Date range filter
-    min_date = df['time'].min().date()
-    max_date = df['time'].max().date()
+    min_date = first_time.date()
+    max_date = last_time.date()
     
     date_range = st.sidebar.date_input(
         "Select Date Range",
@@ -202,13 +220,11 @@ if not df.empty:
     
     if len(date_range) == 2:
         start_date, end_date = date_range
-        filtered_df = df[(df['time'].dt.date >= start_date) & (df['time'].dt.date <= end_date)]
     else:
-        filtered_df = df.copy()
+        start_date, end_date = None, None
     
     # Magnitude filter
-    min_mag = float(df['mag'].min())
-    max_mag = float(df['mag'].max())
+    min_mag, max_mag = catalog.magnitude_bounds
     mag_range = st.sidebar.slider(
         "Magnitude Range",
         min_value=min_mag,
@@ -217,30 +233,43 @@ if not df.empty:
         step=0.1
     )
     
-    filtered_df = filtered_df[(filtered_df['mag'] >= mag_range[0]) & (filtered_df['mag'] <= mag_range[1])]
+    # Date range -> searchsorted slice, magnitude range -> precomputed bins
+    with timed("Filter rows"):
+        filtered_rows = catalog.positions(start_date, end_date, mag_range[0], mag_range[1])
+        filtered_df = catalog.frame.iloc[filtered_rows]
+    # The same filters as a slice of the rollup cube, for the statistical charts
+    with timed("Aggregate rollups"):
+        rollup = get_rollup_cube()
+        rollup_cells = rollup.select(start_date, end_date, mag_range[0], mag_range[1])
+        rollup_totals = rollup.totals(rollup_cells)
     
     # Show filtered data count
     st.sidebar.write("Filtered Earthquakes:", len(filtered_df))
     
-    # Download filtered data option
-    csv = filtered_df.to_csv(index=False).encode('utf-8')
-    st.sidebar.download_button(
-        label="📥 Download Filtered Data",
-        data=csv,
-        file_name="filtered_earthquake_data.csv",
-        mime="text/csv",
+    # Download filtered data option (serialized only when requested)
+    export_controls(
+        "Download Filtered Data",
+        filtered_df,
+        export_fingerprint("historical", len(catalog), int(catalog.epoch[-1]),
+                           start_date, end_date, mag_range),
+        "filtered_earthquake_data",
+        formats=("csv", "parquet", "geojson"),
+        key="historical_export",
+        container=st.sidebar
     )
 
     # Display summary metrics at the top
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Earthquakes", f"{len(filtered_df):,}")
+        st.metric("Total Earthquakes", f"{rollup_totals['count']:,}")
     with col2:
-        st.metric("Average Magnitude", f"{filtered_df['mag'].mean():.2f}")
+        st.metric("Average Magnitude", f"{rollup_totals['mean']:.2f}")
     with col3:
-        st.metric("Max Magnitude", f"{filtered_df['mag'].max():.2f}")
+        st.metric("Max Magnitude", f"{rollup_totals['max']:.2f}")
     with col4:
-        st.metric("Recent Event", filtered_df['time'].max().strftime("%Y-%m-%d"))
+        # Rows are time-sorted, so the last one is the most recent
+        recent = filtered_df['time'].iloc[-1].strftime("%Y-%m-%d") if len(filtered_df) else "-"
+        st.metric("Recent Event", recent)
 
     # Main visualizations section
     tab1, tab2, tab3 = st.tabs(["📊 Statistical Analysis", "🗺️ Geographical Analysis", "🔍 Detailed Data"])
@@ -248,156 +277,240 @@ if not df.empty:
     with tab1:
         # ---- Chart 1: Magnitude Distribution
         with st.expander("📈 Magnitude Distribution", expanded=True):
-            st.markdown("**Distribution of Earthquake Magnitudes**")
-            fig1 = px.histogram(
-                filtered_df, 
-                x='mag',
-                nbins=30,
-                color_discrete_sequence=['orangered'],
-                labels={'mag': 'Magnitude'},
-                title="Distribution of Earthquake Magnitudes",
-                opacity=0.7
-            )
-            fig1.update_layout(
-                xaxis_title="Magnitude",
-                yaxis_title="Frequency",
-                plot_bgcolor='rgba(0,0,0,0.1)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color="#f8f8f8")
-            )
-            # Add a kde line
-            fig1.add_scatter(
-                x=filtered_df['mag'].sort_values(),
-                y=filtered_df['mag'].value_counts(normalize=True, bins=30).sort_index().cumsum(),
-                mode='lines',
-                line=dict(color='cyan', width=2),
-                name='Cumulative'
-            )
-            st.plotly_chart(fig1, use_container_width=True)
+            with timed("Chart: magnitude distribution"):
+                st.markdown("**Distribution of Earthquake Magnitudes**")
+                magnitude_counts = rollup.by_band(rollup_cells)
+                fig1 = px.bar(
+                    magnitude_counts, 
+                    x='magnitude',
+                    y='count',
+                    color_discrete_sequence=['orangered'],
+                    labels={'magnitude': 'Magnitude', 'count': 'Frequency'},
+                    title="Distribution of Earthquake Magnitudes",
+                    opacity=0.7
+                )
+                fig1.update_layout(
+                    xaxis_title="Magnitude",
+                    yaxis_title="Frequency",
+                    bargap=0,
+                    yaxis2=dict(overlaying='y', side='right', range=[0, 1], showgrid=False,
+                                title="Cumulative share"),
+                    plot_bgcolor='rgba(0,0,0,0.1)',
+                    paper_bgcolor='rgba(0,0,0,0)',
+                    font=dict(color="#f8f8f8")
+                )
+                # Cumulative share of events up to each magnitude band
+                fig1.add_scatter(
+                    x=magnitude_counts['magnitude'],
+                    y=magnitude_counts['count'].cumsum() / max(magnitude_counts['count'].sum(), 1),
+                    mode='lines',
+                    line=dict(color='cyan', width=2),
+                    name='Cumulative',
+                    yaxis='y2'
+                )
+                st.plotly_chart(fig1, use_container_width=True)
 
         # ---- Chart 3: Magnitude vs Depth
         with st.expander("🌐 Magnitude vs Depth Relationship", expanded=True):
-            st.markdown("**Scatter Plot: Magnitude vs Depth**")
-            fig3 = px.scatter(
-                filtered_df, 
-                x='depth', 
-                y='mag',
-                color='mag',
-                color_continuous_scale='Viridis',
-                opacity=0.7,
-                hover_data=['place', 'time'],
-                labels={'mag': 'Magnitude', 'depth': 'Depth (km)'}
-            )
-            fig3.update_layout(
-                xaxis_title="Depth (km)",
-                yaxis_title="Magnitude",
-                title="Relationship Between Earthquake Depth and Magnitude",
-                plot_bgcolor='rgba(0,0,0,0.1)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color="#f8f8f8")
-            )
-            st.plotly_chart(fig3, use_container_width=True)
+            with timed("Chart: magnitude vs depth"):
+                st.markdown("**Scatter Plot: Magnitude vs Depth**")
+                fig3 = px.scatter(
+                    filtered_df, 
+                    x='depth', 
+                    y='mag',
+                    color='mag',
+                    color_continuous_scale='Viridis',
+                    opacity=0.7,
+                    hover_data=['place', 'time'],
+                    labels={'mag': 'Magnitude', 'depth': 'Depth (km)'}
+                )
+                fig3.update_layout(
+                    xaxis_title="Depth (km)",
+                    yaxis_title="Magnitude",
+                    title="Relationship Between Earthquake Depth and Magnitude",
+                    plot_bgcolor='rgba(0,0,0,0.1)',
+                    paper_bgcolor='rgba(0,0,0,0)',
+                    font=dict(color="#f8f8f8")
+                )
+                st.plotly_chart(fig3, use_container_width=True)
 
         # ---- Chart 4: Monthly Earthquake Frequency
         with st.expander("📆 Earthquakes Over Time", expanded=True):
-            st.markdown("**Monthly Earthquake Frequency Over Time**")
-            filtered_df['year_month'] = filtered_df['time'].dt.to_period('M').astype(str)
-            monthly_counts = filtered_df.groupby('year_month').size().reset_index(name='counts')
+            with timed("Chart: monthly trend"):
+                st.markdown("**Monthly Earthquake Frequency Over Time**")
+                monthly_counts = rollup.by_month(rollup_cells).rename(columns={'count': 'counts'})
             
-            fig4 = px.line(
-                monthly_counts,
-                x='year_month',
-                y='counts',
-                markers=True,
-                labels={'counts': 'Number of Earthquakes', 'year_month': 'Month'},
-                title="Monthly Earthquake Frequency"
-            )
-            fig4.update_layout(
-                xaxis_title="Month",
-                yaxis_title="Number of Earthquakes",
-                plot_bgcolor='rgba(0,0,0,0.1)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color="#f8f8f8")
-            )
-            st.plotly_chart(fig4, use_container_width=True)
+                fig4 = px.line(
+                    monthly_counts,
+                    x='year_month',
+                    y='counts',
+                    markers=True,
+                    labels={'counts': 'Number of Earthquakes', 'year_month': 'Month'},
+                    title="Monthly Earthquake Frequency"
+                )
+                fig4.update_layout(
+                    xaxis_title="Month",
+                    yaxis_title="Number of Earthquakes",
+                    plot_bgcolor='rgba(0,0,0,0.1)',
+                    paper_bgcolor='rgba(0,0,0,0)',
+                    font=dict(color="#f8f8f8")
+                )
+                st.plotly_chart(fig4, use_container_width=True)
+
+        # ---- Chart 6: Hour of Day and Regional Zone
+        with st.expander("🕐 Activity by Hour and Zone", expanded=False):
+            with timed("Chart: hour and zone"):
+                hour_col, zone_col = st.columns(2)
+                with hour_col:
+                    hourly_counts = rollup.by_hour(rollup_cells)
+                    fig6 = px.bar(
+                        hourly_counts,
+                        x='hour',
+                        y='count',
+                        color='mag_mean',
+                        color_continuous_scale='Viridis',
+                        labels={'hour': 'Hour (UTC)', 'count': 'Number of Earthquakes', 'mag_mean': 'Mean Magnitude'},
+                        title="Earthquakes by Hour of Day"
+                    )
+                    fig6.update_layout(
+                        plot_bgcolor='rgba(0,0,0,0.1)',
+                        paper_bgcolor='rgba(0,0,0,0)',
+                        font=dict(color="#f8f8f8")
+                    )
+                    st.plotly_chart(fig6, use_container_width=True)
+                with zone_col:
+                    zone_counts = rollup.by_zone(rollup_cells)
+                    fig7 = px.bar(
+                        zone_counts,
+                        x='zone',
+                        y='count',
+                        color='mag_max',
+                        color_continuous_scale='OrRd',
+                        labels={'zone': 'Regional Zone', 'count': 'Number of Earthquakes', 'mag_max': 'Max Magnitude'},
+                        title="Earthquakes by Regional Zone"
+                    )
+                    fig7.update_layout(
+                        plot_bgcolor='rgba(0,0,0,0.1)',
+                        paper_bgcolor='rgba(0,0,0,0)',
+                        font=dict(color="#f8f8f8")
+                    )
+                    st.plotly_chart(fig7, use_container_width=True)
 
     with tab2:
         # ---- Chart 2: Top Locations
         with st.expander("📍 Top 10 Locations with Most Earthquakes", expanded=True):
-            st.markdown("**Top 10 Affected Locations**")
-            top_places = filtered_df['place'].value_counts().head(10)
-            fig2 = px.bar(
-                x=top_places.values,
-                y=top_places.index,
-                orientation='h',
-                color=top_places.values,
-                color_continuous_scale='Viridis',
-                labels={'x': 'Number of Earthquakes', 'y': 'Location'}
-            )
-            fig2.update_layout(
-                xaxis_title="Number of Earthquakes",
-                yaxis_title="Location",
-                title="Most Frequent Earthquake Locations",
-                plot_bgcolor='rgba(0,0,0,0.1)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color="#f8f8f8")
-            )
-            st.plotly_chart(fig2, use_container_width=True)
+            with timed("Chart: top locations"):
+                st.markdown("**Top 10 Affected Locations**")
+                top_places = filtered_df['place'].value_counts().head(10)
+                fig2 = px.bar(
+                    x=top_places.values,
+                    y=top_places.index,
+                    orientation='h',
+                    color=top_places.values,
+                    color_continuous_scale='Viridis',
+                    labels={'x': 'Number of Earthquakes', 'y': 'Location'}
+                )
+                fig2.update_layout(
+                    xaxis_title="Number of Earthquakes",
+                    yaxis_title="Location",
+                    title="Most Frequent Earthquake Locations",
+                    plot_bgcolor='rgba(0,0,0,0.1)',
+                    paper_bgcolor='rgba(0,0,0,0)',
+                    font=dict(color="#f8f8f8")
+                )
+                st.plotly_chart(fig2, use_container_width=True)
         
         # ---- Map visualization with Plotly
         with st.expander("🗺️ Interactive Earthquake Map", expanded=True):
-            st.markdown("**Geographic Distribution of Earthquakes**")
-            fig_map = px.scatter_mapbox(
-                filtered_df,
-                lat='latitude',
-                lon='longitude',
-                color='mag',
-                size='mag',
-                size_max=15,
-                zoom=4,
-                center={"lat": 20.5937, "lon": 78.9629},  # Center of India
-                hover_name='place',
-                hover_data=['time', 'mag', 'depth'],
-                color_continuous_scale='Viridis',
-                mapbox_style="carto-darkmatter"
-            )
-            fig_map.update_layout(
-                title="Earthquake Locations and Magnitudes",
-                margin={"r":0, "t":40, "l":0, "b":0},
-                height=600
-            )
-            st.plotly_chart(fig_map, use_container_width=True)
+            with timed("Chart: event map"):
+                st.markdown("**Geographic Distribution of Earthquakes**")
+                zoom_input, lat_input, lon_input = st.columns(3)
+                map_zoom = zoom_input.slider("Map zoom", min_value=3, max_value=12, value=4)
+                center_lat = lat_input.number_input("Centre latitude", -90.0, 90.0, 20.5937)  # Center of India
+                center_lon = lon_input.number_input("Centre longitude", -180.0, 180.0, 78.9629)
+            
+                # Raw events when few are in view, grid cells otherwise
+                map_data, aggregated = get_map_pyramid().view(
+                    map_zoom, filtered_rows, viewport_bounds(center_lat, center_lon, map_zoom, height_px=600),
+                    value_column='mag'
+                )
+                if aggregated:
+                    st.caption(f"Showing {map_data['count'].sum():,} events as {len(map_data):,} grid cells "
+                               f"(size = events, colour = strongest magnitude); zoom in for individual events")
+                    fig_map = px.scatter_mapbox(
+                        map_data,
+                        lat='latitude',
+                        lon='longitude',
+                        color='mag_max',
+                        size='count',
+                        size_max=25,
+                        zoom=map_zoom,
+                        center={"lat": center_lat, "lon": center_lon},
+                        hover_data={'count': True, 'mag': ':.2f', 'mag_max': ':.1f'},
+                        labels={'count': 'Events', 'mag': 'Mean magnitude', 'mag_max': 'Max magnitude'},
+                        color_continuous_scale='Viridis',
+                        mapbox_style="carto-darkmatter"
+                    )
+                else:
+                    fig_map = px.scatter_mapbox(
+                        map_data,
+                        lat='latitude',
+                        lon='longitude',
+                        color='mag',
+                        size='mag',
+                        size_max=15,
+                        zoom=map_zoom,
+                        center={"lat": center_lat, "lon": center_lon},
+                        hover_name='place',
+                        hover_data=['time', 'mag', 'depth'],
+                        color_continuous_scale='Viridis',
+                        mapbox_style="carto-darkmatter"
+                    )
+                fig_map.update_layout(
+                    title="Earthquake Locations and Magnitudes",
+                    margin={"r":0, "t":40, "l":0, "b":0},
+                    height=600
+                )
+                st.plotly_chart(fig_map, use_container_width=True)
 
         # ---- Chart 5: Heatmap using Plotly
         with st.expander("🔥 Earthquake Geographic Density", expanded=True):
-            st.markdown("**Density of Earthquake Locations**")
-            fig5 = px.density_mapbox(
-                filtered_df, 
-                lat='latitude', 
-                lon='longitude', 
-                z='mag', 
-                radius=10,
-                center={"lat": 20.5937, "lon": 78.9629},
-                zoom=4, 
-                mapbox_style="carto-darkmatter",
-                color_continuous_scale='Viridis'
-            )
-            fig5.update_layout(
-                title="Earthquake Density Map",
-                margin={"r":0, "t":40, "l":0, "b":0},
-                height=500
-            )
-            st.plotly_chart(fig5, use_container_width=True)
+            with timed("Chart: density map"):
+                st.markdown("**Density of Earthquake Locations**")
+                # Cells two levels finer than the zoom-4 view keep the heatmap faithful;
+                # weighting each by its magnitude sum matches per-event weights
+                density_data, density_aggregated = get_map_pyramid().view(6, filtered_rows, value_column='mag')
+                fig5 = px.density_mapbox(
+                    density_data, 
+                    lat='latitude', 
+                    lon='longitude', 
+                    z='mag_sum' if density_aggregated else 'mag', 
+                    radius=10,
+                    center={"lat": 20.5937, "lon": 78.9629},
+                    zoom=4, 
+                    mapbox_style="carto-darkmatter",
+                    color_continuous_scale='Viridis'
+                )
+                fig5.update_layout(
+                    title="Earthquake Density Map",
+                    margin={"r":0, "t":40, "l":0, "b":0},
+                    height=500
+                )
+                st.plotly_chart(fig5, use_container_width=True)
 
     with tab3:
         # Data table with search
         st.markdown("#### Earthquake Data Explorer")
         search_term = st.text_input("🔍 Search by location:", "")
-        if search_term:
-            search_results = filtered_df[filtered_df['place'].str.contains(search_term, case=False)]
-            st.dataframe(search_results, use_container_width=True)
+        # Index lookup (prefix, substring or near-miss on each word), limited to the filtered rows
+        with timed("Place search"):
+            search_rows = get_place_index().search(search_term, filtered_rows)
+        if search_rows is not None:
+            search_results = catalog.frame.iloc[search_rows]
+            st.caption(f"{len(search_results):,} matching earthquakes")
+            st.dataframe(search_results, use_container_width=True, hide_index=True)
         else:
-            st.dataframe(filtered_df, use_container_width=True)
+            st.dataframe(filtered_df, use_container_width=True, hide_index=True)
 else:
     st.error("No data available. Please check the data source and try again.")
 
@@ -414,3 +527,11 @@ if df.empty:
     
     Please check the data source and try again.
     """)
+
+# Optional debug panel: where this run's time went
+if st.sidebar.checkbox("⏱️ Show load timings", help="Per-stage timing breakdown of this page run"):
+    with st.expander("⏱️ Load timings", expanded=True):
+        st.caption(f"This run took {timer.elapsed * 1000:,.0f} ms. "
+                   f"Loaders served from cache do not appear.")
+        st.dataframe(pd.DataFrame(timer.breakdown()), hide_index=True, use_container_width=True)
+timer.deactivate()
@@ -5,10 +5,11 @@ import numpy as np
 import requests
 import datetime
 import time
-from pathlib import Path
 import json
 import io
 import os
+import datastore
+from geo_filter import INDIA_BBOX, filter_india
 
 # Page configuration
 st.set_page_config(
@@ -182,6 +183,42 @@ data_source = st.sidebar.radio(
     ["USGS API", "EMSC API", "Local CSV File", "Upload CSV"]
 )
 
+# Function to standardize column names for latitude, longitude, magnitude, etc.
+def standardize_columns(df):
+    rename_map = {}
+
+    # Latitude
+    for lat_col in ['latitude', 'lat', 'LAT']:
+        if lat_col in df.columns:
+            rename_map[lat_col] = 'latitude'
+            break
+
+    # Longitude
+    for lon_col in ['longitude', 'lon', 'LONG_', 'long', 'LON']:
+        if lon_col in df.columns:
+            rename_map[lon_col] = 'longitude'
+            break
+
+    # Magnitude
+    for mag_col in ['mag', 'MAGMB', 'magnitude', 'MW', 'mb']:
+        if mag_col in df.columns:
+            rename_map[mag_col] = 'mag'
+            break
+
+    # Depth
+    for depth_col in ['depth', 'DEPTH_KM', 'depth_km']:
+        if depth_col in df.columns:
+            rename_map[depth_col] = 'depth'
+            break
+
+    # Time
+    for time_col in ['time', 'TIME', 'event_time', 'datetime', 'DATE']:
+        if time_col in df.columns:
+            rename_map[time_col] = 'time'
+            break
+
+    return df.rename(columns=rename_map)
+
 # Function to load data from various sources
 @st.cache_data(ttl=300)  # Cache data for 5 minutes
 def load_earthquake_data(source, uploaded_file=None):
@@ -194,10 +231,7 @@ def load_earthquake_data(source, uploaded_file=None):
                 "format": "geojson",
                 "starttime": (datetime.datetime.now() - datetime.timedelta(days=30)).strftime("%Y-%m-%d"),
                 "endtime": datetime.datetime.now().strftime("%Y-%m-%d"),
-                "minlatitude": 6.5,
-                "maxlatitude": 35.5,
-                "minlongitude": 68.0,
-                "maxlongitude": 97.5,
+                **INDIA_BBOX,
                 "minmagnitude": 2.5
             }
             
@@ -211,23 +245,21 @@ def load_earthquake_data(source, uploaded_file=None):
                     props = feature['properties']
                     coords = feature['geometry']['coordinates']
                     
-                    # Check if the place contains India or is in the India region
-                    place = props.get('place', '').lower()
-                    if 'india' in place or any(region in place for region in ['kashmir', 'delhi', 'mumbai', 'kolkata', 'chennai', 'himalayas']):
-                        earthquakes.append({
-                            'time': datetime.datetime.fromtimestamp(props['time']/1000).strftime('%Y-%m-%d %H:%M:%S'),
-                            'place': props['place'],
-                            'mag': props['mag'],
-                            'depth': coords[2],
-                            'latitude': coords[1],
-                            'longitude': coords[0],
-                            'status': props['status'],
-                            'tsunami': props['tsunami'],
-                            'felt': props.get('felt', None),
-                            'source': 'USGS'
-                        })
+                    earthquakes.append({
+                        'time': datetime.datetime.fromtimestamp(props['time']/1000).strftime('%Y-%m-%d %H:%M:%S'),
+                        'place': props['place'],
+                        'mag': props['mag'],
+                        'depth': coords[2],
+                        'latitude': coords[1],
+                        'longitude': coords[0],
+                        'status': props['status'],
+                        'tsunami': props['tsunami'],
+                        'felt': props.get('felt', None),
+                        'source': 'USGS'
+                    })
                 
-                return pd.DataFrame(earthquakes)
+                # Keep events inside India's boundary, not just the query box
+                return filter_india(pd.DataFrame(earthquakes))
             else:
                 st.error(f"API Error: {response.status_code}")
                 return pd.DataFrame()
@@ -239,10 +271,10 @@ def load_earthquake_data(source, uploaded_file=None):
                 "format": "json",
                 "start": (datetime.datetime.now() - datetime.timedelta(days=30)).strftime("%Y-%m-%d"),
                 "end": datetime.datetime.now().strftime("%Y-%m-%d"),
-                "minlat": 6.5,
-                "maxlat": 35.5,
-                "minlon": 68.0,
-                "maxlon": 97.5,
+                "minlat": INDIA_BBOX["minlatitude"],
+                "maxlat": INDIA_BBOX["maxlatitude"],
+                "minlon": INDIA_BBOX["minlongitude"],
+                "maxlon": INDIA_BBOX["maxlongitude"],
                 "minmag": 2.5
             }
             
@@ -250,67 +282,47 @@ def load_earthquake_data(source, uploaded_file=None):
             if response.status_code == 200:
                 data = response.json()
                 
-                # Filter for events in India
                 earthquakes = []
                 for event in data['features']:
                     props = event['properties']
                     coords = event['geometry']['coordinates']
                     
-                    # Filter for India region
-                    place = props.get('flynn_region', '').lower()
-                    if 'india' in place or any(region in place for region in ['kashmir', 'delhi', 'mumbai', 'kolkata', 'chennai', 'himalayas']):
-                        earthquakes.append({
-                            'time': props['time'].replace('T', ' ').split('.')[0],
-                            'place': props.get('flynn_region', 'Unknown'),
-                            'mag': props['mag'],
-                            'depth': coords[2],
-                            'latitude': coords[1],
-                            'longitude': coords[0],
-                            'status': props.get('status', 'unknown'),
-                            'tsunami': 0,  # EMSC doesn't provide this directly
-                            'felt': props.get('felt', None),
-                            'source': 'EMSC'
-                        })
+                    earthquakes.append({
+                        'time': props['time'].replace('T', ' ').split('.')[0],
+                        'place': props.get('flynn_region', 'Unknown'),
+                        'mag': props['mag'],
+                        'depth': coords[2],
+                        'latitude': coords[1],
+                        'longitude': coords[0],
+                        'status': props.get('status', 'unknown'),
+                        'tsunami': 0,  # EMSC doesn't provide this directly
+                        'felt': props.get('felt', None),
+                        'source': 'EMSC'
+                    })
                 
-                return pd.DataFrame(earthquakes)
+                return filter_india(pd.DataFrame(earthquakes))
             else:
                 st.error(f"API Error: {response.status_code}")
                 return pd.DataFrame()
                 
         elif source == "Local CSV File":
-            # Try multiple possible locations for earthquake.csv
-            possible_paths = [
-                Path("data/earthquake.csv"),
-                Path("myproject/data/earthquake.csv"),
-                Path(__file__).parent.parent / "data" / "earthquake.csv" if __file__ else Path("data/earthquake.csv"),
-                Path(__file__).parent.parent / "models" / "earthquake.csv" if __file__ else Path("models/earthquake.csv"),
-                Path("../data/earthquake.csv"),
-                Path("models/earthquake.csv"),
-                Path("earthquake.csv")
-            ]
-            
-            for path in possible_paths:
-                if path.exists():
-                    df = pd.read_csv(path)
-                    # Filter for India data if place column exists
-                    if 'place' in df.columns:
-                        df = df[df['place'].str.contains('India', case=False, na=False)]
-                    # Convert time to datetime if needed
-                    if 'time' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['time']):
-                        df['time'] = pd.to_datetime(df['time'], errors='coerce')
-                        df['time'] = df['time'].dt.strftime('%Y-%m-%d %H:%M:%S')
-                    # Add source column
-                    df['source'] = 'CSV File'
-                    return df
+            # Shared India catalog from the datastore (parsed once per process)
+            if datastore.is_available("catalog"):
+                # Newest first, as in the source file; times as display strings
+                df = datastore.earthquake_catalog().iloc[::-1].reset_index(drop=True)
+                df['time'] = df['time'].dt.strftime('%Y-%m-%d %H:%M:%S')
+                # Add source column
+                df['source'] = 'CSV File'
+                return df
             
-            st.error("❌ earthquake.csv not found in any of the expected locations")
+            st.error(f"❌ earthquake.csv not found (looked in {datastore.searched_locations('catalog')})")
             return pd.DataFrame()
             
         elif source == "Upload CSV" and uploaded_file is not None:
-            df = pd.read_csv(uploaded_file)
-            # Filter for India data if needed
-            if 'place' in df.columns:
-                df = df[df['place'].str.contains('India', case=False, na=False)]
+            df = standardize_columns(pd.read_csv(uploaded_file))
+            # Filter for India data by coordinates when they are available
+            if {'latitude', 'longitude'}.issubset(df.columns):
+                df = filter_india(df)
             # Convert time to datetime if needed
             if 'time' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['time']):
                 df['time'] = pd.to_datetime(df['time'], errors='coerce')
@@ -335,44 +347,6 @@ if data_source == "Upload CSV":
     if uploaded_file is None:
         st.warning("Please upload a CSV file containing earthquake data")
 
-# Load data based on selected source
-# (Imports and CSS remain unchanged above this point...)
-# Function to standardize column names for latitude, longitude, magnitude, etc.
-def standardize_columns(df):
-    rename_map = {}
-
-    # Latitude
-    for lat_col in ['latitude', 'lat', 'LAT']:
-        if lat_col in df.columns:
-            rename_map[lat_col] = 'latitude'
-            break
-
-    # Longitude
-    for lon_col in ['longitude', 'lon', 'LONG_', 'long', 'LON']:
-        if lon_col in df.columns:
-            rename_map[lon_col] = 'longitude'
-            break
-
-    # Magnitude
-    for mag_col in ['mag', 'MAGMB', 'magnitude', 'MW', 'mb']:
-        if mag_col in df.columns:
-            rename_map[mag_col] = 'mag'
-            break
-
-    # Depth
-    for depth_col in ['depth', 'DEPTH_KM', 'depth_km']:
-        if depth_col in df.columns:
-            rename_map[depth_col] = 'depth'
-            break
-
-    # Time
-    for time_col in ['time', 'TIME', 'event_time', 'datetime', 'DATE']:
-        if time_col in df.columns:
-            rename_map[time_col] = 'time'
-            break
-
-    return df.rename(columns=rename_map)
-    
 # Load data based on selected source
 with st.spinner("Fetching earthquake data..."):
     df = load_earthquake_data(data_source, uploaded_file)
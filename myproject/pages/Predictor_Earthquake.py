@@ -4,10 +4,14 @@ import numpy as np
 import os
 import pickle
 import io
+from pathlib import Path
 from sklearn.metrics import mean_absolute_error, r2_score
 from sklearn.preprocessing import StandardScaler
 import plotly.express as px
 import plotly.graph_objects as go
+import datastore
+from data_export import export_controls, export_fingerprint, file_signature
+from map_aggregation import MapPyramid, viewport_bounds
 
 # Safely import Keras/TensorFlow
 try:
@@ -17,10 +21,10 @@ except ImportError:
     load_model = None  # Ensure load_model is always defined
     KERAS_AVAILABLE = False
 
-# Centralized model and data paths
-MODELS_DIR = r"Susceptability_pred_ML"
-LABELED_DATA_PATH = os.path.join(MODELS_DIR, "earthquakes_labeled.csv")
-FEATURES_DATA_PATH = os.path.join(MODELS_DIR, "EarthquakeFeatures.csv")
+# Centralized model and data paths (resolved by the datastore)
+MODELS_DIR = str(datastore.model_directory() or "Susceptability_pred_ML")
+LABELED_DATA_PATH = datastore.dataset_path("labeled")
+FEATURES_DATA_PATH = datastore.dataset_path("features")
 
 # -----------------------------
 # Custom CSS
@@ -129,19 +133,18 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
 def load_data():
-    """Loads the earthquake datasets with caching."""
+    """The shared earthquake datasets (loaded once per process by the datastore)."""
     try:
-        if not os.path.exists(FEATURES_DATA_PATH):
-            st.error(f"Features data file not found at: {FEATURES_DATA_PATH}")
+        if FEATURES_DATA_PATH is None:
+            st.error(f"Features data file not found (looked in {datastore.searched_locations('features')})")
             return None, None
         
-        earthquake_data = pd.read_csv(FEATURES_DATA_PATH)
+        earthquake_data = datastore.earthquake_features()
         
         labeled_data = None
-        if os.path.exists(LABELED_DATA_PATH):
-            labeled_data = pd.read_csv(LABELED_DATA_PATH)
+        if LABELED_DATA_PATH is not None:
+            labeled_data = datastore.labeled_earthquakes()
         
         return earthquake_data, labeled_data
     except Exception as e:
@@ -204,12 +207,12 @@ def prepare_data(labeled_data, features):
 @st.cache_data
 def evaluate_models():
     """Evaluates models and returns their performance metrics."""
-    if not os.path.exists(LABELED_DATA_PATH):
+    if LABELED_DATA_PATH is None:
         st.warning("Labeled data for evaluation not found.")
         return None
     
     try:
-        test_data = pd.read_csv(LABELED_DATA_PATH)
+        test_data = datastore.labeled_earthquakes()
         features = get_model_features(test_data)
         
         if features is None:
@@ -440,13 +443,15 @@ def main():
         st.subheader("📋 Data Preview")
         st.dataframe(earthquake_data.head(20))
         
-        # Download button
-        csv_data = earthquake_data.to_csv(index=False)
-        st.download_button(
-            label="📥 Download Dataset",
-            data=csv_data,
-            file_name="earthquake_features.csv",
-            mime="text/csv"
+        # Download button (serialized only when requested)
+        export_controls(
+            "Download Dataset",
+            earthquake_data,
+            export_fingerprint("features", file_signature(FEATURES_DATA_PATH)),
+            "earthquake_features",
+            formats=("csv", "parquet", "geojson"),
+            key="features_export",
+            geojson_columns={"lat_column": "LAT", "lon_column": "LONG_"}
         )
         
         # Show additional datasets if available
@@ -458,15 +463,16 @@ def main():
                 selected_file = st.selectbox("Select additional dataset:", csv_files)
                 if selected_file:
                     try:
-                        additional_df = pd.read_csv(os.path.join(MODELS_DIR, selected_file))
+                        additional_path = os.path.join(MODELS_DIR, selected_file)
+                        additional_df = datastore.load_file(Path(additional_path))
                         st.dataframe(additional_df.head(10))
                         
-                        additional_csv = additional_df.to_csv(index=False)
-                        st.download_button(
-                            label=f"📥 Download {selected_file}",
-                            data=additional_csv,
-                            file_name=selected_file,
-                            mime="text/csv"
+                        export_controls(
+                            f"Download {selected_file}",
+                            additional_df,
+                            export_fingerprint("dataset", file_signature(additional_path)),
+                            os.path.splitext(selected_file)[0],
+                            key="additional_export"
                         )
                     except Exception as e:
                         st.error(f"Error loading {selected_file}: {e}")
@@ -517,13 +523,14 @@ def main():
                 st.subheader("📋 Risk Analysis Data")
                 st.dataframe(df_risk.head(20))
                 
-                # Download button
-                risk_csv = df_risk.to_csv(index=False)
-                st.download_button(
-                    label="📥 Download Risk Analysis",
-                    data=risk_csv,
-                    file_name="earthquake_risk_analysis.csv",
-                    mime="text/csv"
+                # Download button (serialized only when requested)
+                export_controls(
+                    "Download Risk Analysis",
+                    df_risk,
+                    export_fingerprint("risk_analysis", file_signature(LABELED_DATA_PATH)),
+                    "earthquake_risk_analysis",
+                    formats=("csv", "parquet"),
+                    key="risk_export"
                 )
                 
                 # Risk visualizations
@@ -549,8 +556,8 @@ def main():
             st.markdown("*Visualize earthquake predictions from various ML models for the next 25-100 years*")
             
             # File paths for prediction data
-            main_path = r"myproject/data/future_earthquake_predictions_100years.csv"
-            pinn_path = r"myproject/data/future_earthquake_predictions_india_25years_2025_2050.csv"
+            main_path = datastore.dataset_path("rf_predictions")
+            pinn_path = datastore.dataset_path("pinn_predictions")
             
             # Model-specific column mappings
             model_options = {
@@ -573,16 +580,18 @@ def main():
             # Load correct dataset
             try:
                 if model == "PINN":
-                    if not os.path.exists(pinn_path):
-                        st.error(f"PINN prediction file not found at: {pinn_path}")
+                    if pinn_path is None:
+                        st.error(f"PINN prediction file not found (looked in {datastore.searched_locations('pinn_predictions')})")
                         st.stop()
-                    df_pred = pd.read_csv(pinn_path)
+                    df_pred = datastore.pinn_predictions()
+                    prediction_path = pinn_path
                     st.success(f"✅ Loaded PINN predictions (25 years: 2025-2050)")
                 else:
-                    if not os.path.exists(main_path):
-                        st.error(f"Main prediction file not found at: {main_path}")
+                    if main_path is None:
+                        st.error(f"Main prediction file not found (looked in {datastore.searched_locations('rf_predictions')})")
                         st.stop()
-                    df_pred = pd.read_csv(main_path)
+                    df_pred = datastore.rf_predictions()
+                    prediction_path = main_path
                     st.success(f"✅ Loaded {model} predictions (100 years)")
                 
                 lat_col, lon_col, mag_col = model_options[model]
@@ -623,6 +632,8 @@ def main():
                     step=0.1
                 )
                 df_pred = df_pred[(df_pred[mag_col] >= mag_range[0]) & (df_pred[mag_col] <= mag_range[1])]
+                # Identifies the filtered view for the export cache
+                prediction_filters = {"mag_range": mag_range}
                 
                 # === PINN-specific Filters ===
                 if model == "PINN":
@@ -633,18 +644,21 @@ def main():
                             decade = st.multiselect("📅 Select Decade", sorted(df_pred['decade'].dropna().unique()))
                             if decade:
                                 df_pred = df_pred[df_pred['decade'].isin(decade)]
+                                prediction_filters['decade'] = decade
                                 filter_applied = True
                         
                         if 'regional_zone' in df_pred.columns:
                             region = st.multiselect("🗺️ Select Regional Zone", sorted(df_pred['regional_zone'].dropna().unique()))
                             if region:
                                 df_pred = df_pred[df_pred['regional_zone'].isin(region)]
+                                prediction_filters['regional_zone'] = region
                                 filter_applied = True
                         
                         if 'risk_category' in df_pred.columns:
                             risk = st.multiselect("⚠️ Select Risk Category", sorted(df_pred['risk_category'].dropna().unique()))
                             if risk:
                                 df_pred = df_pred[df_pred['risk_category'].isin(risk)]
+                                prediction_filters['risk_category'] = risk
                                 filter_applied = True
                         
                         if filter_applied:
@@ -658,34 +672,71 @@ def main():
                 # === Map Visualization ===
                 st.subheader(f"🗺️ {model} Earthquake Predictions Map")
                 
-                # Create the map
-                fig = px.scatter_mapbox(
-                    df_pred,
-                    lat=lat_col,
-                    lon=lon_col,
-                    color=mag_col,
-                    size=mag_col,
-                    color_continuous_scale="OrRd",
-                    zoom=4,
-                    height=700,
-                    title=f"📌 Future Predicted Earthquakes using {model} Model",
-                    hover_data={
-                        lat_col: ':.3f',
-                        lon_col: ':.3f', 
-                        mag_col: ':.2f'
-                    },
-                    labels={
-                        lat_col: 'Latitude',
-                        lon_col: 'Longitude',
-                        mag_col: 'Predicted Magnitude'
-                    }
+                zoom_input, lat_input, lon_input = st.columns(3)
+                map_zoom = zoom_input.slider("Map zoom", min_value=3, max_value=12, value=4)
+                center_lat = lat_input.number_input("Centre latitude", -90.0, 90.0, 20.5937)  # Center on India
+                center_lon = lon_input.number_input("Centre longitude", -180.0, 180.0, 78.9629)
+                
+                # Raw predictions when few are in view, grid cells otherwise
+                map_data, aggregated = MapPyramid(df_pred, lat_col, lon_col).view(
+                    map_zoom, bounds=viewport_bounds(center_lat, center_lon, map_zoom),
+                    value_column=mag_col
                 )
                 
+                # Create the map
+                if aggregated:
+                    st.caption(f"Showing {map_data['count'].sum():,} predictions as {len(map_data):,} grid cells "
+                               f"(size = predictions, colour = strongest magnitude); zoom in for individual points")
+                    fig = px.scatter_mapbox(
+                        map_data,
+                        lat=lat_col,
+                        lon=lon_col,
+                        color=f"{mag_col}_max",
+                        size="count",
+                        size_max=25,
+                        color_continuous_scale="OrRd",
+                        zoom=map_zoom,
+                        height=700,
+                        title=f"📌 Future Predicted Earthquakes using {model} Model",
+                        hover_data={
+                            "count": True,
+                            mag_col: ':.2f',
+                            f"{mag_col}_max": ':.2f'
+                        },
+                        labels={
+                            "count": 'Predictions',
+                            mag_col: 'Mean Predicted Magnitude',
+                            f"{mag_col}_max": 'Predicted Magnitude'
+                        }
+                    )
+                else:
+                    fig = px.scatter_mapbox(
+                        map_data,
+                        lat=lat_col,
+                        lon=lon_col,
+                        color=mag_col,
+                        size=mag_col,
+                        color_continuous_scale="OrRd",
+                        zoom=map_zoom,
+                        height=700,
+                        title=f"📌 Future Predicted Earthquakes using {model} Model",
+                        hover_data={
+                            lat_col: ':.3f',
+                            lon_col: ':.3f', 
+                            mag_col: ':.2f'
+                        },
+                        labels={
+                            lat_col: 'Latitude',
+                            lon_col: 'Longitude',
+                            mag_col: 'Predicted Magnitude'
+                        }
+                    )
+                
                 fig.update_layout(
                     mapbox_style="carto-positron",
                     mapbox=dict(
-                        center=dict(lat=20.5937, lon=78.9629),  # Center on India
-                        zoom=4
+                        center=dict(lat=center_lat, lon=center_lon),
+                        zoom=map_zoom
                     ),
                     title=dict(x=0.5, font=dict(size=16)),
                     coloraxis_colorbar=dict(
@@ -753,16 +804,16 @@ def main():
                     ]
                 })
                 
-                # Create comprehensive export data
-                export_data = df_pred.copy()
-                
-                # Prepare download
-                csv_data = export_data.to_csv(index=False)
-                st.download_button(
-                    label=f"📥 Download {model} Predictions (Filtered)",
-                    data=csv_data,
-                    file_name=f"{model.lower()}_earthquake_predictions_filtered.csv",
-                    mime="text/csv"
+                # Prepare download (serialized only when requested)
+                export_controls(
+                    f"Download {model} Predictions (Filtered)",
+                    df_pred,
+                    export_fingerprint("predictions", model, file_signature(prediction_path),
+                                       prediction_filters),
+                    f"{model.lower().replace(' ', '_')}_earthquake_predictions_filtered",
+                    formats=("csv", "parquet", "geojson"),
+                    key="predictions_export",
+                    geojson_columns={"lat_column": lat_col, "lon_column": lon_col}
                 )
                 
                 # Show summary table
@@ -1244,12 +1295,17 @@ def main():
         st.subheader("🗺️ Actual Earthquake Distribution Map")
         st.markdown("**All earthquake events plotted with density-based visualization:**")
         
+        # Grid cells two levels finer than the zoom-4 view keep the heatmap
+        # faithful; weighting each by its magnitude sum matches per-event weights
+        region_pyramid = MapPyramid(main_regions_data, 'LAT', 'LONG_')
+        density_data, density_aggregated = region_pyramid.view(6, value_column='mag')
+        
         # Create earthquake points map with density visualization
         fig_earthquake_points = px.density_mapbox(
-            main_regions_data,
+            density_data,
             lat='LAT',
             lon='LONG_',
-            z='mag',
+            z='mag_sum' if density_aggregated else 'mag',
             radius=10,
             center=dict(lat=20.5937, lon=78.9629),
             zoom=4,
@@ -1275,19 +1331,20 @@ def main():
         # 5. Individual earthquake points with risk-based coloring
         st.markdown("**Individual earthquake events with risk classification:**")
         
-        # Sample data if too many points (for performance)
-        display_data = main_regions_data.copy()
-        if len(display_data) > 1000:
-            display_data = display_data.sample(n=1000, random_state=42)
-            st.info(f"📊 Showing sample of 1000 points from {len(main_regions_data)} total earthquakes for better performance")
+        # Aggregate to grid cells when there are too many points to draw
+        # (every event is counted, unlike a random sample)
+        display_data, aggregated = region_pyramid.view(4, value_column='mag', category_column='Risk Level')
+        if aggregated:
+            st.info(f"📊 Showing all {len(main_regions_data):,} earthquakes as {len(display_data):,} grid cells, "
+                    f"coloured by each cell's most common risk level and sized by event count")
         
         fig_scatter_map = px.scatter_mapbox(
             display_data,
             lat='LAT',
             lon='LONG_',
             color='Risk Level',
-            size='mag',
-            hover_data=['Region', 'mag', 'Risk Level'],
+            size='count' if aggregated else 'mag',
+            hover_data=['count', 'mag', 'mag_max', 'Risk Level'] if aggregated else ['Region', 'mag', 'Risk Level'],
             color_discrete_map={'High': '#FF0000', 'Moderate': '#FF8C00', 'Low': '#32CD32'},
             zoom=4,
             center=dict(lat=20.5937, lon=78.9629),
@@ -1,11 +1,10 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
-import os
 from geopy.geocoders import Nominatim
 from geopy.distance import geodesic
 import plotly.express as px
+import datastore
 
 # ---- Setup ----
 st.set_page_config(page_title="Earthquake Susceptibility Predictor", layout="centered")
@@ -113,34 +112,15 @@ st.markdown("""
 
 st.title("🌍 Earthquake Susceptibility Predictor")
 
-# Use current directory for models
-MODELS_DIR = "."
-
-@st.cache_resource
 def load_resources():
-    model_path = os.path.join(MODELS_DIR, "Susceptability_pred_ML/EarthquakePredictor.pkl")
-    scaler_fd_path = os.path.join(MODELS_DIR, "Susceptability_pred_ML/fault_density_scaler.pkl")
-    scaler_hd_path = os.path.join(MODELS_DIR, "Susceptability_pred_ML/hubdist_scaler.pkl")
-    scaler_mag_path = os.path.join(MODELS_DIR, "Susceptability_pred_ML/mag_scaler.pkl")
-    data_path = os.path.join(MODELS_DIR, "Susceptability_pred_ML/EarthquakeFeatures.csv")
-
-    for path, name in [
-        (model_path, "EarthquakePredictor.pkl"),
-        (scaler_fd_path, "fault_density_scaler.pkl"),
-        (scaler_hd_path, "hubdist_scaler.pkl"),
-        (scaler_mag_path, "mag_scaler.pkl"),
-        (data_path, "EarthquakeFeatures.csv"),
-    ]:
-        if not os.path.exists(path):
-            st.error(f"Missing file: {name}")
+    """Shared model, scalers and features dataset (loaded once per process by the datastore)"""
+    for name in ("susceptibility_model", "fault_density_scaler", "hubdist_scaler", "mag_scaler", "features"):
+        if not datastore.is_available(name):
+            st.error(f"Missing file: {datastore.DATASET_FILES[name].filename}")
             st.stop()
 
-    model_with_cols = joblib.load(model_path)
-    model, expected_columns = model_with_cols
-    scaler_fd = joblib.load(scaler_fd_path)
-    scaler_hd = joblib.load(scaler_hd_path)
-    scaler_mag = joblib.load(scaler_mag_path)
-    df = pd.read_csv(data_path)
+    model, expected_columns, scaler_fd, scaler_hd, scaler_mag = datastore.susceptibility_model()
+    df = datastore.earthquake_features()
     return model, expected_columns, scaler_fd, scaler_hd, scaler_mag, df
 
 try:
@@ -173,11 +153,12 @@ if place:
         mag_col = "MAGMB"  # Based on CSV structure
 
         # Calculate distance to all earthquake points
-        df["distance"] = df.apply(
+        # The features frame is shared across sessions, so distances go on a copy
+        df = df.assign(distance=df.apply(
             lambda r: geodesic((lat, lon), (r[lat_col], r[lon_col])).meters
             if pd.notna(r[lat_col]) and pd.notna(r[lon_col]) else float('inf'),
             axis=1
-        )
+        ))
         
         # Get top 3 nearest points
         top3 = df.nsmallest(3, "distance")
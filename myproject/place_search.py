@@ -0,0 +1,183 @@
+"""
+Place Search Index
+Inverted index over a catalog's free-text `place` column for the data
+explorer's location search. Places repeat heavily ("10 km NE of X"), so
+the index is built over the distinct strings: word tokens with a sorted
+token list for prefix lookups and a trigram index for substring and
+typo-tolerant matches, plus each place's row positions. A query resolves
+to sorted row positions that intersect directly with `CatalogIndex`
+filter results.
+"""
+
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Iterable, List, Optional, Set, Union
+
+import numpy as np
+import pandas as pd
+
+TOKEN_PATTERN = re.compile(r"[0-9a-z]+")
+
+Rows = Union[slice, np.ndarray, None]
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _trigrams(token: str, padded: bool = True) -> Set[str]:
+    """Character trigrams; padding adds grams that anchor the token's ends"""
+    text = f"  {token} " if padded else token
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _within_edits(a: str, b: str, max_edits: int) -> bool:
+    """Levenshtein distance of a and b is at most max_edits"""
+    if abs(len(a) - len(b)) > max_edits:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_edits:
+            return False
+        previous = current
+    return previous[-1] <= max_edits
+
+
+class PlaceIndex:
+    """
+    Token and trigram index over the distinct values of a place column.
+
+    Every query term must match (AND). A term matches tokens it is a
+    prefix or substring of (terms under three characters, which have no
+    trigram, scan the token list); with `fuzzy`, a term that matches nothing
+    falls back to tokens within one edit (two for terms of 8+ characters).
+    A multi-word query is a phrase: unless a term needed the fuzzy
+    fallback, the terms must also appear adjacent and in order in the
+    place ("NE of" does not match "Nepal ... of").
+    """
+
+    def __init__(self, places: Iterable[str]):
+        codes, uniques = pd.factorize(pd.Series(places, dtype=object), use_na_sentinel=True)
+        self.places = [str(place) for place in uniques]
+
+        postings = defaultdict(set)
+        for place_id, place in enumerate(self.places):
+            for token in tokenize(place):
+                postings[token].add(place_id)
+        self.tokens = sorted(postings)
+        self.postings = [np.fromiter(sorted(postings[token]), dtype=np.int64)
+                         for token in self.tokens]
+
+        grams = defaultdict(list)
+        for token_id, token in enumerate(self.tokens):
+            for gram in _trigrams(token):
+                grams[gram].append(token_id)
+        self.trigrams = {gram: np.asarray(ids, dtype=np.int64) for gram, ids in grams.items()}
+
+        # Row positions grouped by place; place p owns row_order[offsets[p]:offsets[p + 1]]
+        codes = np.asarray(codes, dtype=np.int64)
+        self.row_order = np.argsort(codes, kind="stable")
+        self.row_offsets = np.searchsorted(codes[self.row_order], np.arange(len(self.places) + 1))
+
+    def _prefix_tokens(self, term: str) -> Set[int]:
+        matches = set()
+        i = bisect_left(self.tokens, term)
+        while i < len(self.tokens) and self.tokens[i].startswith(term):
+            matches.add(i)
+            i += 1
+        return matches
+
+    def _substring_tokens(self, term: str) -> Set[int]:
+        grams = _trigrams(term, padded=False)
+        if not grams:
+            # Too short for a trigram: scan the distinct tokens, as a
+            # substring match over the place strings would
+            return {i for i, token in enumerate(self.tokens) if term in token}
+        candidates = None
+        for gram in grams:
+            ids = self.trigrams.get(gram)
+            if ids is None:
+                return set()
+            candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+        return {int(i) for i in candidates if term in self.tokens[i]}
+
+    def _fuzzy_tokens(self, term: str) -> Set[int]:
+        max_edits = 2 if len(term) >= 8 else 1
+        if len(term) < 4:
+            return set()
+        grams = _trigrams(term)
+        shared = Counter()
+        for gram in grams:
+            ids = self.trigrams.get(gram)
+            if ids is not None:
+                shared.update(ids.tolist())
+        # Each edit destroys at most three of the padded trigrams
+        needed = max(1, len(grams) - 3 * max_edits)
+        return {token_id for token_id, count in shared.items()
+                if count >= needed and _within_edits(term, self.tokens[token_id], max_edits)}
+
+    def _term_tokens(self, term: str, fuzzy: bool) -> Set[int]:
+        ids = self._prefix_tokens(term) | self._substring_tokens(term)
+        if not ids and fuzzy:
+            ids = self._fuzzy_tokens(term)
+        return ids
+
+    def _phrase_places(self, places: np.ndarray, terms: List[str]) -> np.ndarray:
+        """The places whose token text contains the terms as one phrase"""
+        phrase = " ".join(terms)
+        keep = [i for i, place_id in enumerate(places)
+                if phrase in " ".join(tokenize(self.places[place_id]))]
+        return places[keep]
+
+    def match_tokens(self, term: str, fuzzy: bool = True) -> List[str]:
+        """Index tokens a single query term matches"""
+        return [self.tokens[i] for i in sorted(self._term_tokens(term, fuzzy))]
+
+    def match_places(self, query: str, fuzzy: bool = True) -> Optional[np.ndarray]:
+        """Sorted ids of distinct places matching every term (None for an empty query)"""
+        terms = tokenize(query)
+        if not terms:
+            return None
+        matched = None
+        exact = True
+        for term in dict.fromkeys(terms):
+            ids = self._term_tokens(term, fuzzy=False)
+            if not ids and fuzzy:
+                ids = self._fuzzy_tokens(term)
+                exact = False
+            if not ids:
+                return np.empty(0, dtype=np.int64)
+            places = np.unique(np.concatenate([self.postings[i] for i in ids]))
+            matched = places if matched is None else np.intersect1d(matched, places, assume_unique=True)
+            if len(matched) == 0:
+                break
+        if len(terms) > 1 and exact and len(matched):
+            # The token postings only prove each term occurs somewhere
+            matched = self._phrase_places(matched, terms)
+        return matched
+
+    def search(self, query: str, rows: Rows = None, fuzzy: bool = True) -> Optional[np.ndarray]:
+        """
+        Sorted row positions whose place matches `query`, restricted to
+        `rows` (a slice or sorted position array, e.g. from
+        `CatalogIndex.positions`). Returns None for an empty query.
+        """
+        places = self.match_places(query, fuzzy)
+        if places is None:
+            return None
+        if len(places) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        starts, stops = self.row_offsets[places], self.row_offsets[places + 1]
+        found = np.sort(np.concatenate([self.row_order[a:b] for a, b in zip(starts, stops)]))
+        if rows is None:
+            return found
+        if isinstance(rows, slice):
+            start = rows.start or 0
+            stop = len(self.row_order) if rows.stop is None else rows.stop
+            return found[(found >= start) & (found < stop)]
+        return np.intersect1d(found, rows, assume_unique=True)
@@ -0,0 +1,285 @@
+"""
+Messaging Provider Health
+Per-provider circuit breakers and AIMD (additive-increase /
+multiplicative-decrease) concurrency limits. A provider that starts timing
+out or answering 429 is given less concurrency, and is taken out of
+rotation entirely while its recent error rate stays high, so dispatch can
+fail over to another channel instead of queueing behind it.
+"""
+
+import threading
+import time
+import logging
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderThrottled(Exception):
+    """The provider asked us to slow down (HTTP 429 or equivalent)"""
+
+
+class ProviderUnavailable(Exception):
+    """The provider's circuit is open (or its probe slot is taken); the call was not attempted"""
+
+
+class MessageRejected(Exception):
+    """
+    The provider refused this one message (an invalid number, say). It
+    answered, so the rejection says nothing about the provider's health.
+    """
+
+
+class CircuitBreaker:
+    """
+    Opens when the failure rate over the last `window` calls reaches
+    `failure_rate` (after at least `min_calls`). After `cooldown_seconds`
+    one probe call is let through; success closes the circuit, failure
+    opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_rate: float = 0.5, window: int = 20, min_calls: int = 5,
+                 cooldown_seconds: float = 30):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown_seconds = cooldown_seconds
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._cooled_down():
+                return self.HALF_OPEN
+            return self._state
+
+    def _cooled_down(self) -> bool:
+        return time.monotonic() - self._opened_at >= self.cooldown_seconds
+
+    def allow(self) -> bool:
+        """Whether a call may be made now (claims the probe slot when half-open)"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._cooled_down():
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record(self, ok: bool):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if ok:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if (self._state == self.CLOSED and len(self._outcomes) >= self.min_calls and
+                    failures / len(self._outcomes) >= self.failure_rate):
+                self._open()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.times_opened += 1
+
+
+class AimdLimiter:
+    """
+    Concurrency limit that grows by about one slot per limit's worth of
+    healthy responses and is cut by `backoff` on a 429 or a response slower
+    than `target_latency`. Errors neither grow nor cut it: they are the
+    circuit breaker's signal, and random 5xx or transport failures say
+    nothing about how much concurrency the provider accepts. Responses to
+    requests started before the last cut are not counted again, so one
+    burst of throttling halves the limit once rather than collapsing it to
+    the minimum.
+    """
+
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 32,
+                 target_latency: float = 2.0, backoff: float = 0.5):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+
+        self._condition = threading.Condition()
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+
+    @property
+    def limit(self) -> int:
+        with self._condition:
+            return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        with self._condition:
+            return self._in_flight
+
+    def acquire(self) -> float:
+        """Block until a slot is free; returns the start time to pass to `release`"""
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+            return time.monotonic()
+
+    def release(self, started: float, ok: bool, throttled: bool = False):
+        latency = time.monotonic() - started
+        with self._condition:
+            self._in_flight -= 1
+            congested = throttled or latency > self.target_latency
+            if congested:
+                if started >= self._last_decrease:
+                    self._limit = max(self.min_limit, self._limit * self.backoff)
+                    self._last_decrease = time.monotonic()
+            elif ok:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            self._condition.notify_all()
+
+
+class ProviderHealth:
+    """Circuit breaker, concurrency limiter and counters for one provider"""
+
+    def __init__(self, name: str, breaker: Optional[CircuitBreaker] = None,
+                 limiter: Optional[AimdLimiter] = None, latency_samples: int = 10_000,
+                 throttle_retries: int = 3, throttle_backoff: float = 0.25):
+        self.name = name
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter or AimdLimiter()
+        self.throttle_retries = throttle_retries
+        self.throttle_backoff = throttle_backoff
+
+        self._lock = threading.Lock()
+        self.stats = {"sent": 0, "failed": 0, "throttled": 0, "rejected": 0, "undeliverable": 0}
+        self._latencies = deque(maxlen=latency_samples)
+
+    def available(self) -> bool:
+        """
+        True unless the circuit is open and still cooling down. A half-open
+        circuit reports available but admits a single probe, so `call` can
+        still raise ProviderUnavailable.
+        """
+        return self.breaker.state != CircuitBreaker.OPEN
+
+    def _count(self, key: str, latency: Optional[float] = None):
+        with self._lock:
+            self.stats[key] += 1
+            if latency is not None:
+                self._latencies.append(latency)
+
+    def latency_percentiles(self, *percentiles: float) -> List[Optional[float]]:
+        """Send latency percentiles (seconds) over the most recent calls"""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return [None for _ in percentiles]
+        return [samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+                for p in percentiles]
+
+    def call(self, send: Callable[..., bool], *args, **kwargs) -> bool:
+        """
+        Run `send` under the breaker and limiter.
+
+        Raises ProviderUnavailable when the circuit is open (or a half-open
+        circuit's probe is already in flight). A False return or an exception
+        from `send` (transport errors, timeouts, 5xx) counts as a provider
+        failure. MessageRejected is re-raised without counting against the
+        provider. A throttled send is retried with backoff after the limiter
+        has cut concurrency.
+        """
+        for attempt in range(self.throttle_retries + 1):
+            if not self.breaker.allow():
+                self._count("rejected")
+                raise ProviderUnavailable(self.name)
+
+            started = self.limiter.acquire()
+            ok, throttled, refused = False, False, None
+            try:
+                ok = bool(send(*args, **kwargs))
+            except ProviderThrottled:
+                throttled = True
+                logger.debug(f"{self.name} is throttling requests")
+            except MessageRejected as e:
+                refused = e
+            except Exception as e:
+                logger.error(f"{self.name} send error: {e}")
+            finally:
+                # A refused message was answered promptly: not congestion
+                self.limiter.release(started, ok or refused is not None, throttled)
+            latency = time.monotonic() - started
+
+            # 429s are pacing, not an outage: the limiter handles them,
+            # so they don't push the circuit towards open
+            previous = self.breaker.state
+            self.breaker.record(ok or throttled or refused is not None)
+            if self.breaker.state != previous:
+                logger.warning(f"{self.name} circuit {previous} -> {self.breaker.state}")
+
+            if refused is not None:
+                self._count("undeliverable", latency)
+                raise refused
+            self._count("sent" if ok else "throttled" if throttled else "failed", latency)
+            if not throttled:
+                return ok
+            time.sleep(self.throttle_backoff * 2 ** attempt)
+        return False
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        p50, p99 = self.latency_percentiles(50, 99)
+        return {
+            "provider": self.name,
+            "state": self.breaker.state,
+            "concurrency_limit": self.limiter.limit,
+            "in_flight": self.limiter.in_flight,
+            "times_opened": self.breaker.times_opened,
+            "p50_ms": None if p50 is None else round(p50 * 1000, 1),
+            "p99_ms": None if p99 is None else round(p99 * 1000, 1),
+            **stats
+        }
+
+
+class ProviderHealthRegistry:
+    """Lazily created ProviderHealth per (channel, provider)"""
+
+    def __init__(self, **defaults):
+        self._defaults = defaults
+        self._lock = threading.Lock()
+        self._providers: Dict[Tuple[str, str], ProviderHealth] = {}
+
+    def get(self, channel: str, provider: str) -> ProviderHealth:
+        with self._lock:
+            health = self._providers.get((channel, provider))
+            if health is None:
+                health = ProviderHealth(
+                    f"{channel}:{provider}",
+                    CircuitBreaker(**self._defaults.get("breaker", {})),
+                    AimdLimiter(**self._defaults.get("limiter", {}))
+                )
+                self._providers[(channel, provider)] = health
+            return health
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            providers = list(self._providers.values())
+        return [health.snapshot() for health in providers]
@@ -0,0 +1,187 @@
+"""
+Messaging Provider Simulator
+Local stand-in for the UltraMsg and TextBelt HTTP APIs with configurable
+latency, error rate and rate limit, so notification throughput can be
+measured without real provider accounts.
+
+    python provider_simulator.py --port 8765 --latency-ms 80 --error-rate 0.02 --rate-limit 50
+
+then point `notification_system.provider_urls` at http://127.0.0.1:8765.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SimulatedProvider:
+    """Behaviour of one simulated provider; `rate_limit` is requests/s (None = unlimited)"""
+
+    def __init__(self, latency_ms: float = 50.0, jitter_ms: float = 20.0,
+                 error_rate: float = 0.0, rate_limit: Optional[float] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+
+        self._lock = threading.Lock()
+        self._tokens = self.rate_limit or 0.0
+        self._refilled_at = time.monotonic()
+        self.counts = {"received": 0, "delivered": 0, "errors": 0, "throttled": 0}
+
+    def _take_token(self) -> bool:
+        """Token bucket holding up to one second of requests"""
+        if self.rate_limit is None:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit,
+                           self._tokens + (now - self._refilled_at) * self.rate_limit)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def handle(self) -> str:
+        """Decide the outcome of one request: 'delivered', 'error' or 'throttled'"""
+        with self._lock:
+            self.counts["received"] += 1
+            if not self._take_token():
+                self.counts["throttled"] += 1
+                return "throttled"
+
+        delay = max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+        time.sleep(delay)
+
+        outcome = "error" if random.random() < self.error_rate else "delivered"
+        with self._lock:
+            self.counts["errors" if outcome == "error" else "delivered"] += 1
+        return outcome
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "ProviderSimulator/1.0"
+
+    def log_message(self, format, *args):
+        pass  # one line per request would swamp load-test output
+
+    def _reply(self, status: int, body: Dict):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+
+        # UltraMsg: /{instance}/messages/chat, TextBelt: /text
+        if self.path.endswith("/messages/chat"):
+            provider = "ultramsg"
+        elif self.path == "/text":
+            provider = "textbelt"
+        else:
+            self._reply(404, {"error": f"unknown endpoint {self.path}"})
+            return
+
+        outcome = self.server.providers[provider].handle()
+        if outcome == "throttled":
+            self._reply(429, {"success": False, "error": "rate limit exceeded"})
+        elif outcome == "error":
+            self._reply(500, {"success": False, "error": "simulated provider error"})
+        elif provider == "ultramsg":
+            self._reply(200, {"sent": "true", "message": "ok"})
+        else:
+            self._reply(200, {"success": True, "quotaRemaining": 1000})
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._reply(200, {name: provider.counts
+                              for name, provider in self.server.providers.items()})
+        else:
+            self._reply(404, {"error": "not found"})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 drops connections under heavy concurrency
+    request_queue_size = 128
+
+
+class ProviderSimulator:
+    """Threaded HTTP server simulating UltraMsg and TextBelt"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 ultramsg: Optional[SimulatedProvider] = None,
+                 textbelt: Optional[SimulatedProvider] = None):
+        self.server = _Server((host, port), _Handler)
+        self.server.providers = {
+            "ultramsg": ultramsg or SimulatedProvider(),
+            "textbelt": textbelt or SimulatedProvider()
+        }
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        return {name: dict(provider.counts) for name, provider in self.server.providers.items()}
+
+    def start(self) -> "ProviderSimulator":
+        self._thread = threading.Thread(target=self.server.serve_forever,
+                                        name="provider-simulator", daemon=True)
+        self._thread.start()
+        logger.info(f"Provider simulator listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local UltraMsg/TextBelt simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="requests per second per provider (default: unlimited)")
+    args = parser.parse_args()
+
+    def provider():
+        return SimulatedProvider(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit)
+
+    logging.basicConfig(level=logging.INFO)
+    simulator = ProviderSimulator(args.host, args.port, provider(), provider())
+    print(f"Simulating UltraMsg and TextBelt on {simulator.base_url} (Ctrl+C to stop)")
+    try:
+        simulator.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.server.server_close()
+        print(json.dumps(simulator.counts, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Keyset Pagination Helpers
+Fetches one window of rows at a time using a (sort value, id) cursor, so
+the cost of a page does not grow with how deep into the table it is.
+"""
+
+import sqlite3
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Tuple
+
+Cursor = Optional[Tuple]
+
+
+def keyset_page(conn: sqlite3.Connection, select_sql: str, where: Sequence[str],
+                params: Sequence, sort_column: str, id_column: str,
+                descending: bool = True, cursor: Cursor = None,
+                limit: int = 50) -> Tuple[pd.DataFrame, Cursor]:
+    """
+    Run `select_sql` for one page ordered by (sort_column, id_column).
+
+    `sort_column` and `id_column` must be trusted SQL expressions and must
+    also be selected as `_sort_key` / `_row_id`. Returns the page and the
+    cursor for the next page (None when there are no more rows).
+    """
+    where = list(where)
+    params = list(params)
+    if cursor is not None:
+        where.append(f"({sort_column}, {id_column}) {'<' if descending else '>'} (?, ?)")
+        params.extend(cursor)
+
+    direction = "DESC" if descending else "ASC"
+    sql = select_sql
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {sort_column} {direction}, {id_column} {direction} LIMIT ?"
+    params.append(limit + 1)
+
+    page = pd.read_sql_query(sql, conn, params=params)
+    next_cursor = None
+    if len(page) > limit:
+        page = page.iloc[:limit]
+        last = page.iloc[-1]
+        next_cursor = (_plain(last['_sort_key']), _plain(last['_row_id']))
+
+    return page.drop(columns=['_sort_key', '_row_id']), next_cursor
+
+
+def _plain(value):
+    """numpy scalars -> Python values sqlite3 can bind"""
+    return value.item() if hasattr(value, 'item') else value
+
+
+class PageNavigator:
+    """
+    Remembers the cursors of pages already visited so a UI can step back.
+
+    Store an instance in session state; `cursor` is what to pass to the
+    query, `advance(next_cursor)` and `back()` move between pages, and
+    `reset()` should be called whenever filters or sort order change.
+    """
+
+    def __init__(self):
+        self._stack: List[Cursor] = [None]
+        self.filters_key: Optional[Tuple] = None
+
+    @property
+    def cursor(self) -> Cursor:
+        return self._stack[-1]
+
+    @property
+    def page_number(self) -> int:
+        return len(self._stack)
+
+    def advance(self, next_cursor: Cursor):
+        if next_cursor is not None:
+            self._stack.append(next_cursor)
+
+    def back(self):
+        if len(self._stack) > 1:
+            self._stack.pop()
+
+    def reset(self, filters_key: Optional[Tuple] = None):
+        self._stack = [None]
+        self.filters_key = filters_key
+
+    def sync(self, filters_key: Tuple):
+        """Reset to the first page if the filters changed since last time"""
+        if filters_key != self.filters_key:
+            self.reset(filters_key)
+
+
+def build_filters(conditions: Dict[str, object]) -> Tuple[List[str], List]:
+    """Turn {"sql fragment with ?": value} into where/params, skipping None/empty values"""
+    where, params = [], []
+    for fragment, value in conditions.items():
+        if value is None or value == "" or value == []:
+            continue
+        where.append(fragment)
+        if isinstance(value, (list, tuple)):
+            params.extend(value)
+        else:
+            params.append(value)
+    return where, params
@@ -0,0 +1,87 @@
+"""
+Stage Timing
+Wall-clock timing for the stages of a page run (CSV parse, filtering,
+aggregation, chart build). A page creates a StageTimer and activates it
+for the current script thread; loaders and helpers wrap their work in
+`timed(...)`, which records into the active timer (and only logs when
+none is active). The timer produces the per-stage breakdown for debug
+panels.
+
+Stages inside Streamlit-cached functions are recorded only when the cache
+misses, so the breakdown shows which loaders actually ran this time.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+_active = threading.local()
+
+
+class StageTimer:
+    """
+    Ordered record of (stage, seconds, depth) for one run. Stages may
+    nest; nested stages are listed under their parent.
+    """
+
+    def __init__(self):
+        self.stages: List[Dict] = []
+        self.started = time.perf_counter()
+        self._depth = 0
+
+    def activate(self) -> "StageTimer":
+        """Make this the timer `timed()` records into on the current thread"""
+        _active.timer = self
+        return self
+
+    def deactivate(self):
+        if getattr(_active, "timer", None) is self:
+            _active.timer = None
+
+    @contextmanager
+    def stage(self, name: str):
+        # Entries are added in start order and filled in on exit, so nested
+        # stages follow their parent in the breakdown
+        entry = {"stage": name, "seconds": None, "depth": self._depth}
+        self.stages.append(entry)
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry["seconds"] = time.perf_counter() - started
+            self._depth = entry["depth"]
+            logger.debug(f"{name}: {entry['seconds'] * 1000:.1f} ms")
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the timer was created"""
+        return time.perf_counter() - self.started
+
+    def breakdown(self) -> List[Dict]:
+        """Finished stages in start order with milliseconds and share of the run"""
+        total = self.elapsed or 1.0
+        return [{
+            "stage": "  " * entry["depth"] + entry["stage"],
+            "ms": round(entry["seconds"] * 1000, 1),
+            "share": f"{entry['seconds'] / total:.0%}"
+        } for entry in self.stages if entry["seconds"] is not None]
+
+
+@contextmanager
+def timed(name: str):
+    """Time a stage on the current thread's active StageTimer, if any"""
+    timer = getattr(_active, "timer", None)
+    if timer is None:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            logger.debug(f"{name}: {(time.perf_counter() - started) * 1000:.1f} ms")
+        return
+    with timer.stage(name):
+        yield
@@ -0,0 +1,308 @@
+"""
+Bulk Subscriber Import / Export
+Streams large contact lists (CSV or Excel) into the subscriber store in
+chunks: phone numbers are validated and normalized with vectorized string
+operations, valid rows are upserted with executemany inside one transaction
+per chunk, and rejected rows are written to a report as they are found.
+
+Re-importing a number keeps its stored `active` flag, so an old list never
+re-subscribes someone who opted out; only an explicit `active` column (as
+in an export file) changes it.
+"""
+
+import io
+import json
+import os
+import sqlite3
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+from message_templates import SUPPORTED_LANGUAGES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNKSIZE = 10_000
+
+IMPORT_COLUMNS = [
+    "name", "phone_number", "whatsapp_number", "notification_types",
+    "preferred_method", "min_magnitude", "regions", "language"
+]
+
+DEFAULT_NOTIFICATION_TYPES = ["high_risk", "medium_risk"]
+DEFAULT_REGIONS = ["Himalayan", "Central", "South", "West", "East"]
+PREFERRED_METHODS = {"whatsapp", "sms", "both"}
+
+# Accepted spellings of the optional `active` column
+ACTIVE_VALUES = {"1": 1, "true": 1, "yes": 1, "y": 1,
+                 "0": 0, "false": 0, "no": 0, "n": 0}
+
+Source = Union[str, os.PathLike, io.IOBase, pd.DataFrame]
+
+
+def _flag(mask: pd.Series, missing: bool = False):
+    """Nullable boolean result -> plain numpy bool array"""
+    return mask.fillna(missing).to_numpy(dtype=bool)
+
+
+def normalize_phone_numbers(numbers: pd.Series, default_country_code: str = "91") -> pd.Series:
+    """
+    Normalize phone numbers to E.164 (e.g. +919876543210); invalid -> NaN.
+
+    Bare 10-digit Indian mobiles, a leading trunk 0 and a missing '+' on
+    numbers that already carry the country code are all accepted.
+    """
+    raw = numbers.astype("string").str.strip()
+    has_plus = _flag(raw.str.startswith("+"))
+    digits = raw.str.replace(r"\D", "", regex=True)
+    digits = digits.where(has_plus, digits.str.replace(r"^00", "", regex=True))
+
+    cc = default_country_code
+    national = _flag(digits.str.fullmatch(r"0?[6-9]\d{9}")) & ~has_plus
+    with_cc = _flag(digits.str.fullmatch(rf"{cc}[6-9]\d{{9}}")) & ~has_plus
+    international = _flag(digits.str.fullmatch(r"[1-9]\d{7,14}")) & has_plus
+
+    normalized = pd.Series(pd.NA, index=numbers.index, dtype="string")
+    normalized = normalized.mask(national, "+" + cc + digits.str[-10:])
+    normalized = normalized.mask(with_cc | international, "+" + digits)
+    return normalized
+
+
+def _json_list(cell: str) -> Optional[str]:
+    """Re-serialized JSON array cell, or None when it is not a valid array"""
+    try:
+        items = json.loads(cell)
+    except ValueError:
+        return None
+    return json.dumps(items) if isinstance(items, list) else None
+
+
+def _split_list_column(values: pd.Series, default: list) -> Tuple[pd.Series, np.ndarray]:
+    """
+    Normalize list cells written as JSON arrays or ';'/','/'|' separated text
+    to JSON. Returns the JSON strings and a mask of malformed cells (a cell
+    starting with '[' that is not a valid JSON array).
+    """
+    if values.dtype == object:
+        # DataFrame sources may hold real lists
+        values = values.map(lambda cell: json.dumps(list(cell))
+                            if isinstance(cell, (list, tuple)) else cell)
+    text = values.astype("string").str.strip()
+    is_json = _flag(text.str.startswith("["))
+    plain = ~is_json & _flag(text != "")
+
+    result = pd.Series(json.dumps(default), index=values.index, dtype=object)
+    malformed = np.zeros(len(values), dtype=bool)
+    if is_json.any():
+        parsed = text[is_json].map(_json_list)
+        result[is_json] = parsed.to_numpy()
+        malformed[is_json] = parsed.isna().to_numpy()
+    if plain.any():
+        result[plain] = (text[plain].str.split(r"\s*[;,|]\s*", regex=True)
+                         .map(lambda items: json.dumps([item for item in items if item]))
+                         .to_numpy())
+    return result, malformed
+
+
+def normalize_chunk(chunk: pd.DataFrame, default_country_code: str = "91"):
+    """Validate one chunk; returns (rows ready to upsert, rejected rows with reasons)"""
+    chunk = chunk.rename(columns=lambda c: str(c).strip().lower().replace(" ", "_"))
+    for column in IMPORT_COLUMNS + ["active"]:
+        if column not in chunk.columns:
+            chunk[column] = pd.NA
+
+    name = chunk["name"].astype("string").str.strip()
+    phone = normalize_phone_numbers(chunk["phone_number"], default_country_code)
+    whatsapp = normalize_phone_numbers(chunk["whatsapp_number"], default_country_code)
+    whatsapp_given = _flag(chunk["whatsapp_number"].astype("string").str.strip() != "")
+
+    method = chunk["preferred_method"].astype("string").str.strip().str.lower().fillna("both")
+    magnitude = pd.to_numeric(chunk["min_magnitude"], errors="coerce")
+    magnitude_given = chunk["min_magnitude"].notna().to_numpy()
+    language = chunk["language"].astype("string").str.strip().str.lower().fillna("en")
+    notification_types, bad_types = _split_list_column(chunk["notification_types"],
+                                                       DEFAULT_NOTIFICATION_TYPES)
+    regions, bad_regions = _split_list_column(chunk["regions"], DEFAULT_REGIONS)
+    active_text = chunk["active"].astype("string").str.strip().str.lower()
+    # Blank keeps the stored flag (new numbers start active)
+    active = active_text.map(ACTIVE_VALUES.get, na_action="ignore").astype("Int8")
+    active_given = _flag(active_text != "")
+
+    checks = [
+        (~_flag(name != ""), "missing name"),
+        (phone.isna().to_numpy(), "invalid phone number"),
+        (whatsapp_given & whatsapp.isna().to_numpy(), "invalid WhatsApp number"),
+        (~_flag(method.isin(PREFERRED_METHODS)), "unknown preferred_method"),
+        (magnitude_given & ~magnitude.between(0, 10).to_numpy(), "invalid min_magnitude"),
+        (bad_types, "malformed notification_types list"),
+        (bad_regions, "malformed regions list"),
+        (~_flag(language.isin(list(SUPPORTED_LANGUAGES))), "unsupported language"),
+        (active_given & active.isna().to_numpy(), "invalid active flag"),
+    ]
+    reasons = pd.Series("", index=chunk.index, dtype=object)
+    for failed, reason in checks:
+        reasons[failed] = reasons[failed] + reason + "; "
+    reasons = reasons.str.rstrip("; ")
+
+    valid = (reasons == "").to_numpy()
+    rejects = chunk.loc[~valid].assign(reject_reason=reasons[~valid])
+
+    rows = pd.DataFrame({
+        "name": name[valid],
+        "phone_number": phone[valid],
+        "whatsapp_number": whatsapp[valid].fillna(phone[valid]),
+        "notification_types": notification_types[valid],
+        "preferred_method": method[valid],
+        "min_magnitude": magnitude[valid].fillna(4.0),
+        "regions": regions[valid],
+        "language": language[valid],
+        "active": active[valid]
+    })
+    # Later rows win when a file repeats a number
+    rows = rows.drop_duplicates(subset="phone_number", keep="last")
+    return rows, rejects
+
+
+def iter_source_chunks(source: Source, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """Yield DataFrame chunks from a CSV/Excel path, file object or DataFrame"""
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start:start + chunksize]
+        return
+
+    name = str(getattr(source, "name", source)).lower()
+    if name.endswith((".xlsx", ".xlsm")):
+        # openpyxl's read-only mode streams rows instead of loading the sheet
+        from openpyxl import load_workbook
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h) for h in next(rows, [])]
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+        workbook.close()
+    else:
+        yield from pd.read_csv(source, dtype=str, chunksize=chunksize,
+                               keep_default_na=False, na_values=[""])
+
+
+def _upsert_statement(columns) -> str:
+    """Upsert of `columns` that leaves every other stored column alone on conflict"""
+    updates = ",\n                ".join(f"{column} = excluded.{column}"
+                                          for column in columns if column != "phone_number")
+    return f'''
+            INSERT INTO notification_subscribers ({", ".join(columns)})
+            VALUES ({", ".join("?" for _ in columns)})
+            ON CONFLICT(phone_number) DO UPDATE SET
+                {updates}
+        '''
+
+
+def _upsert_chunk(conn: sqlite3.Connection, rows: pd.DataFrame):
+    """Upsert subscribers and rewrite their region / alert-type links in one transaction"""
+    flagged = rows["active"].notna().to_numpy()
+    with conn:
+        # Rows without an explicit flag keep the stored one (the column
+        # default for new numbers)
+        for mask, columns in ((~flagged, IMPORT_COLUMNS), (flagged, IMPORT_COLUMNS + ["active"])):
+            if mask.any():
+                records = rows.loc[mask, columns].astype(object).itertuples(index=False, name=None)
+                conn.executemany(_upsert_statement(columns), list(records))
+
+        # The batch table drives the joins (CROSS JOIN keeps it as the outer loop)
+        conn.execute('DELETE FROM temp.import_batch')
+        conn.executemany('INSERT INTO temp.import_batch (phone_number) VALUES (?)',
+                         [(phone,) for phone in rows["phone_number"]])
+        conn.execute('''
+            DELETE FROM subscriber_regions WHERE subscriber_id IN (
+                SELECT s.id FROM temp.import_batch b
+                CROSS JOIN notification_subscribers s ON s.phone_number = b.phone_number)
+        ''')
+        conn.execute('''
+            DELETE FROM subscriber_alert_types WHERE subscriber_id IN (
+                SELECT s.id FROM temp.import_batch b
+                CROSS JOIN notification_subscribers s ON s.phone_number = b.phone_number)
+        ''')
+        conn.execute('''
+            INSERT OR IGNORE INTO subscriber_regions (region, subscriber_id)
+            SELECT j.value, s.id FROM temp.import_batch b
+            CROSS JOIN notification_subscribers s ON s.phone_number = b.phone_number, json_each(s.regions) j
+        ''')
+        conn.execute('''
+            INSERT OR IGNORE INTO subscriber_alert_types (alert_type, subscriber_id)
+            SELECT j.value, s.id FROM temp.import_batch b
+            CROSS JOIN notification_subscribers s ON s.phone_number = b.phone_number, json_each(s.notification_types) j
+        ''')
+
+
+def import_subscribers(source: Source, db_path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                       reject_path: Optional[str] = None,
+                       default_country_code: str = "91") -> Dict:
+    """
+    Stream subscribers from `source` into the database.
+
+    Returns counts of rows read, upserted and rejected. Rejected rows, with
+    a `reject_reason` column, are appended to `reject_path` if given.
+    """
+    summary = {"read": 0, "upserted": 0, "rejected": 0, "reject_path": reject_path}
+    reject_header = True
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TEMP TABLE IF NOT EXISTS import_batch (phone_number TEXT PRIMARY KEY)')
+    try:
+        for chunk in iter_source_chunks(source, chunksize):
+            rows, rejects = normalize_chunk(chunk, default_country_code)
+            summary["read"] += len(chunk)
+            summary["rejected"] += len(rejects)
+
+            if not rows.empty:
+                _upsert_chunk(conn, rows)
+                summary["upserted"] += len(rows)
+
+            if reject_path and not rejects.empty:
+                rejects.to_csv(reject_path, mode="w" if reject_header else "a",
+                               header=reject_header, index=False)
+                reject_header = False
+
+            logger.info(f"Imported chunk: {len(rows)} upserted, {len(rejects)} rejected")
+    finally:
+        conn.close()
+
+    return summary
+
+
+def iter_subscriber_export(db_path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                           active_only: bool = False) -> Iterator[pd.DataFrame]:
+    """Yield subscribers in id order, with list columns in the import format"""
+    conn = sqlite3.connect(db_path)
+    try:
+        query = f'''
+            SELECT id, name, phone_number, whatsapp_number, notification_types,
+                   preferred_method, min_magnitude, regions, language, active, created_at
+            FROM notification_subscribers
+            {"WHERE active = 1" if active_only else ""}
+            ORDER BY id
+        '''
+        for chunk in pd.read_sql_query(query, conn, chunksize=chunksize):
+            for column in ("notification_types", "regions"):
+                chunk[column] = chunk[column].map(
+                    lambda value: ";".join(json.loads(value)) if value else "")
+            yield chunk
+    finally:
+        conn.close()
+
+
+def export_subscribers(destination: Union[str, io.IOBase], db_path: str,
+                       chunksize: int = DEFAULT_CHUNKSIZE, active_only: bool = False) -> int:
+    """Write subscribers to a CSV path or text buffer chunk by chunk; returns the row count"""
+    exported = 0
+    for i, chunk in enumerate(iter_subscriber_export(db_path, chunksize, active_only)):
+        chunk.to_csv(destination, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        exported += len(chunk)
+    return exported
@@ -0,0 +1,169 @@
+"""
+Subscriber Inverted Index
+Normalized subscriber -> region / alert type tables, plus an in-memory
+inverted index of sorted numpy id arrays so matching subscribers for an
+earthquake is an array lookup and an intersection instead of JSON parsing.
+"""
+
+import sqlite3
+import threading
+import time
+import logging
+import numpy as np
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+EMPTY_IDS = np.empty(0, dtype=np.int64)
+
+
+def init_subscriber_tables(conn: sqlite3.Connection):
+    """Create the normalized region/alert-type tables and backfill them from JSON"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS subscriber_regions (
+            region TEXT NOT NULL,
+            subscriber_id INTEGER NOT NULL,
+            PRIMARY KEY (region, subscriber_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS subscriber_alert_types (
+            alert_type TEXT NOT NULL,
+            subscriber_id INTEGER NOT NULL,
+            PRIMARY KEY (alert_type, subscriber_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_subscriber_regions_subscriber
+        ON subscriber_regions (subscriber_id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_subscriber_alert_types_subscriber
+        ON subscriber_alert_types (subscriber_id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_subscribers_active_magnitude
+        ON notification_subscribers (active, min_magnitude)
+    ''')
+
+    # Older databases only have the JSON columns
+    already_filled = cursor.execute('SELECT 1 FROM subscriber_regions LIMIT 1').fetchone()
+    if already_filled is None:
+        cursor.execute('''
+            INSERT OR IGNORE INTO subscriber_regions (region, subscriber_id)
+            SELECT j.value, s.id FROM notification_subscribers s, json_each(s.regions) j
+            WHERE json_valid(s.regions)
+        ''')
+        cursor.execute('''
+            INSERT OR IGNORE INTO subscriber_alert_types (alert_type, subscriber_id)
+            SELECT j.value, s.id FROM notification_subscribers s, json_each(s.notification_types) j
+            WHERE json_valid(s.notification_types)
+        ''')
+
+
+def write_subscriber_links(cursor: sqlite3.Cursor, subscriber_id: int,
+                           regions: Iterable[str], alert_types: Iterable[str]):
+    """Replace a subscriber's rows in the normalized tables"""
+    cursor.execute('DELETE FROM subscriber_regions WHERE subscriber_id = ?', (subscriber_id,))
+    cursor.execute('DELETE FROM subscriber_alert_types WHERE subscriber_id = ?', (subscriber_id,))
+    cursor.executemany('INSERT OR IGNORE INTO subscriber_regions VALUES (?, ?)',
+                       [(region, subscriber_id) for region in regions])
+    cursor.executemany('INSERT OR IGNORE INTO subscriber_alert_types VALUES (?, ?)',
+                       [(alert_type, subscriber_id) for alert_type in alert_types])
+
+
+class SubscriberIndex:
+    """
+    In-memory index over active subscribers.
+
+    Region and alert-type postings are sorted int64 arrays of subscriber ids.
+    Minimum magnitudes live in a dense array indexed by subscriber id (inf
+    for inactive ids), so the magnitude filter is one gather over the region
+    posting rather than a scan of every subscriber. The index is rebuilt lazily
+    after `invalidate()` or once it is older than `max_age_seconds`, which
+    also picks up subscribers added by other processes.
+    """
+
+    def __init__(self, db_path: str, max_age_seconds: float = 60):
+        self.db_path = db_path
+        self.max_age_seconds = max_age_seconds
+
+        self._lock = threading.Lock()
+        self._built_at: Optional[float] = None
+        self._regions: Dict[str, np.ndarray] = {}
+        self._alert_types: Dict[str, np.ndarray] = {}
+        self._min_magnitude = np.empty(0, dtype=np.float64)
+
+    def invalidate(self):
+        with self._lock:
+            self._built_at = None
+
+    @staticmethod
+    def _postings(conn: sqlite3.Connection, table: str, key_column: str,
+                  min_magnitude: np.ndarray) -> Dict[str, np.ndarray]:
+        """Read each key's ids in primary-key order, keeping active subscribers"""
+        postings = {}
+        keys = [row[0] for row in conn.execute(f'SELECT DISTINCT {key_column} FROM {table}')]
+        for key in keys:
+            cursor = conn.execute(
+                f'SELECT subscriber_id FROM {table} WHERE {key_column} = ? ORDER BY subscriber_id',
+                (key,)
+            )
+            ids = np.fromiter((row[0] for row in cursor), dtype=np.int64)
+            ids = ids[ids < len(min_magnitude)]
+            ids = ids[np.isfinite(min_magnitude[ids])]
+            if len(ids):
+                postings[key] = ids
+        return postings
+
+    def build(self):
+        """Load active subscribers and postings from SQLite"""
+        conn = sqlite3.connect(self.db_path)
+        subscribers = conn.execute('''
+            SELECT id, COALESCE(min_magnitude, 0) FROM notification_subscribers
+            WHERE active = 1
+        ''').fetchall()
+
+        ids = np.array([row[0] for row in subscribers], dtype=np.int64)
+        min_magnitude = np.full(int(ids.max()) + 1 if len(ids) else 0, np.inf)
+        min_magnitude[ids] = [row[1] for row in subscribers]
+
+        regions = self._postings(conn, 'subscriber_regions', 'region', min_magnitude)
+        alert_types = self._postings(conn, 'subscriber_alert_types', 'alert_type', min_magnitude)
+        conn.close()
+
+        with self._lock:
+            self._min_magnitude = min_magnitude
+            self._regions, self._alert_types = regions, alert_types
+            self._built_at = time.monotonic()
+
+        logger.info(f"Subscriber index built: {len(ids)} active subscribers, "
+                    f"{len(regions)} regions")
+
+    def _ensure_fresh(self):
+        with self._lock:
+            stale = (self._built_at is None or
+                     time.monotonic() - self._built_at > self.max_age_seconds)
+        if stale:
+            self.build()
+
+    def match(self, magnitude: float, region: str, alert_type: str = None) -> np.ndarray:
+        """Sorted ids of active subscribers in `region` with min_magnitude <= magnitude"""
+        self._ensure_fresh()
+        with self._lock:
+            region_ids = self._regions.get(region, EMPTY_IDS)
+            min_magnitude = self._min_magnitude
+            type_ids = self._alert_types.get(alert_type, EMPTY_IDS) if alert_type else None
+
+        matched = region_ids[min_magnitude[region_ids] <= magnitude]
+        if type_ids is not None:
+            matched = np.intersect1d(matched, type_ids, assume_unique=True)
+        return matched
+
+    def with_alert_types(self, alert_types: Iterable[str]) -> np.ndarray:
+        """Sorted ids of active subscribers holding any of the given alert types"""
+        self._ensure_fresh()
+        with self._lock:
+            arrays = [self._alert_types.get(t, EMPTY_IDS) for t in alert_types]
+        return np.unique(np.concatenate(arrays)) if arrays else EMPTY_IDS
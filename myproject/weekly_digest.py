@@ -0,0 +1,196 @@
+"""
+Weekly Earthquake Digest
+Builds the weekly summary in a single aggregation pass over the historical
+catalog and the prediction files, then renders it once per distinct
+subscriber preference profile instead of once per subscriber.
+
+A digest is keyed by the Monday of the week it looks ahead to: predictions
+cover that week, recorded earthquakes the seven days before it.
+"""
+
+import pandas as pd
+import numpy as np
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from geo_filter import india_mask, classify_regional_zone
+
+MAGNITUDE_BINS = [-np.inf, 4.0, 5.0, 6.0, np.inf]
+MAGNITUDE_BANDS = ["<4.0", "4.0-4.9", "5.0-5.9", "6.0+"]
+TOP_PREDICTIONS_PER_ZONE = 5
+
+
+def upcoming_week_start(today: Optional[date] = None) -> date:
+    """The Monday the next digest looks ahead from (today, on a Monday)"""
+    today = today or date.today()
+    return today + timedelta(days=-today.weekday() % 7)
+
+
+def _band(magnitudes: pd.Series) -> pd.Series:
+    return pd.cut(magnitudes, bins=MAGNITUDE_BINS, labels=MAGNITUDE_BANDS, right=False)
+
+
+def _nested_counts(counts: pd.Series) -> Dict[str, Dict[str, int]]:
+    """Turn a (zone, band) -> count series into {zone: {band: count}}"""
+    nested: Dict[str, Dict[str, int]] = {}
+    for (zone, band), count in counts.items():
+        if count:
+            nested.setdefault(str(zone), {})[str(band)] = int(count)
+    return nested
+
+
+def aggregate_observed(catalog: pd.DataFrame, week_start: date) -> Dict[str, Dict]:
+    """
+    Count recorded Indian earthquakes by zone and band for the seven days
+    before `week_start` ("this_week") and the seven days before those
+    """
+    empty = {"this_week": {}, "last_week": {}}
+    if catalog.empty or 'time' not in catalog.columns:
+        return empty
+
+    times = pd.to_datetime(catalog['time'], errors='coerce', utc=True).dt.tz_localize(None)
+    window_start = pd.Timestamp(week_start - timedelta(days=14))
+    this_week_start = pd.Timestamp(week_start - timedelta(days=7))
+    window_end = pd.Timestamp(week_start)
+
+    in_window = ((times >= window_start) & (times < window_end)).to_numpy()
+    if not in_window.any():
+        return empty
+
+    frame = catalog.loc[in_window]
+    frame_times = times[in_window]
+    inside = india_mask(frame)
+    frame, frame_times = frame[inside], frame_times[inside]
+    if frame.empty:
+        return empty
+
+    mag_col = 'mag' if 'mag' in frame.columns else 'magnitude'
+    keys = pd.DataFrame({
+        'week': np.where(frame_times >= this_week_start, "this_week", "last_week"),
+        'zone': classify_regional_zone(frame['latitude']),
+        'band': _band(pd.to_numeric(frame[mag_col], errors='coerce')).astype(str)
+    })
+    counts = keys.groupby(['week', 'zone', 'band']).size()
+
+    result = dict(empty)
+    for week in ("this_week", "last_week"):
+        if week in counts.index.get_level_values(0):
+            result[week] = _nested_counts(counts.loc[week])
+    return result
+
+
+def aggregate_predictions(predictions: pd.DataFrame, week_start: date) -> Tuple[Dict, List[Dict]]:
+    """Count predictions for the coming week by zone and band, and keep the top ones per zone"""
+    if predictions.empty:
+        return {}, []
+
+    dates = pd.to_datetime(predictions['prediction_date']).dt.date
+    upcoming = predictions[(dates >= week_start) & (dates < week_start + timedelta(days=7))]
+    if upcoming.empty:
+        return {}, []
+
+    bands = _band(upcoming['predicted_magnitude']).astype(str)
+    counts = upcoming.groupby([upcoming['regional_zone'], bands]).size()
+
+    top = (upcoming.sort_values(['predicted_magnitude', 'earthquake_probability'],
+                                ascending=[False, False])
+           .groupby('regional_zone', sort=False)
+           .head(TOP_PREDICTIONS_PER_ZONE))
+
+    top_predictions = [
+        {
+            'prediction_date': str(row.prediction_date),
+            'regional_zone': row.regional_zone,
+            'predicted_magnitude': float(row.predicted_magnitude),
+            'earthquake_probability': float(row.earthquake_probability),
+            'risk_category': row.risk_category,
+            'model_type': row.model_type
+        }
+        for row in top.itertuples(index=False)
+    ]
+    return _nested_counts(counts), top_predictions
+
+
+def build_weekly_digest(catalog: pd.DataFrame, predictions: pd.DataFrame,
+                        week_start: Optional[date] = None,
+                        previous_digest: Optional[Dict] = None) -> Dict:
+    """
+    Compute the full digest; profile rendering only reads from this.
+    Without a `previous_digest` there is no prediction baseline, and
+    `predicted_last_week` is None.
+    """
+    if week_start is None:
+        week_start = upcoming_week_start()
+
+    observed = aggregate_observed(catalog, week_start)
+    predicted, top_predictions = aggregate_predictions(predictions, week_start)
+
+    return {
+        'week_start': str(week_start),
+        'week_end': str(week_start + timedelta(days=6)),
+        'observed': observed['this_week'],
+        'observed_last_week': observed['last_week'],
+        'predicted': predicted,
+        'predicted_last_week': previous_digest.get('predicted', {}) if previous_digest else None,
+        'top_predictions': top_predictions,
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M')
+    }
+
+
+def _zone_total(counts: Dict[str, Dict[str, int]], zone: str, min_band: int = 0) -> int:
+    return sum(n for band, n in counts.get(zone, {}).items()
+               if band in MAGNITUDE_BANDS[min_band:])
+
+
+def _delta(current: int, previous: int) -> str:
+    change = current - previous
+    if change > 0:
+        return f"▲{change}"
+    if change < 0:
+        return f"▼{-change}"
+    return "no change"
+
+
+def render_weekly_digest(digest: Dict, regions: Tuple[str, ...], min_magnitude: float) -> str:
+    """Render the digest for one subscriber profile (regions + minimum magnitude)"""
+    lines = [
+        "📰 *Bhukamp Weekly Earthquake Digest*",
+        f"🗓️ {digest['week_start']} to {digest['week_end']}",
+        "",
+        "📊 *Recorded earthquakes in the past 7 days vs the 7 before*"
+    ]
+
+    for zone in regions:
+        current = _zone_total(digest['observed'], zone)
+        previous = _zone_total(digest['observed_last_week'], zone)
+        strong = _zone_total(digest['observed'], zone, min_band=2)
+        lines.append(f"• {zone}: {current} ({_delta(current, previous)}), M5+: {strong}")
+
+    lines += ["", "🔮 *Predicted activity this week*"]
+    for zone in regions:
+        current = _zone_total(digest['predicted'], zone)
+        if digest.get('predicted_last_week') is None:
+            # First digest: no earlier week to compare against
+            lines.append(f"• {zone}: {current} predictions")
+            continue
+        previous = _zone_total(digest['predicted_last_week'], zone)
+        lines.append(f"• {zone}: {current} predictions ({_delta(current, previous)})")
+
+    top = [p for p in digest['top_predictions']
+           if p['regional_zone'] in regions and p['predicted_magnitude'] >= min_magnitude][:5]
+    if top:
+        lines += ["", "⚠️ *Top predictions for your regions*"]
+        for i, p in enumerate(top, start=1):
+            lines.append(
+                f"{i}. M{p['predicted_magnitude']:.1f} {p['regional_zone']} on "
+                f"{p['prediction_date']} ({p['earthquake_probability'] * 100:.0f}%, {p['risk_category']} risk)"
+            )
+
+    lines += [
+        "",
+        "⚠️ *Disclaimer*: AI-based predictions. Maintain earthquake preparedness always.",
+        "",
+        "Stay safe! 🙏",
+        "Team Bhukamp"
+    ]
+    return "\n".join(lines)